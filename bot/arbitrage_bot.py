@@ -1,23 +1,39 @@
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 import re
 from tabulate import tabulate
 from pynput import keyboard
 import json
-import pickle
 
 from exchanges.Binance_operations import Binance_operations
+from bot.inference_service import Inference_service
 from exchange_connection import Exchange_connection
+from feature_library import Feature_library
+from feature_pipeline import Feature_pipeline
+from model_registry import Model_registry
+
+ONLINE_TAG = "online"
+TRADE_DELAY = 300
 
 
 class Arbitrage_bot:
-    def __init__(self, cryptocurrency_pairs):
+    def __init__(self, cryptocurrency_pairs, model_selection=None, online_learning=False):
         self.cryptocurrency_pairs = cryptocurrency_pairs
+        self.model_selection = model_selection if model_selection is not None else {}
+        self.online_learning = online_learning
+        self.model_registry = Model_registry()
         self.exchange_connection = Exchange_connection()
         self.Binance_crypto_pairs, self.Bybit_crypto_pairs, self.portfolio, self.Binance_position_counter, \
             self.Bybit_position_counter = [], [], None, 0, 0
         self.running = True
         self.min_percentage_profit = 0.01
+        self.feature_pipelines = {}
+        self.model_versions = {}
+        self.scheduled_trades = {}
+        self.inference_service = Inference_service(self.load_model)
+        self.online_learners = {}
+        self.learning_executor = ThreadPoolExecutor(max_workers=1)
 
         self.Binance_client = self.exchange_connection.Binance_client
         self.Bybit_client = self.exchange_connection.Bybit_client
@@ -36,6 +52,8 @@ class Arbitrage_bot:
             self.machine_learning_inclusion = True
         if machine_learning == "n":
             self.machine_learning_inclusion = False
+        if self.machine_learning_inclusion and self.online_learning:
+            self.start_online_learning()
         self.arbitrage_search()
 
     def get_Binance_pairs(self, required_pairs):
@@ -454,65 +472,195 @@ class Arbitrage_bot:
         if not self.portfolio:
             return
 
+    def update_features(self, Binance_pair=None):
+        """
+        Feed the latest candles of both exchanges into the feature pipeline of the pair prepared by select_model,
+        which computes the features exactly as in the training and keyed by the timestamp of the candle
+        :param Binance_pair: cryptocurrency pair on Binance
+        :return: the last two candles of both exchanges and the features of the last completed candle, which are the
+        same for every tick within the open candle; None if no candle has been completed yet
+        """
+        start_date = datetime.now().timestamp() * 1000 - 60 * 1000 * 2
+        Binance_OHLCV = self.Binance_client.get_historical_klines(Binance_pair["symbol"], "1m", int(start_date), 2)
+        Bybit_OHLCV = self.Bybit_client.get_historical_klines(Binance_pair["symbol"], 1, start_date, 2)
+        if Binance_OHLCV is None or Bybit_OHLCV is None or len(Binance_OHLCV) < 2 or len(Bybit_OHLCV) < 2 or \
+                len(Binance_OHLCV[1]) < 6 or len(Bybit_OHLCV[1]) < 6:
+            return None
+
+        Binance_OHLCV = sorted(Binance_OHLCV[:2], key=lambda candle: int(candle[0]))
+        Bybit_OHLCV = sorted(Bybit_OHLCV[:2], key=lambda candle: int(candle[0]))
+        if [int(candle[0]) for candle in Binance_OHLCV] != [int(candle[0]) for candle in Bybit_OHLCV]:
+            return None
+
+        if Binance_pair["symbol"] in self.online_learners:
+            self.learning_executor.submit(self.learn_online, Binance_pair["symbol"], Binance_OHLCV, Bybit_OHLCV)
+        pipeline = self.feature_pipelines[Binance_pair["symbol"]][0]
+        dataset_row = None
+        for Binance_candle, Bybit_candle in zip(Binance_OHLCV, Bybit_OHLCV):
+            dataset_row = pipeline.update(Binance_candle, Bybit_candle)
+        if dataset_row is None:
+            return None
+        return Binance_OHLCV, Bybit_OHLCV, dataset_row
+
+    def get_feature_pipeline(self, symbol=None, feature_config=None):
+        """
+        Get the feature pipeline of the pair computing the features of the library in the configuration, the pipeline
+        is built again only when the configuration changes, so its pending candle and history are kept otherwise
+        :param symbol: symbol of the cryptocurrency pair
+        :param feature_config: configuration of the features of the library, None without them
+        :return: feature pipeline of the pair
+        """
+        if symbol not in self.feature_pipelines or self.feature_pipelines[symbol][1] != feature_config:
+            self.feature_pipelines[symbol] = (Feature_pipeline(None if feature_config is None
+                                                               else Feature_library(feature_config)), feature_config)
+        return self.feature_pipelines[symbol][0]
+
+    def select_model(self, symbol=None):
+        """
+        Resolve the model version of the pair once per tick, the version or tag chosen in model_selection or the
+        current version otherwise; when another version is selected, e.g. when the online learning moves the selected
+        tag, the feature pipeline is prepared for the features of its manifest
+        :param symbol: symbol of the cryptocurrency pair
+        :return: key of the selected model, the symbol and the version
+        """
+        version = self.model_registry.resolve(symbol, self.model_selection.get(symbol))
+        if self.model_versions.get(symbol) != version:
+            manifest = self.model_registry.get_manifest(symbol, version)
+            pipeline = self.get_feature_pipeline(symbol, manifest.get("feature_config"))
+            if manifest["features"] != pipeline.columns:
+                raise ValueError(f"Model version {version} of {symbol} expects the features "
+                                 f"{manifest['features']}, which the bot does not compute.")
+            self.model_versions[symbol] = version
+        return symbol, version
+
+    def load_model(self, model_key=None):
+        """
+        Load the compiled model from the model registry, its arrays are mapped into memory; registered versions never
+        change, so the inference service keeps the loaded model until another version is selected
+        :param model_key: symbol of the cryptocurrency pair and the version of its model
+        :return: compiled model
+        """
+        return self.model_registry.load(*model_key)
+
+    def start_online_learning(self):
+        """
+        Continue the learning of the selected model of every pair on the closed candles, the updated models are
+        registered as new versions under ONLINE_TAG, which is selected for the pair
+        """
+        # imported only here, the online learning depends on the modules of the machine learning process
+        from machine_learning.online_learning import Online_learning
+        for Binance_pair in self.Binance_crypto_pairs:
+            symbol = Binance_pair["symbol"]
+            self.online_learners[symbol] = Online_learning.from_registry(symbol, self.model_selection.get(symbol),
+                                                                         ONLINE_TAG)
+            self.model_selection[symbol] = ONLINE_TAG
+
+    def learn_online(self, symbol=None, Binance_OHLCV=None, Bybit_OHLCV=None):
+        """
+        Feed the last candles of both exchanges into the online learning of the pair, which updates the model once a
+        candle is closed; run in the background, so that refitting never delays the trading
+        :param symbol: symbol of the cryptocurrency pair
+        :param Binance_OHLCV: last two candles on Binance
+        :param Bybit_OHLCV: last two candles on Bybit
+        """
+        try:
+            for Binance_candle, Bybit_candle in zip(Binance_OHLCV, Bybit_OHLCV):
+                self.online_learners[symbol].update(Binance_candle, Bybit_candle)
+        except (ValueError, OSError) as error:
+            print(f"Online learning of the model for {symbol} failed: {error}")
+
     def machine_learning_bot(self, start=None):
         """
-        Execution of the arbitrage bot with Machine Learning inclusion
+        Execution of the arbitrage bot with Machine Learning inclusion, the model versions and features of all pairs
+        are resolved in the main thread and scored in one batch per model in the background; the predictions are
+        handled as soon as they are ready and the predicted arbitrages are scheduled instead of waited for
         :param start: datetime of start of the bot
         """
-        Binance_pair = self.Binance_crypto_pairs[1]
-        Bybit_pair = self.Bybit_crypto_pairs[self.Binance_crypto_pairs.index(Binance_pair)]
+        self.perform_scheduled_trades(start)
 
-        Binance_OHLCV = self.Binance_client.get_historical_klines(Binance_pair["symbol"], "1m",
-                                                                  datetime.now().timestamp() * 1000, 2)
-        Bybit_OHLCV = self.Bybit_client.get_historical_klines(Binance_pair["symbol"], 1, datetime.now().timestamp()
-                                                              * 1000 - 60 * 1000 * 2, 2)
-        if Binance_OHLCV is None or Bybit_OHLCV is None or len(Binance_OHLCV) < 2 or len(Bybit_OHLCV) < 2 or \
-                len(Binance_OHLCV[1]) < 6 or len(Bybit_OHLCV[1]) < 6:
+        candles = {}
+        for Binance_pair in self.Binance_crypto_pairs:
+            try:
+                model_key = self.select_model(Binance_pair["symbol"])
+            except (ValueError, OSError) as error:
+                print(f"Model for {Binance_pair['symbol']} is not available, the pair is skipped: {error}")
+                continue
+            features = self.update_features(Binance_pair)
+            if features is None:
+                continue
+            Binance_OHLCV, Bybit_OHLCV, dataset_row = features
+            Binance_opportunity = float(Binance_OHLCV[1][1]) - float(Bybit_OHLCV[1][1])
+            Bybit_opportunity = float(Bybit_OHLCV[1][1]) - float(Binance_OHLCV[1][1])
+            if Binance_opportunity < 0 and Bybit_opportunity < 0 and abs(Binance_opportunity) < abs(
+                    Bybit_opportunity):
+                Binance_opportunity = 0
+            candles[Binance_pair["symbol"]] = (Binance_pair, Binance_opportunity, Bybit_opportunity)
+            self.inference_service.submit(Binance_pair["symbol"], dataset_row, model_key)
+
+        if not candles:
             return
+        for predictions in as_completed(self.inference_service.flush()):
+            for symbol, prediction in predictions.result().items():
+                Binance_pair, Binance_opportunity, Bybit_opportunity = candles[symbol]
+                self.trade_on_prediction(Binance_pair, prediction, Binance_opportunity, Bybit_opportunity)
+
+    def trade_on_prediction(self, Binance_pair=None, prediction=None, Binance_opportunity=None,
+                            Bybit_opportunity=None):
+        """
+        Schedule the arbitrage on the pair after TRADE_DELAY seconds if the model predicts a profitable arbitrage in
+        the next time interval, unless an arbitrage of the pair is already scheduled
+        :param Binance_pair: cryptocurrency pair on Binance
+        :param prediction: prediction of the model for the pair
+        :param Binance_opportunity: difference between the open prices on Binance and Bybit
+        :param Bybit_opportunity: difference between the open prices on Bybit and Binance
+        """
+        if prediction == 1:
+            print(f"Profitable arbitrage in next time interval predicted for {Binance_pair['symbol']}.")
+            if Binance_pair["symbol"] not in self.scheduled_trades:
+                self.scheduled_trades[Binance_pair["symbol"]] = (time.time() + TRADE_DELAY, Binance_pair,
+                                                                 Binance_opportunity, Bybit_opportunity)
+        else:
+            print(f"Profitable arbitrage in next time interval not predicted for {Binance_pair['symbol']}.")
 
-        Binance_change = (float(Binance_OHLCV[1][1]) - float(Binance_OHLCV[0][1])) / float(
-            Binance_OHLCV[0][1]) * 100
-        Bybit_change = (float(Bybit_OHLCV[1][1]) - float(Bybit_OHLCV[0][1])) / float(Bybit_OHLCV[0][1]) * 100
-        dataset_row = [int(datetime.now().timestamp() * 1000), Binance_OHLCV[1][1], Binance_OHLCV[1][2],
-                       Binance_OHLCV[1][3], Binance_OHLCV[1][4], Binance_OHLCV[1][5],
-                       Bybit_OHLCV[1][1], Bybit_OHLCV[1][2], Bybit_OHLCV[1][3], Bybit_OHLCV[1][4],
-                       Bybit_OHLCV[1][5], Binance_change, Bybit_change]
-
-        Binance_opportunity = float(Binance_OHLCV[1][1]) - float(Bybit_OHLCV[1][1])
-        Bybit_opportunity = float(Bybit_OHLCV[1][1]) - float(Binance_OHLCV[1][1])
-        if Binance_opportunity < 0 and Bybit_opportunity < 0 and abs(Binance_opportunity) < abs(
-                Bybit_opportunity):
-            Binance_opportunity = 0
-
-        with open("D:/FIIT/BakalarskaPraca/arbitrage_bot/best_models/best_model_ETHUSDT.sav", "rb") as file:
-            model = pickle.load(file)
-            prediction = model.predict([dataset_row])
-
-            if prediction[0] == 1:
-                print("Profitable arbitrage in next time interval predicted.")
-                time.sleep(300)
-                prices = self.summarize_price_data(Binance_pair)
+    def perform_scheduled_trades(self, start=None):
+        """
+        Perform every scheduled arbitrage whose delay has passed
+        :param start: datetime of start of the bot
+        """
+        for symbol, scheduled_trade in list(self.scheduled_trades.items()):
+            if scheduled_trade[0] <= time.time():
+                del self.scheduled_trades[symbol]
+                self.perform_predicted_trade(*scheduled_trade[1:], start)
 
-                if Binance_opportunity < 0:
-                    traded_amount = self.check_traded_amount(prices, Bybit_pair)
-                    if traded_amount is None:
-                        return
+    def perform_predicted_trade(self, Binance_pair=None, Binance_opportunity=None, Bybit_opportunity=None,
+                                start=None):
+        """
+        Perform the predicted arbitrage on the pair at the current prices
+        :param Binance_pair: cryptocurrency pair on Binance
+        :param Binance_opportunity: difference between the open prices on Binance and Bybit
+        :param Bybit_opportunity: difference between the open prices on Bybit and Binance
+        :param start: datetime of start of the bot
+        """
+        Bybit_pair = self.Bybit_crypto_pairs[self.Binance_crypto_pairs.index(Binance_pair)]
+        prices = self.summarize_price_data(Binance_pair)
 
-                    self.perform_trade(self.Binance_client, self.Bybit_client, Binance_pair, traded_amount,
-                                       prices["ask_price_Binance"], prices["bid_price_Bybit"], None, None, prices,
-                                       start)
+        if Binance_opportunity < 0:
+            traded_amount = self.check_traded_amount(prices, Bybit_pair)
+            if traded_amount is None:
+                return
 
-                if Bybit_opportunity < 0:
-                    traded_amount = self.check_traded_amount(prices, Binance_pair)
-                    if traded_amount is None:
-                        return
+            self.perform_trade(self.Binance_client, self.Bybit_client, Binance_pair, traded_amount,
+                               prices["ask_price_Binance"], prices["bid_price_Bybit"], None, None, prices,
+                               start)
 
-                    self.perform_trade(self.Bybit_client, self.Binance_client, Binance_pair, traded_amount,
-                                       prices["ask_price_Bybit"], prices["bid_price_Binance"], None, None, prices,
-                                       start)
+        if Bybit_opportunity < 0:
+            traded_amount = self.check_traded_amount(prices, Binance_pair)
+            if traded_amount is None:
+                return
 
-            else:
-                print("Profitable arbitrage in next time interval not predicted.")
+            self.perform_trade(self.Bybit_client, self.Binance_client, Binance_pair, traded_amount,
+                               prices["ask_price_Bybit"], prices["bid_price_Binance"], None, None, prices,
+                               start)
 
     # source https://github.com/kelvinau/crypto-arbitrage/blob/2f8956fe37b62002985edfba84006f19490697de/engines/exchange_arbitrage.py#L6
     # inspired by the method start_engine(self)
@@ -0,0 +1,70 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import numpy as np
+
+
+class Inference_service:
+    def __init__(self, load_model=None, workers=1):
+        self.load_model = load_model
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.pending = {}
+        self.models = {}
+        self.models_lock = threading.Lock()
+
+    def submit(self, symbol=None, features=None, model_key=None):
+        """
+        Add the current feature vector of the pair to the batch of the running tick, a newer vector of the same pair
+        replaces the older one
+        :param symbol: symbol of the cryptocurrency pair
+        :param features: feature vector of the pair
+        :param model_key: name and version of the model resolved by the caller, pairs with the same key are scored in
+        one prediction
+        """
+        self.pending[symbol] = (features, model_key)
+
+    def flush(self):
+        """
+        Score the collected batch in the background, one job per model, and start a new one
+        :return: list of futures of the dictionaries of predictions, one per model, which can be consumed as they
+        are completed
+        """
+        batch, self.pending = self.pending, {}
+        groups = {}
+        for symbol, (features, model_key) in batch.items():
+            groups.setdefault(model_key, []).append((symbol, features))
+        return [self.executor.submit(self.predict_group, model_key, group) for model_key, group in groups.items()]
+
+    def get_model(self, model_key=None):
+        """
+        Load the model once and keep it until another version of the same model is requested, the loaded models are
+        accessed only by the threads of the service, one at a time
+        :param model_key: name and version of the model
+        :return: loaded model
+        """
+        with self.models_lock:
+            if model_key not in self.models:
+                self.models = {key: model for key, model in self.models.items() if key[0] != model_key[0]}
+                self.models[model_key] = self.load_model(model_key)
+            return self.models[model_key]
+
+    def predict_group(self, model_key=None, group=None):
+        """
+        Run one prediction for all pairs of the model; if the model cannot be loaded or used, the error is reported
+        and its pairs are left out of the predictions
+        :param model_key: name and version of the model
+        :param group: list of symbols and feature vectors of the pairs
+        :return: dictionary of predictions of the pairs
+        """
+        symbols = [symbol for symbol, _ in group]
+        try:
+            predictions = self.get_model(model_key).predict(np.stack([features for _, features in group]))
+        except (ValueError, OSError, KeyError) as error:
+            print(f"Prediction for {', '.join(symbols)} failed, the pairs are skipped: {error}")
+            return {}
+        return dict(zip(symbols, predictions))
+
+    def shutdown(self):
+        """
+        Stop the background thread after the running predictions are finished
+        """
+        self.executor.shutdown(wait=True)
@@ -0,0 +1,76 @@
+import numpy as np
+
+from feature_pipeline import FEATURE_COLUMNS, FEATURE_DTYPE
+
+TIMESTAMP_COLUMN = "dateTime"
+TARGET_COLUMN = "arbitrage"
+
+
+class Compact_dataset:
+    def __init__(self, timestamps=None, features=None, columns=None, target=None):
+        self.timestamps = timestamps
+        self.features = features
+        self.columns = columns
+        self.target = target
+
+    @staticmethod
+    def get_dtype(columns=None):
+        """
+        :param columns: feature columns of the dataset
+        :return: types of the columns read from the preprocessed dataset
+        """
+        dtype = {column: FEATURE_DTYPE for column in columns}
+        dtype.update({TIMESTAMP_COLUMN: np.int64, TARGET_COLUMN: np.int8})
+        return dtype
+
+    @staticmethod
+    def from_frame(dataset=None, columns=None):
+        """
+        Build the compact representation from a loaded dataset, the features are copied column by column into a single
+        matrix and the timestamps and the target are kept as separate arrays
+        :param dataset: loaded dataset
+        :param columns: feature columns, FEATURE_COLUMNS if None
+        :return: compact dataset
+        """
+        columns = columns if columns is not None else FEATURE_COLUMNS
+        features = np.empty((dataset.shape[0], len(columns)), dtype=FEATURE_DTYPE)
+        for index, column in enumerate(columns):
+            features[:, index] = dataset[column].to_numpy()
+
+        timestamps = dataset[TIMESTAMP_COLUMN].to_numpy(dtype=np.int64) if TIMESTAMP_COLUMN in dataset else None
+        target = dataset[TARGET_COLUMN].to_numpy(dtype=np.int8) if TARGET_COLUMN in dataset else None
+        return Compact_dataset(timestamps, features, list(columns), target)
+
+    @staticmethod
+    def from_chunks(chunks=None, columns=None):
+        """
+        Build the compact representation from a stream of chunks, every chunk is converted and released before the
+        next one is read, so the whole dataset is never held as a data frame
+        :param chunks: iterable of time-ordered chunks of the dataset
+        :param columns: feature columns, FEATURE_COLUMNS if None
+        :return: compact dataset
+        """
+        columns = columns if columns is not None else FEATURE_COLUMNS
+        parts = [Compact_dataset.from_frame(chunk, columns) for chunk in chunks]
+        if not parts:
+            return Compact_dataset(np.empty(0, dtype=np.int64), np.empty((0, len(columns)), dtype=FEATURE_DTYPE),
+                                   list(columns), np.empty(0, dtype=np.int8))
+
+        timestamps = None if parts[0].timestamps is None else np.concatenate([part.timestamps for part in parts])
+        target = None if parts[0].target is None else np.concatenate([part.target for part in parts])
+        return Compact_dataset(timestamps, np.concatenate([part.features for part in parts]), list(columns), target)
+
+    def matrix(self):
+        """
+        :return: feature matrix passed to the models without copying
+        """
+        return self.features
+
+    def __len__(self):
+        return self.features.shape[0]
+
+    def nbytes(self):
+        """
+        :return: memory occupied by the arrays of the dataset in bytes
+        """
+        return sum(array.nbytes for array in (self.timestamps, self.features, self.target) if array is not None)
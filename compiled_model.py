@@ -0,0 +1,178 @@
+import json
+import os
+import numpy as np
+
+META_FILE = "meta.json"
+
+
+class Compiled_model:
+    def __init__(self, kind=None, arrays=None, classes=None, n_features=None):
+        self.kind = kind
+        self.arrays = arrays
+        self.classes = classes
+        self.n_features = n_features
+        self.predictors = {"linear": self.predict_linear, "mlp": self.predict_mlp, "forest": self.predict_forest}
+
+    @staticmethod
+    def compile(pipeline=None):
+        """
+        Compile the fitted pipeline of standard scaling, selecting the k-best features and a model into plain arrays;
+        the scaling and the selection are folded into the weights of linear models and multilayer perceptrons, the
+        trees of random forests are flattened into arrays of nodes
+        :param pipeline: fitted pipeline
+        :return: compiled model
+        """
+        scaler, selector, model = pipeline.named_steps["scaling"], pipeline.named_steps["features"], \
+            pipeline.named_steps["model"]
+        support = np.flatnonzero(selector.get_support())
+        mean, scale = scaler.mean_[support], scaler.scale_[support]
+        classes = np.asarray(model.classes_)
+        if classes.size != 2:
+            raise ValueError("Only binary classification models can be compiled.")
+
+        if hasattr(model, "estimators_"):
+            return Compiled_model("forest", Compiled_model.flatten_forest(model, support, scaler), classes,
+                                  scaler.n_features_in_)
+
+        if hasattr(model, "coefs_"):
+            if model.out_activation_ != "logistic":
+                raise ValueError("Only multilayer perceptrons with a logistic output can be compiled.")
+            arrays = {"mean": mean, "scale": scale, "support": support}
+            for layer, (weights, intercept) in enumerate(zip(model.coefs_, model.intercepts_)):
+                if layer == 0:
+                    intercept = intercept - (mean / scale) @ weights
+                    weights = weights / scale[:, None]
+                arrays[f"weights_{layer}"], arrays[f"intercept_{layer}"] = weights, intercept
+            arrays["activation"] = np.array([model.activation])
+            return Compiled_model("mlp", arrays, classes, scaler.n_features_in_)
+
+        if hasattr(model, "coef_"):
+            weights = model.coef_[0] / scale
+            intercept = model.intercept_[0] - np.dot(mean, weights)
+            return Compiled_model("linear", {"support": support, "weights": weights,
+                                             "intercept": np.array([intercept])}, classes, scaler.n_features_in_)
+
+        raise ValueError(f"Compilation of {type(model).__name__} is not supported.")
+
+    @staticmethod
+    def flatten_forest(model=None, support=None, scaler=None):
+        """
+        Concatenate the nodes of all trees into flat arrays, the children of leaves point to the leaves themselves and
+        the features of the nodes are indexed in the selected features
+        :param model: fitted random forest
+        :param support: positions of the selected features
+        :param scaler: fitted standard scaler
+        :return: arrays of the forest
+        """
+        features, thresholds, left, right, probabilities, roots = [], [], [], [], [], []
+        offset = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            nodes = np.arange(tree.node_count)
+            leaf = tree.children_left == -1
+            features.append(np.where(leaf, 0, tree.feature))
+            thresholds.append(tree.threshold)
+            left.append(np.where(leaf, nodes, tree.children_left) + offset)
+            right.append(np.where(leaf, nodes, tree.children_right) + offset)
+            values = tree.value[:, 0, :]
+            probabilities.append(values / values.sum(axis=1)[:, None])
+            roots.append(offset)
+            offset += tree.node_count
+
+        return {"mean": scaler.mean_[support], "scale": scaler.scale_[support], "support": support,
+                "feature": np.concatenate(features).astype(np.int64), "threshold": np.concatenate(thresholds),
+                "left": np.concatenate(left).astype(np.int64), "right": np.concatenate(right).astype(np.int64),
+                "probability": np.concatenate(probabilities), "roots": np.array(roots, dtype=np.int64),
+                "depth": np.array([max(estimator.tree_.max_depth for estimator in model.estimators_)])}
+
+    def predict(self, dataset=None):
+        """
+        :param dataset: feature matrix or a single feature vector
+        :return: predicted classes
+        """
+        dataset = np.asarray(dataset)
+        if dataset.dtype != np.float32:
+            dataset = dataset.astype(np.float64)
+        if dataset.ndim == 1:
+            dataset = dataset[None, :]
+        if dataset.shape[1] != self.n_features:
+            raise ValueError(f"Compiled model expects {self.n_features} features, {dataset.shape[1]} provided.")
+        return self.classes[self.predictors[self.kind](dataset).astype(np.int64)]
+
+    def predict_linear(self, dataset=None):
+        """
+        :param dataset: feature matrix
+        :return: positions of the predicted classes
+        """
+        return dataset[:, self.arrays["support"]] @ self.arrays["weights"] + self.arrays["intercept"][0] > 0
+
+    def predict_mlp(self, dataset=None):
+        """
+        :param dataset: feature matrix
+        :return: positions of the predicted classes
+        """
+        activation = dataset[:, self.arrays["support"]]
+        n_layers = sum(1 for name in self.arrays if name.startswith("weights_"))
+        for layer in range(n_layers):
+            activation = activation @ self.arrays[f"weights_{layer}"] + self.arrays[f"intercept_{layer}"]
+            if layer < n_layers - 1:
+                function = str(self.arrays["activation"][0])
+                if function == "relu":
+                    activation = np.maximum(activation, 0)
+                elif function == "tanh":
+                    activation = np.tanh(activation)
+                elif function == "logistic":
+                    activation = 1 / (1 + np.exp(-activation))
+        return activation[:, 0] > 0
+
+    def predict_forest(self, dataset=None):
+        """
+        Traverse all trees for all records at once; the features are scaled in the precision of the input and cast to
+        float32 as in the fitted pipeline, and the probabilities of the trees are summed in their order
+        :param dataset: feature matrix
+        :return: positions of the predicted classes
+        """
+        dataset = dataset[:, self.arrays["support"]]
+        dataset = (dataset - self.arrays["mean"]).astype(dataset.dtype)
+        dataset = (dataset / self.arrays["scale"]).astype(np.float32)
+
+        rows = np.arange(dataset.shape[0])[:, None]
+        nodes = np.broadcast_to(self.arrays["roots"], (dataset.shape[0], self.arrays["roots"].size))
+        for _ in range(int(self.arrays["depth"][0])):
+            go_left = dataset[rows, self.arrays["feature"][nodes]] <= self.arrays["threshold"][nodes]
+            nodes = np.where(go_left, self.arrays["left"][nodes], self.arrays["right"][nodes])
+
+        probability = np.cumsum(self.arrays["probability"][nodes], axis=1)[:, -1]
+        return probability[:, 1] > probability[:, 0]
+
+    def save(self, directory=None):
+        """
+        Save the arrays of the compiled model into .npy files and its description into a JSON file; every file is
+        replaced atomically, so the memory-mapped arrays of an already loaded model stay intact
+        :param directory: directory of the compiled model
+        """
+        os.makedirs(directory, exist_ok=True)
+        for name, array in self.arrays.items():
+            path = os.path.join(directory, name + ".npy")
+            with open(path + ".tmp", "wb") as file:
+                np.save(file, np.ascontiguousarray(array), allow_pickle=False)
+            os.replace(path + ".tmp", path)
+
+        path = os.path.join(directory, META_FILE)
+        with open(path + ".tmp", "w") as file:
+            json.dump({"kind": self.kind, "arrays": list(self.arrays), "classes": self.classes.tolist(),
+                       "n_features": int(self.n_features)}, file)
+        os.replace(path + ".tmp", path)
+
+    @staticmethod
+    def load(directory=None):
+        """
+        :param directory: directory of the compiled model
+        :return: compiled model with memory-mapped arrays
+        """
+        with open(os.path.join(directory, META_FILE), "r") as file:
+            meta = json.load(file)
+
+        arrays = {name: np.load(os.path.join(directory, name + ".npy"), mmap_mode="r", allow_pickle=False)
+                  for name in meta["arrays"]}
+        return Compiled_model(meta["kind"], arrays, np.array(meta["classes"]), meta["n_features"])
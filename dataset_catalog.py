@@ -0,0 +1,174 @@
+import json
+import os
+import re
+import pandas as pd
+
+CATALOG_FILE = "./dataset_index/catalog.json"
+FILENAME_PATTERN = re.compile(r"^(?:(?P<exchange>[A-Za-z]+)_data_)?(?P<pair>[A-Z0-9]+)_(?P<interval>\d+[mhdw])\.csv$")
+
+
+class Dataset_handle:
+    def __init__(self, entry, columns=None, rows=None, start_date=None, end_date=None, dtype=None):
+        self.entry = entry
+        self.columns = columns
+        self.rows = rows
+        self.start_date = start_date
+        self.end_date = end_date
+        self.dtype = dtype
+        self._data = None
+
+    @property
+    def data(self):
+        """
+        :return: dataset restricted to the requested columns and rows, loaded on the first access
+        """
+        if self._data is None:
+            self._data = self.load()
+        return self._data
+
+    def load(self):
+        """
+        Load only the requested columns and rows of the dataset; rows are selected either by their position or by the
+        range of their timestamps
+        :return: loaded dataset
+        """
+        skiprows, nrows = None, None
+        if self.rows is not None:
+            skiprows = range(1, self.rows[0] + 1)
+            nrows = None if self.rows[1] is None else self.rows[1] - self.rows[0]
+
+        dataset = pd.read_csv(self.entry["path"], index_col=False, usecols=self.get_usecols(), skiprows=skiprows,
+                              nrows=nrows, dtype=self.dtype)
+        return self.select(dataset).reset_index(drop=True)
+
+    def stream(self, chunk_size=100000):
+        """
+        Read the dataset in time-ordered chunks with a fixed number of rows, so that only one chunk is held in memory
+        :param chunk_size: number of rows read at once
+        :return: generator of chunks restricted to the requested columns and timestamps
+        """
+        for chunk in pd.read_csv(self.entry["path"], index_col=False, usecols=self.get_usecols(), chunksize=chunk_size,
+                                 dtype=self.dtype):
+            yield self.select(chunk)
+
+    def get_usecols(self):
+        """
+        :return: columns to be read from the file, including the timestamp when the rows are selected by it
+        """
+        if self.columns is None:
+            return None
+        return [column for column in self.entry["columns"] if column in self.columns or
+                (column == "dateTime" and (self.start_date is not None or self.end_date is not None))]
+
+    def select(self, dataset=None):
+        """
+        Restrict the read rows to the requested range of timestamps and the read columns to the requested ones
+        :param dataset: read part of the dataset
+        :return: restricted part of the dataset
+        """
+        if self.start_date is not None:
+            dataset = dataset[dataset["dateTime"] >= self.start_date]
+        if self.end_date is not None:
+            dataset = dataset[dataset["dateTime"] <= self.end_date]
+        if self.columns is not None:
+            columns = [column for column in self.entry["columns"] if column in self.columns]
+            if list(dataset.columns) != columns:
+                dataset = dataset.loc[:, columns]
+        return dataset
+
+
+class Dataset_catalog:
+    def __init__(self, directories=None, catalog_file=CATALOG_FILE):
+        self.directories = directories if directories is not None else ["./dataset", "./dataset_preprocessed"]
+        self.catalog_file = catalog_file
+        self.manifest = {}
+
+        self.load_manifest()
+        self.update_manifest()
+
+    @staticmethod
+    def parse_filename(file=None):
+        """
+        Parse the exchange, cryptocurrency pair and time interval from the name of a dataset
+        :param file: name of the dataset file, e.g. Binance_data_BTCUSDT_15m.csv or BTCUSDT_15m.csv
+        :return: exchange (None for preprocessed datasets), pair and interval; None if the name is not recognized
+        """
+        match = FILENAME_PATTERN.match(file)
+        if match is None:
+            return None
+        return match.group("exchange"), match.group("pair"), match.group("interval")
+
+    def load_manifest(self):
+        """
+        Load the stored manifest of available datasets, if it has been created before
+        """
+        if not os.path.exists(self.catalog_file):
+            return
+
+        with open(self.catalog_file, "r") as file:
+            self.manifest = json.load(file)
+
+    def update_manifest(self):
+        """
+        Index every available dataset according to its exchange, pair and time interval; only the header of new or
+        changed files is read
+        """
+        manifest = {}
+        for directory in self.directories:
+            if not os.path.isdir(directory):
+                continue
+
+            for file in sorted(os.listdir(directory)):
+                parsed = self.parse_filename(file)
+                if parsed is None:
+                    continue
+
+                path = os.path.join(directory, file)
+                entry = self.manifest.get(path)
+                size, modified = os.path.getsize(path), os.path.getmtime(path)
+                if entry is None or entry["size"] != size or entry["modified"] != modified:
+                    with open(path, "r") as handle:
+                        columns = handle.readline().strip().split(',')
+                    entry = {"path": path, "directory": directory, "exchange": parsed[0], "pair": parsed[1],
+                             "interval": parsed[2], "columns": columns, "size": size, "modified": modified}
+                manifest[path] = entry
+
+        if manifest != self.manifest:
+            self.manifest = manifest
+            self.save_manifest()
+
+    def save_manifest(self):
+        """
+        Save the manifest of available datasets into a JSON file
+        """
+        os.makedirs(os.path.dirname(self.catalog_file), exist_ok=True)
+        with open(self.catalog_file, "w") as file:
+            json.dump(self.manifest, file)
+
+    def find(self, directory=None, pairs=None, intervals=None, exchanges=None):
+        """
+        Find the datasets matching the provided criteria
+        :param directory: directory of the datasets
+        :param pairs: requested cryptocurrency pairs, all of them if None
+        :param intervals: requested time intervals, all of them if None
+        :param exchanges: requested exchanges, all of them if None
+        :return: list of matching manifest entries
+        """
+        return [entry for entry in self.manifest.values()
+                if (directory is None or os.path.normpath(entry["directory"]) == os.path.normpath(directory)) and
+                (pairs is None or entry["pair"] in pairs) and
+                (intervals is None or entry["interval"] in intervals) and
+                (exchanges is None or entry["exchange"] in exchanges)]
+
+    def open_dataset(self, entry=None, columns=None, rows=None, start_date=None, end_date=None, dtype=None):
+        """
+        Open a lazy handle of the dataset, which is loaded only on the first access to its data
+        :param entry: manifest entry of the dataset
+        :param columns: requested columns, all of them if None
+        :param rows: requested range of row positions as (start, stop), all rows if None
+        :param start_date: timestamp of the first requested record in milliseconds
+        :param end_date: timestamp of the last requested record in milliseconds
+        :param dtype: types of the columns passed to the reader, inferred if None
+        :return: lazy handle of the dataset
+        """
+        return Dataset_handle(entry, columns, rows, start_date, end_date, dtype)
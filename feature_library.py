@@ -0,0 +1,221 @@
+import hashlib
+import json
+import os
+import numpy as np
+
+from compact_dataset import Compact_dataset
+from feature_pipeline import FEATURE_COLUMNS, FEATURE_DTYPE
+
+FEATURE_DIRECTORY = "./dataset_features"
+DEFAULT_FEATURES = {"lagged_spread": [1, 2, 5], "spread_mean": [5, 20], "spread_std": [5, 20],
+                    "volatility": [5, 20], "volume_imbalance": [1, 5], "range_ratio": [1, 5]}
+
+
+class Feature_library:
+    def __init__(self, config=None, directory=FEATURE_DIRECTORY):
+        self.config = config if config is not None else DEFAULT_FEATURES
+        self.directory = directory
+        self.features = {"lagged_spread": self.lagged_spread, "spread_mean": self.spread_mean,
+                         "spread_std": self.spread_std, "volatility": self.volatility,
+                         "volume_imbalance": self.volume_imbalance, "range_ratio": self.range_ratio}
+
+        unknown = set(self.config) - set(self.features)
+        if unknown:
+            raise ValueError(f"Unknown features requested: {', '.join(sorted(unknown))}.")
+
+    @staticmethod
+    def rolling_sum(values=None, window=None):
+        """
+        Sum of every window of consecutive values computed from the cumulative sum in O(n)
+        :param values: array of values
+        :param window: number of values in the window
+        :return: array of sums, NaN for the first window - 1 positions
+        """
+        cumulative = np.concatenate(([0.0], np.cumsum(values)))
+        sums = np.full(values.shape, np.nan)
+        sums[window - 1:] = cumulative[window:] - cumulative[:-window]
+        return sums
+
+    @staticmethod
+    def rolling_mean(values=None, window=None):
+        """
+        :param values: array of values
+        :param window: number of values in the window
+        :return: array of rolling means, NaN for the first window - 1 positions
+        """
+        return Feature_library.rolling_sum(values, window) / window
+
+    @staticmethod
+    def rolling_std(values=None, window=None):
+        """
+        Rolling sample standard deviation from the cumulative sums of values and their squares; the values are centered
+        first to limit the cancellation in the difference of the sums
+        :param values: array of values
+        :param window: number of values in the window
+        :return: array of rolling standard deviations, NaN for the first window - 1 positions
+        """
+        centered = values - np.mean(values)
+        mean = Feature_library.rolling_mean(centered, window)
+        variance = (Feature_library.rolling_sum(centered ** 2, window) - window * mean ** 2) / (window - 1)
+        return np.sqrt(np.maximum(variance, 0))
+
+    @staticmethod
+    def lagged(values=None, lag=None):
+        """
+        :param values: array of values
+        :param lag: number of records to look back
+        :return: array of values lagged by lag records, NaN for the first lag positions
+        """
+        shifted = np.full(values.shape, np.nan)
+        shifted[lag:] = values[:-lag]
+        return shifted
+
+    @staticmethod
+    def spread(columns=None):
+        """
+        :param columns: dictionary of price and volume arrays of both exchanges
+        :return: percentage difference between the close prices on Binance and Bybit
+        """
+        return (columns["close_Binance"] - columns["close_Bybit"]) / columns["close_Bybit"] * 100
+
+    def lagged_spread(self, columns=None, window=None):
+        """
+        Spread between the exchanges from window records before
+        :param columns: dictionary of price and volume arrays of both exchanges
+        :param window: number of records to look back
+        :return: dictionary with the lagged spread
+        """
+        return {f"spread_lag_{window}": self.lagged(self.spread(columns), window)}
+
+    def spread_mean(self, columns=None, window=None):
+        """
+        Rolling mean of the spread between the exchanges
+        :param columns: dictionary of price and volume arrays of both exchanges
+        :param window: number of records in the window
+        :return: dictionary with the rolling mean of the spread
+        """
+        return {f"spread_mean_{window}": self.rolling_mean(self.spread(columns), window)}
+
+    def spread_std(self, columns=None, window=None):
+        """
+        Rolling standard deviation of the spread between the exchanges
+        :param columns: dictionary of price and volume arrays of both exchanges
+        :param window: number of records in the window
+        :return: dictionary with the rolling standard deviation of the spread
+        """
+        return {f"spread_std_{window}": self.rolling_std(self.spread(columns), window)}
+
+    def volatility(self, columns=None, window=None):
+        """
+        Rolling standard deviation of logarithmic returns of the close prices on both exchanges
+        :param columns: dictionary of price and volume arrays of both exchanges
+        :param window: number of returns in the window
+        :return: dictionary with the volatility on Binance and Bybit
+        """
+        features = {}
+        for exchange in ["Binance", "Bybit"]:
+            returns = np.full(columns["close_" + exchange].shape, np.nan)
+            returns[1:] = np.diff(np.log(columns["close_" + exchange]))
+            features[f"volatility_{exchange}_{window}"] = np.concatenate(([np.nan],
+                                                                          self.rolling_std(returns[1:], window)))
+        return features
+
+    def volume_imbalance(self, columns=None, window=None):
+        """
+        Rolling mean of the difference between the volumes on Binance and Bybit relative to their total
+        :param columns: dictionary of price and volume arrays of both exchanges
+        :param window: number of records in the window
+        :return: dictionary with the rolling volume imbalance
+        """
+        total = columns["volume_Binance"] + columns["volume_Bybit"]
+        imbalance = np.divide(columns["volume_Binance"] - columns["volume_Bybit"], total,
+                              out=np.zeros(total.shape), where=total != 0)
+        return {f"volume_imbalance_{window}": self.rolling_mean(imbalance, window)}
+
+    def range_ratio(self, columns=None, window=None):
+        """
+        Rolling mean of the high-low range relative to the close price on both exchanges
+        :param columns: dictionary of price and volume arrays of both exchanges
+        :param window: number of records in the window
+        :return: dictionary with the rolling range ratio on Binance and Bybit
+        """
+        return {f"range_ratio_{exchange}_{window}":
+                self.rolling_mean((columns["high_" + exchange] - columns["low_" + exchange]) /
+                                  columns["close_" + exchange], window)
+                for exchange in ["Binance", "Bybit"]}
+
+    def compute(self, columns=None):
+        """
+        Compute every feature of the configuration
+        :param columns: dictionary of price and volume arrays of both exchanges
+        :return: dictionary of feature arrays, NaN where the window is not complete
+        """
+        features = {}
+        for name, windows in self.config.items():
+            for window in windows:
+                features.update(self.features[name](columns, window))
+        return features
+
+    def get_length(self):
+        """
+        :return: number of the latest records needed to compute every feature of the configuration for the last record
+        """
+        return max(max(windows) for windows in self.config.values()) + 1
+
+    def get_names(self):
+        """
+        :return: names of the features of the configuration in the order they are computed
+        """
+        return list(self.compute({column: np.ones(self.get_length()) for column in FEATURE_COLUMNS[:10]}))
+
+    def get_key(self):
+        """
+        :return: identifier of the feature configuration used in the names of the cached features
+        """
+        return hashlib.sha1(json.dumps(self.config, sort_keys=True).encode()).hexdigest()[:12]
+
+    def load_cached(self, filename=None, timestamps=None):
+        """
+        :param filename: path to the cached features
+        :param timestamps: timestamps of the dataset
+        :return: cached features if they were computed for the same timestamps, otherwise None
+        """
+        if timestamps is None or not os.path.exists(filename):
+            return None
+
+        with np.load(filename) as cached:
+            if not np.array_equal(cached["dateTime"], timestamps):
+                return None
+            return {name: cached[name] for name in cached.files if name != "dateTime"}
+
+    def extend(self, dataset=None, pair=None, interval=None):
+        """
+        Append the features of the configuration to the compact dataset, the records without complete windows at the
+        start are dropped; the features are cached per pair, time interval and configuration
+        :param dataset: compact dataset
+        :param pair: cryptocurrency pair of the dataset
+        :param interval: time interval of the dataset
+        :return: extended compact dataset
+        """
+        filename = os.path.join(self.directory, f"{pair}_{interval}_{self.get_key()}.npz")
+        features = self.load_cached(filename, dataset.timestamps)
+        if features is None:
+            columns = {column: dataset.features[:, index].astype(np.float64)
+                       for index, column in enumerate(dataset.columns)}
+            features = {name: values.astype(FEATURE_DTYPE) for name, values in self.compute(columns).items()}
+            if dataset.timestamps is not None:
+                os.makedirs(self.directory, exist_ok=True)
+                np.savez(filename, dateTime=dataset.timestamps, **features)
+
+        complete = np.ones(len(dataset), dtype=bool)
+        for values in features.values():
+            complete &= ~np.isnan(values)
+
+        extended = np.empty((int(complete.sum()), len(dataset.columns) + len(features)), dtype=FEATURE_DTYPE)
+        extended[:, :len(dataset.columns)] = dataset.features[complete]
+        for index, values in enumerate(features.values()):
+            extended[:, len(dataset.columns) + index] = values[complete]
+
+        return Compact_dataset(None if dataset.timestamps is None else dataset.timestamps[complete], extended,
+                               dataset.columns + list(features), None if dataset.target is None
+                               else dataset.target[complete])
@@ -0,0 +1,117 @@
+from collections import deque
+import numpy as np
+import pandas as pd
+
+CANDLE_COLUMNS = ["open", "high", "low", "close", "volume"]
+FEATURE_COLUMNS = [column + "_Binance" for column in CANDLE_COLUMNS] + \
+                  [column + "_Bybit" for column in CANDLE_COLUMNS] + ["change_Binance", "change_Bybit"]
+FEATURE_DTYPE = np.float32
+
+
+class Feature_pipeline:
+    def __init__(self, feature_library=None):
+        self.feature_library = feature_library
+        self.columns = FEATURE_COLUMNS + ([] if feature_library is None else feature_library.get_names())
+        self.history = None if feature_library is None else deque(maxlen=feature_library.get_length())
+        self.pending = None
+        self.features = None
+
+    @staticmethod
+    def percentage_change(earlier=None, later=None):
+        """
+        Percentage change between two prices, shared by the batch and the online computation of features
+        :param earlier: earlier price or array of prices
+        :param later: later price or array of prices
+        :return: percentage change
+        """
+        return (later - earlier) / earlier * 100
+
+    @staticmethod
+    def compute_changes(dataset=None, columns=None, horizons=None):
+        """
+        Compute the percentage changes of the provided columns for all horizons at once; a positive horizon h gives the
+        forward change from the current record to the record h steps later, a negative horizon gives the backward
+        change from the record h steps earlier to the current record, and changes beyond the dataset are zero
+        :param dataset: dataset to be analyzed
+        :param columns: names of the price columns
+        :param horizons: list of non-zero horizons in records
+        :return: dataframe with the column change_<column>_<horizon> for every column and horizon
+        """
+        values = dataset.loc[:, columns].to_numpy(dtype=np.float64)
+        changes = {}
+        for horizon in horizons:
+            distance = abs(horizon)
+            change = np.zeros(values.shape)
+            if distance < values.shape[0]:
+                earlier, later = values[:-distance], values[distance:]
+                if horizon > 0:
+                    change[:-distance] = Feature_pipeline.percentage_change(earlier, later)
+                else:
+                    change[distance:] = Feature_pipeline.percentage_change(earlier, later)
+
+            for index, column in enumerate(columns):
+                changes[f"change_{column}_{horizon}"] = change[:, index]
+
+        return pd.DataFrame(changes, index=dataset.index)
+
+    @staticmethod
+    def transform(dataset=None):
+        """
+        Batch mode of the pipeline, appending the percentage change between the open prices of each record and the
+        following record on both exchanges; the last record has no following one and its change is zero
+        :param dataset: aligned dataset of both exchanges
+        :return: dataset with appended change on Binance and Bybit
+        """
+        changes = Feature_pipeline.compute_changes(dataset, ["open_Binance", "open_Bybit"], [1])
+        changes.columns = ["change_Binance", "change_Bybit"]
+        return pd.concat([dataset, changes], axis=1)
+
+    @staticmethod
+    def feature_matrix(dataset=None):
+        """
+        :param dataset: preprocessed dataset
+        :return: array of features in the order used for training and inference
+        """
+        return dataset.loc[:, FEATURE_COLUMNS].to_numpy(dtype=FEATURE_DTYPE)
+
+    def library_features(self):
+        """
+        Compute the features of the library for the last completed candle from the records in the history
+        :return: list of the features of the library, None while the history is shorter than the longest window
+        """
+        if len(self.history) < self.history.maxlen:
+            return None
+
+        records = np.array(self.history, dtype=np.float64)
+        columns = {column: records[:, index] for index, column in enumerate(FEATURE_COLUMNS[:records.shape[1]])}
+        return [values[-1] for values in self.feature_library.compute(columns).values()]
+
+    def update(self, Binance_candle=None, Bybit_candle=None):
+        """
+        Online mode of the pipeline, updated with every new candle in constant time; the features of a candle are
+        complete once the following candle opens, so the feature vector of the previous candle is computed then and
+        returned again for every further tick of the open candle or for an older candle; the features of the library
+        are computed from the history of the completed candles; the timestamp is not a feature and is kept only to
+        recognize a new candle
+        :param Binance_candle: kline of Binance as [timestamp, open, high, low, close, volume, ...]
+        :param Bybit_candle: kline of Bybit with the same timestamp
+        :return: feature vector of the last completed candle in the order of columns, or None if no candle has been
+        completed or the history is not long enough for the features of the library
+        """
+        timestamp = int(Binance_candle[0])
+        record = [float(value) for value in Binance_candle[1:6]] + [float(value) for value in Bybit_candle[1:6]]
+
+        if self.pending is not None and timestamp > self.pending[0]:
+            previous = self.pending[1]
+            changes = [self.percentage_change(previous[0], record[0]), self.percentage_change(previous[5], record[5])]
+            if self.feature_library is None:
+                self.features = np.array(previous + changes, dtype=FEATURE_DTYPE)
+            else:
+                self.history.append(previous)
+                library_features = self.library_features()
+                self.features = None if library_features is None else \
+                    np.array(previous + changes + library_features, dtype=FEATURE_DTYPE)
+
+        if self.pending is None or timestamp >= self.pending[0]:
+            self.pending = (timestamp, record)
+        return self.features
@@ -1,70 +1,89 @@
-from os import listdir
-import pandas as pd
+from compact_dataset import Compact_dataset, TIMESTAMP_COLUMN, TARGET_COLUMN
+from dataset_catalog import Dataset_catalog
+from feature_pipeline import FEATURE_COLUMNS
+
+INTERVALS = ["1m", "5m", "15m"]
+CHUNK_SIZE = 100000
 
 
 class Load_dataset:
-    def __init__(self, pairs):
+    def __init__(self, pairs, intervals=None):
         self.pairs = pairs
+        self.intervals = intervals if intervals is not None else INTERVALS
         self.datasets = {}
+        self.catalog = Dataset_catalog()
 
-    def load_datasets(self):
+    def open_datasets(self, columns=None):
         """
-        Load gathered datasets for further preprocessing, divided according to pair, time interval, and exchange
-        :return: loaded datasets
+        Open lazy handles of the gathered datasets of the requested pairs and time intervals, divided according to
+        pair, time interval, and exchange
+        :param columns: requested columns, all of them if None
+        :return: lazy handles of the datasets
         """
-        for pair in self.pairs:
-            self.datasets[pair] = {}
+        handles = {pair: {interval: {"Binance": None, "Bybit": None} for interval in self.intervals}
+                   for pair in self.pairs}
 
-        for pair in self.datasets:
-            self.datasets[pair] = {"1m": {"Binance": None, "Bybit": None}, "5m": {"Binance": None, "Bybit": None},
-                                   "15m": {"Binance": None, "Bybit": None}}
+        for entry in self.catalog.find("./dataset", self.pairs, self.intervals):
+            handles[entry["pair"]][entry["interval"]][entry["exchange"]] = self.catalog.open_dataset(entry, columns)
 
-        for file in listdir("./dataset"):
-            first_underscore = file.find('_')
-            exchange = file[0:first_underscore]
-            second_underscore = file.find('_', first_underscore + 1)
-            pair = file[(second_underscore + 1):(second_underscore + 8)]
-            third_underscore = file.find('_', second_underscore + 1)
-            interval = file[(third_underscore + 1):(third_underscore + 3)]
-            if interval[-1] != 'm':
-                interval += file[third_underscore + 3]
+        return handles
 
-            dataset = pd.read_csv("./dataset/" + file, index_col=False)
-            self.datasets[pair][interval][exchange] = dataset
+    def open_preprocessed_datasets(self, columns=None):
+        """
+        Open lazy handles of the preprocessed datasets of the requested pairs and time intervals, divided according to
+        pair and time interval
+        :param columns: requested columns, all of them if None
+        :return: lazy handles of the datasets
+        """
+        handles = {pair: {interval: None for interval in self.intervals} for pair in self.pairs}
 
-        return self.datasets
+        for entry in self.catalog.find("./dataset_preprocessed", self.pairs, self.intervals):
+            handles[entry["pair"]][entry["interval"]] = self.catalog.open_dataset(entry, columns)
 
-    def load_preprocessed_datasets(self):
+        return handles
+
+    def load_datasets(self):
         """
-        Load preprocessed datasets divided according to pair and time interval
+        Load gathered datasets for further preprocessing, divided according to pair, time interval, and exchange
         :return: loaded datasets
         """
-        for pair in self.pairs:
-            self.datasets[pair] = {}
-
-        for pair in self.datasets:
-            self.datasets[pair] = {"1m": None, "5m": None, "15m": None}
+        for pair_key, pair in self.open_datasets().items():
+            self.datasets[pair_key] = {}
+            for interval_key, interval in pair.items():
+                self.datasets[pair_key][interval_key] = {exchange_key: None if exchange is None else exchange.data
+                                                         for exchange_key, exchange in interval.items()}
 
-        for file in listdir("./dataset_preprocessed"):
-            underscore = file.find('_')
-            pair = file[0:underscore]
-            dot = file.find('.')
-            interval = file[(underscore + 1):dot]
+        return self.datasets
 
-            dataset = pd.read_csv("./dataset_preprocessed/" + file, index_col=False)
-            self.datasets[pair][interval] = dataset
+    def load_preprocessed_datasets(self, columns=None):
+        """
+        Load preprocessed datasets divided according to pair and time interval
+        :param columns: requested columns, all of them if None
+        :return: loaded datasets
+        """
+        for pair_key, pair in self.open_preprocessed_datasets(columns).items():
+            self.datasets[pair_key] = {interval_key: None if interval is None else interval.data
+                                       for interval_key, interval in pair.items()}
 
         return self.datasets
 
-    def load_preprocessed_datasets_for_training(self):
+    def load_preprocessed_datasets_for_training(self, columns=None, chunk_size=CHUNK_SIZE):
         """
-        Load preprocessed datasets divided according to pair and time interval without index and date columns
+        Load preprocessed datasets divided according to pair and time interval in the compact representation, with
+        float32 features, int64 timestamps and without index and date columns; the files are streamed in chunks, so
+        only the compact arrays of the whole history are held in memory
+        :param columns: feature columns, FEATURE_COLUMNS if None
+        :param chunk_size: number of rows read at once
         :return: loaded datasets
         """
-        self.load_preprocessed_datasets()
-
-        for pair_key, pair in self.datasets.items():
-            for interval_key in pair.keys():
-                self.datasets[pair_key][interval_key] = self.datasets[pair_key][interval_key].iloc[:, 2:]
+        columns = columns if columns is not None else FEATURE_COLUMNS
+        dtype = Compact_dataset.get_dtype(columns)
+        for pair_key, pair in self.open_preprocessed_datasets([TIMESTAMP_COLUMN] + columns + [TARGET_COLUMN]).items():
+            self.datasets[pair_key] = {}
+            for interval_key, interval in pair.items():
+                if interval is not None:
+                    interval.dtype = dtype
+                self.datasets[pair_key][interval_key] = None if interval is None else \
+                    Compact_dataset.from_chunks(interval.stream(chunk_size), columns)
 
         return self.datasets
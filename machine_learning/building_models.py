@@ -1,66 +1,106 @@
+import inspect
 import json
+import os
 import pickle
-import numpy as np
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 
-from sklearn.model_selection import train_test_split, GridSearchCV
-from sklearn.ensemble import RandomForestClassifier, BaggingClassifier
+from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler
-from sklearn.linear_model import LogisticRegression
-from sklearn import svm
-from sklearn.neural_network import MLPClassifier
+from sklearn.utils.class_weight import compute_sample_weight
 from sklearn.feature_selection import SelectKBest
-from imblearn.over_sampling import SMOTE
 
+from experiment_store import Experiment_store
+from feature_library import Feature_library
+from fit_cache import Fit_cache
 from hypothesis_testing import Hypothesis_testing
+from hyperparameter_search import Hyperparameter_search, SEARCH_RESULTS_FILE
 from load_dataset import Load_dataset
+from model_registry import Model_registry
+from model_specs import MODEL_SPECS, IMBALANCE_STRATEGIES, TEST_SIZE, SPLIT_SEED
+from shared_arrays import Shared_arrays
 
 
 class Building_models:
-    def __init__(self, pairs):
+    def __init__(self, pairs, features=None, workers=None, imbalance="smote", seed=2):
+        if imbalance not in IMBALANCE_STRATEGIES:
+            raise ValueError(f"Unknown imbalance strategy {imbalance}, choose from {list(IMBALANCE_STRATEGIES)}.")
         self.pairs = pairs
+        self.imbalance = imbalance
+        self.features = features
+        self.seed = seed
+        self.workers = workers if workers is not None else os.cpu_count() or 1
         self.load_dataset = Load_dataset(pairs)
         self.datasets = self.load_dataset.load_preprocessed_datasets_for_training()
+        if features is not None:
+            self.extend_datasets(Feature_library(features))
+        self.check_features()
         self.best_models = {}
+        self.hyperparameters = Hyperparameter_search.load_json(SEARCH_RESULTS_FILE)
+        self.experiment_store = Experiment_store()
         self.hypothesis_testing = Hypothesis_testing("train")
 
         self.initialize_best_models()
         self.train_datasets, self.test_datasets, self.train_arbitrages, self.test_arbitrages = self.divide_datasets()
 
-        self.logistic_regression()
-        self.random_forest()
-        self.support_vector_machine()
-        self.multilayer_perceptron()
+        self.train_models()
 
         self.hypothesis_testing.perform_tests()
         self.save_best_models()
 
+    def extend_datasets(self, feature_library=None):
+        """
+        Extend the loaded datasets with the rolling-window features of the library
+        :param feature_library: feature library with the selected configuration
+        """
+        for pair_key, pair in self.datasets.items():
+            for interval_key, interval in pair.items():
+                if interval is not None:
+                    pair[interval_key] = feature_library.extend(interval, pair_key, interval_key)
+
+    def check_features(self):
+        """
+        Check before the training that the features of every dataset are computed online by the arbitrage bot, so
+        that the trained models can be registered and used
+        """
+        for pair in self.datasets.values():
+            for interval in pair.values():
+                if interval is not None:
+                    Model_registry.check_features(interval.columns, self.features)
+
     def initialize_best_models(self):
         """
         Initialize the dictionary for the further saving of the best model
         """
         for pair in self.pairs:
             self.best_models[pair] = {"accuracy": None, "precision": None, "recall": None, "f1": None,
-                                      "model": None, "interval": None}
+                                      "model": None, "interval": None, "spec": None}
 
     def divide_datasets(self):
         """
         Divide datasets into training and testing parts, considering the arbitrage column as a target variable separately,
-        resampling due to the imbalance of the dataset is handled as well
+        the training parts are resampled by the sampler of the imbalance strategy, or taken from the fit cache when the
+        same data has already been resampled with the same parameters
         :return: lists of training and testing datasets
         """
         train_datasets, test_datasets, train_arbitrages, test_arbitrages = list(), list(), list(), list()
+        fit_cache, sampler = Fit_cache(), IMBALANCE_STRATEGIES[self.imbalance]
         for pair_key, pair in self.datasets.items():
             for interval_key, interval in pair.items():
-                x = np.array((interval.drop(columns=["arbitrage"])).values)
-                y = np.array(interval["arbitrage"].values)
-                train_dataset, test_dataset, train_arbitrage, test_arbitrage = train_test_split(x, y, test_size=0.2,
-                                                                                                random_state=2)
-                sm = SMOTE(random_state=2)
-                train_dataset, train_arbitrage = sm.fit_resample(train_dataset, train_arbitrage)
-
-                train_datasets.append({"pair": pair_key, "interval": interval_key, "dataset": train_dataset})
+                if interval is None:
+                    continue
+                x = interval.matrix()
+                y = interval.target
+                train_dataset, test_dataset, train_arbitrage, test_arbitrage = train_test_split(
+                    x, y, test_size=TEST_SIZE, random_state=SPLIT_SEED)
+                if sampler is not None:
+                    train_dataset, train_arbitrage = fit_cache.resample(sampler, train_dataset, train_arbitrage)
+
+                train_datasets.append({"pair": pair_key, "interval": interval_key, "dataset": train_dataset,
+                                       "fingerprint": Fit_cache.fingerprint(x, y)})
                 test_datasets.append({"pair": pair_key, "interval": interval_key, "dataset": test_dataset})
                 train_arbitrages.append({"pair": pair_key, "interval": interval_key, "dataset": train_arbitrage})
                 test_arbitrages.append({"pair": pair_key, "interval": interval_key, "dataset": test_arbitrage})
@@ -77,7 +117,7 @@ class Building_models:
         if interval == "1m":
             self.hypothesis_testing.add_time_interval(f1, "1m")
         elif interval == "5m":
-            self.hvypothesis_testing.add_time_interval(f1, "5m")
+            self.hypothesis_testing.add_time_interval(f1, "5m")
         else:
             self.hypothesis_testing.add_time_interval(f1, "15m")
 
@@ -86,7 +126,7 @@ class Building_models:
         elif pair == "ETHUSDT":
             self.hypothesis_testing.add_volatility(f1, "less")
 
-    def check_best_model(self, accuracy, precision, recall, f1, model, pair, interval):
+    def check_best_model(self, accuracy, precision, recall, f1, model, pair, interval, spec=None):
         """
         Check if the currently trained model is better than the saved best one based on accuracy and F1 score
         :param accuracy: accuracy of the model
@@ -96,149 +136,235 @@ class Building_models:
         :param model: name of the trained model
         :param pair: cryptocurrency pair of the dataset used for the training
         :param interval: time interval of the dataset used for the training
+        :param spec: key of the model specification in MODEL_SPECS
         """
         self.record_for_hypothesis(f1, interval, pair)
         best_model = self.best_models[pair]
         if None in best_model.values():
             self.best_models[pair] = {"accuracy": accuracy, "precision": precision, "recall": recall, "f1": f1,
-                                      "model": model, "interval": interval}
+                                      "model": model, "interval": interval, "spec": spec}
             return
 
         if 0.99 > accuracy > best_model["accuracy"]:
             if f1 > best_model["f1"]:
                 self.best_models[pair] = {"accuracy": accuracy, "precision": precision, "recall": recall, "f1": f1,
-                                          "model": model, "interval": interval}
-
-    def logistic_regression(self):
-        """
-        Training Logistic Regression with standard scaling, selecting the k-best features, and hyperparameters
-        penalty="l2", solver="lbfgs", C=10, max_iter=500
-        """
-        print("\nLOGISTIC REGRESSION\n")
-        pipe = Pipeline([("scaling", StandardScaler()),
-                         ("features", SelectKBest()),
-                         ("model", LogisticRegression(penalty="l2",
-                                                      solver="lbfgs",
-                                                      C=10,
-                                                      max_iter=500))])
-
-        for index in range(len(self.train_datasets)):
-            pipe.fit(self.train_datasets[index]["dataset"], self.train_arbitrages[index]["dataset"])
-            prediction = pipe.predict(self.test_datasets[index]["dataset"])
+                                          "model": model, "interval": interval, "spec": spec}
 
-            accuracy = accuracy_score(self.test_arbitrages[index]["dataset"], prediction)
-            precision = precision_score(self.test_arbitrages[index]["dataset"], prediction)
-            recall = recall_score(self.test_arbitrages[index]["dataset"], prediction)
-            f1 = f1_score(self.test_arbitrages[index]["dataset"], prediction)
-
-            print(f"\nLogistic Regression for {self.train_datasets[index]['pair']} for "
-                  f"{self.train_datasets[index]['interval']} interval")
-            print(f"Accuracy: {accuracy} \nPrecision: {precision} \nRecall: {recall}\nF1 score: {f1}")
-
-            self.check_best_model(accuracy, precision, recall, f1, pipe, self.train_datasets[index]['pair'],
-                                  self.train_datasets[index]['interval'])
-
-    def random_forest(self):
+    @staticmethod
+    def get_imbalance(spec=None, imbalance=None):
         """
-        Training Random Forest with standard scaling, selecting the k-best features, and hyperparameters
-        n_estimators=150, criterion="gini", min_samples_split=10, max_features="sqrt", bootstrap=True
+        The class weights are applied through the class_weight parameter of the model or the sample weights of its
+        fit, a model supporting neither is trained without them
+        :param spec: key of the model specification in MODEL_SPECS
+        :param imbalance: selected imbalance strategy
+        :return: imbalance strategy actually applied to the model of the specification
         """
-        print("\nRANDOM FOREST\n")
-        pipe = Pipeline([("scaling", StandardScaler()),
-                         ("features", SelectKBest()),
-                         ("model", RandomForestClassifier(n_estimators=150,
-                                                          criterion="gini",
-                                                          min_samples_split=10,
-                                                          max_features="sqrt",
-                                                          bootstrap=True))])
-
-        for index in range(len(self.train_datasets)):
-            pipe.fit(self.train_datasets[index]["dataset"], self.train_arbitrages[index]["dataset"])
-            prediction = pipe.predict(self.test_datasets[index]["dataset"])
-
-            accuracy = accuracy_score(self.test_arbitrages[index]["dataset"], prediction)
-            precision = precision_score(self.test_arbitrages[index]["dataset"], prediction)
-            recall = recall_score(self.test_arbitrages[index]["dataset"], prediction)
-            f1 = f1_score(self.test_arbitrages[index]["dataset"], prediction)
-
-            print(f"\nRandom Forest for {self.train_datasets[index]['pair']} for "
-                  f"{self.train_datasets[index]['interval']} interval")
-            print(f"Accuracy: {accuracy} \nPrecision: {precision} \nRecall: {recall}\nF1: {f1}")
-
-            self.check_best_model(accuracy, precision, recall, f1, pipe, self.train_datasets[index]['pair'],
-                                  self.train_datasets[index]['interval'])
-
-    def support_vector_machine(self):
+        if imbalance != "class_weight":
+            return imbalance
+        model = MODEL_SPECS[spec]["model"]()
+        if "class_weight" in model.get_params() or "sample_weight" in inspect.signature(model.fit).parameters:
+            return imbalance
+        return "none"
+
+    def get_preprocessing_config(self, spec=None):
         """
-        Training Support Vector Machine with standard scaling, selecting the k-best features, and hyperparameters C=10,
-        penalty="l2", max_iter=1500
+        :param spec: key of the model specification in MODEL_SPECS
+        :return: configuration of the steps applied to the datasets between their loading and the training of the model
+        of the specification
         """
-        print("\nSUPPORT VECTOR MACHINE\n")
-        pipe = Pipeline([("scaling", StandardScaler()),
-                         ("features", SelectKBest()),
-                         ("model", svm.LinearSVC(C=10,
-                                                 penalty="l2",
-                                                 max_iter=1500))])
+        sampler = IMBALANCE_STRATEGIES[self.imbalance]
+        return {"test_size": TEST_SIZE, "split_seed": SPLIT_SEED, "imbalance": self.get_imbalance(spec, self.imbalance),
+                "sampler": sampler.get_params() if sampler is not None else None, "features": self.features,
+                "stages": {name: [type(stage).__name__, stage.get_params()] for name, stage in self.build_stages()}}
 
-        for index in range(len(self.train_datasets)):
-            pipe.fit(self.train_datasets[index]["dataset"], self.train_arbitrages[index]["dataset"])
-            prediction = pipe.predict(self.test_datasets[index]["dataset"])
-
-            accuracy = accuracy_score(self.test_arbitrages[index]["dataset"], prediction)
-            precision = precision_score(self.test_arbitrages[index]["dataset"], prediction)
-            recall = recall_score(self.test_arbitrages[index]["dataset"], prediction)
-            f1 = f1_score(self.test_arbitrages[index]["dataset"], prediction)
+    def get_parameters(self, spec=None, index=None):
+        """
+        :param spec: key of the model specification in MODEL_SPECS
+        :param index: position of the dataset
+        :return: hyperparameters of the model, overridden by the ones found by the hyperparameter search if it has been
+        performed with the same features and imbalance strategy
+        """
+        pair, interval = self.train_datasets[index]["pair"], self.train_datasets[index]["interval"]
+        searched = self.hyperparameters.get(f"{spec}_{pair}_{interval}", {})
+        if searched.get("features") != self.features or searched.get("imbalance") != self.imbalance:
+            searched = {}
+        return dict(MODEL_SPECS[spec]["parameters"], **(searched.get("parameters") or {}))
+
+    @staticmethod
+    def build_stages():
+        """
+        :return: unfitted stages of standard scaling and selecting the k-best features shared by all models
+        """
+        return [("scaling", StandardScaler()), ("features", SelectKBest())]
 
-            print(f"\nSupport vector machine for {self.train_datasets[index]['pair']} for "
-                  f"{self.train_datasets[index]['interval']} interval")
-            print(f"Accuracy: {accuracy} \nPrecision: {precision} \nRecall: {recall}\nF1: {f1}")
+    @staticmethod
+    def build_pipeline(spec=None):
+        """
+        Build the pipeline of standard scaling, selecting the k-best features, and the model of the specification
+        :param spec: key of the model specification in MODEL_SPECS
+        :return: unfitted pipeline
+        """
+        return Pipeline(Building_models.build_stages() +
+                        [("model", MODEL_SPECS[spec]["model"](**MODEL_SPECS[spec]["parameters"]))])
 
-            self.check_best_model(accuracy, precision, recall, f1, pipe, self.train_datasets[index]['pair'],
-                                  self.train_datasets[index]['interval'])
+    @staticmethod
+    def prepare_dataset(index=None, paths=None, directory=None):
+        """
+        Fit the shared stages on the training dataset once for all models, or load them from the fit cache, and
+        transform the testing dataset by them; the job can be executed in a worker process
+        :param index: position of the dataset
+        :param paths: paths to the shared training and testing datasets and arbitrages
+        :param directory: directory of the shared files
+        :return: position of the dataset and paths to the fitted stages and the transformed datasets and arbitrages
+        """
+        train_dataset, test_dataset, train_arbitrage, test_arbitrage = (Shared_arrays.load_array(path)
+                                                                        for path in paths)
+        stages, train_transformed = Fit_cache().fit_stages(Building_models.build_stages(), train_dataset,
+                                                           train_arbitrage)
+        test_transformed = Pipeline(stages).transform(test_dataset)
+
+        stages_path = os.path.join(directory, f"stages_{index}.pkl")
+        with open(stages_path, "wb") as file:
+            pickle.dump(stages, file)
+        return index, [stages_path,
+                       Shared_arrays.share_array(train_transformed, directory, f"train_transformed_{index}"),
+                       Shared_arrays.share_array(test_transformed, directory, f"test_transformed_{index}"),
+                       paths[2], paths[3]]
+
+    @staticmethod
+    def train_model(spec=None, pair=None, interval=None, paths=None, parameters=None, class_weight=False, seed=None):
+        """
+        Train and evaluate one model on one dataset transformed by the fitted shared stages, the datasets are mapped
+        from the shared files, so the job can be executed in a worker process
+        :param spec: key of the model specification in MODEL_SPECS
+        :param pair: cryptocurrency pair of the dataset
+        :param interval: time interval of the dataset
+        :param paths: paths to the fitted stages and the transformed training and testing datasets and arbitrages
+        :param parameters: hyperparameters of the model
+        :param class_weight: whether the classes are weighted inversely to their frequencies, by the class_weight
+        parameter of the model or by the sample weights of its fit
+        :param seed: random seed of the models that are randomized
+        :return: metrics, the training time, the predictions and the fitted pipeline
+        """
+        with open(paths[0], "rb") as file:
+            stages = pickle.load(file)
+        train_dataset, test_dataset, train_arbitrage, test_arbitrage = (Shared_arrays.load_array(path)
+                                                                        for path in paths[1:])
+        model = MODEL_SPECS[spec]["model"](**parameters)
+        fit_parameters = {}
+        if class_weight and "class_weight" in model.get_params():
+            model.set_params(class_weight="balanced")
+        elif class_weight:
+            fit_parameters["sample_weight"] = compute_sample_weight("balanced", train_arbitrage)
+        if "random_state" in model.get_params():
+            model.set_params(random_state=seed)
+        start = time.perf_counter()
+        model.fit(train_dataset, train_arbitrage, **fit_parameters)
+        training_time = time.perf_counter() - start
+        prediction = model.predict(test_dataset)
+
+        return {"spec": spec, "pair": pair, "interval": interval, "model": Pipeline(stages + [("model", model)]),
+                "accuracy": accuracy_score(test_arbitrage, prediction),
+                "precision": precision_score(test_arbitrage, prediction),
+                "recall": recall_score(test_arbitrage, prediction),
+                "f1": f1_score(test_arbitrage, prediction), "time": training_time, "prediction": prediction}
+
+    def print_result(self, result=None, cached=False):
+        """
+        :param result: metrics of the trained model
+        :param cached: whether the result has been taken from the experiment store
+        """
+        print(f"\n{MODEL_SPECS[result['spec']]['name']} for {result['pair']} for {result['interval']} interval"
+              f"{' (cached)' if cached else ''}")
+        print(f"Accuracy: {result['accuracy']} \nPrecision: {result['precision']} \n"
+              f"Recall: {result['recall']}\nF1: {result['f1']}\n"
+              f"Training time ({self.get_imbalance(result['spec'], self.imbalance)}): {result['time']:.2f} s")
 
-    def multilayer_perceptron(self):
+    def train_models(self, specs=None):
         """
-        Training Multilayer Perceptron with standard scaling, selecting the k-best features, and hyperparameters
-        activation="relu", solver="sgd", learning_rate_init=0.01, max_iter=100, hidden_layer_sizes=(5, 5)
+        Train every model specification on every dataset as independent jobs in a pool of processes, with the
+        hyperparameters found by the hyperparameter search if it has been performed; jobs already performed with the
+        same dataset, preprocessing, hyperparameters and seed are taken from the experiment store, the shared stages
+        of a dataset are fitted only if some of its jobs are new and its models are submitted as soon as they are ready,
+        the metrics are printed as soon as a job finishes and the best models are chosen in the order of the jobs
+        afterwards
+        :param specs: keys of the model specifications, all of them if None
         """
-        print("\nMULTILAYER PERCEPTRON\n")
-        pipe = Pipeline([("scaling", StandardScaler()),
-                         ("features", SelectKBest()),
-                         ("model", MLPClassifier(activation="relu",
-                                                 solver="sgd",
-                                                 learning_rate_init=0.01,
-                                                 max_iter=100,
-                                                 hidden_layer_sizes=(5, 5)))])
-
-        for index in range(len(self.train_datasets)):
-            pipe.fit(self.train_datasets[index]["dataset"], self.train_arbitrages[index]["dataset"])
-            prediction = pipe.predict(self.test_datasets[index]["dataset"])
-
-            accuracy = accuracy_score(self.test_arbitrages[index]["dataset"], prediction)
-            precision = precision_score(self.test_arbitrages[index]["dataset"], prediction)
-            recall = recall_score(self.test_arbitrages[index]["dataset"], prediction)
-            f1 = f1_score(self.test_arbitrages[index]["dataset"], prediction)
-
-            print(f"\nMultilayer perceptron for {self.train_datasets[index]['pair']} for "
-                  f"{self.train_datasets[index]['interval']} interval")
-            print(f"Accuracy: {accuracy} \nPrecision: {precision} \nRecall: {recall}\nF1: {f1}")
-
-            self.check_best_model(accuracy, precision, recall, f1, pipe, self.train_datasets[index]['pair'],
-                                  self.train_datasets[index]['interval'])
+        specs = specs if specs is not None else list(MODEL_SPECS)
+        jobs = [(spec, index) for spec in specs for index in range(len(self.train_datasets))]
+        keys, results = [], {}
+        for spec in specs:
+            if self.get_imbalance(spec, self.imbalance) != self.imbalance:
+                print(f"{MODEL_SPECS[spec]['name']} supports no class weights, it is trained without them.")
+        for position, (spec, index) in enumerate(jobs):
+            keys.append(self.experiment_store.get_key(self.train_datasets[index]["fingerprint"],
+                                                      self.get_preprocessing_config(spec), spec,
+                                                      self.get_parameters(spec, index), self.seed))
+            result = self.experiment_store.load(keys[position])
+            if result is not None:
+                results[position] = result
+                self.print_result(result, cached=True)
+
+        with tempfile.TemporaryDirectory() as directory:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                pending = set()
+                for index in {index for position, (_, index) in enumerate(jobs) if position not in results}:
+                    paths = [Shared_arrays.share_array(datasets[index]["dataset"], directory, f"{name}_{index}")
+                             for name, datasets in [("train", self.train_datasets), ("test", self.test_datasets),
+                                                    ("train_arbitrage", self.train_arbitrages),
+                                                    ("test_arbitrage", self.test_arbitrages)]]
+                    pending.add(executor.submit(self.prepare_dataset, index, paths, directory))
+
+                positions = {}
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        if future not in positions:
+                            index, paths = future.result()
+                            for position, (spec, job_index) in enumerate(jobs):
+                                if job_index == index and position not in results:
+                                    job = executor.submit(self.train_model, spec, self.train_datasets[index]["pair"],
+                                                          self.train_datasets[index]["interval"], paths,
+                                                          self.get_parameters(spec, index),
+                                                          self.get_imbalance(spec, self.imbalance) == "class_weight",
+                                                          self.seed)
+                                    positions[job] = position
+                                    pending.add(job)
+                            continue
+
+                        result = future.result()
+                        results[positions[future]] = result
+                        self.experiment_store.save(keys[positions[future]],
+                                                   {key: value for key, value in result.items()
+                                                    if key not in ["model", "prediction"]},
+                                                   result["prediction"], result["model"])
+                        self.print_result(result)
+
+        for position in range(len(jobs)):
+            result = results[position]
+            self.check_best_model(result["accuracy"], result["precision"], result["recall"], result["f1"],
+                                  result["model"], result["pair"], result["interval"], result["spec"])
 
     def save_best_models(self):
         """
-        Saving the best-trained models into .sav files and their parameters and metrics into .json file
+        Register the best-trained models as new versions in the model registry and save their parameters, metrics and
+        versions into .json file
         """
+        registry = Model_registry()
+        for pair_key, best_model in self.best_models.items():
+            if best_model["model"] is None:
+                continue
+            interval = self.datasets[pair_key][best_model["interval"]]
+            best_model["version"] = registry.register(
+                pair_key, best_model["model"], Fit_cache.fingerprint(interval.matrix(), interval.target),
+                interval.columns, {metric: best_model[metric] for metric in ["accuracy", "precision", "recall", "f1"]},
+                interval=best_model["interval"], spec=best_model["spec"],
+                imbalance=self.get_imbalance(best_model["spec"], self.imbalance),
+                feature_config=self.features)
+
         json_models = {}
         exclude_keys = {"model"}
         for key, pair in self.best_models.items():
             json_models[key] = {key: pair[key] for key in set(list(pair.keys())) - exclude_keys}
         with open("../best_models/best_models.json", "w") as file:
             json.dump(json_models, file)
-
-        with open("../best_models/best_model_BTCUSDT.sav", "wb") as file:
-            pickle.dump(self.best_models["BTCUSDT"]["model"], file)
-
-        with open("../best_models/best_model_ETHUSDT.sav", "wb") as file:
-            pickle.dump(self.best_models["ETHUSDT"]["model"], file)
@@ -1,3 +1,4 @@
+from data_validation import Data_validation
 from load_dataset import Load_dataset
 
 
@@ -5,6 +6,7 @@ class Data_description:
     def __init__(self, pairs):
         self.load_dataset = Load_dataset(pairs)
         self.datasets = self.load_dataset.load_preprocessed_datasets()
+        self.validation = Data_validation()
 
         self.basic_data_description()
         self.descriptive_statistics()
@@ -24,11 +26,15 @@ class Data_description:
     def descriptive_statistics(self):
         """
         Descriptive statistics of datasets include count, mean, standard deviation, minimum, maximum, and 25%, 50%, and
-        75% quantiles
+        75% quantiles, taken from the validation report of the dataset
         """
         for pair_key, pair in self.datasets.items():
             for interval_key, interval in pair.items():
-                print(interval.loc[:, "open_Binance":"change_Bybit"].describe())
+                report = self.validation.get_report("./dataset_preprocessed/" + pair_key + "_" + interval_key + ".csv",
+                                                    interval)
+                columns = list(interval.loc[:, "open_Binance":"change_Bybit"].columns)
+                print(Data_validation.describe(report, columns))
+        self.validation.save_reports()
 
     def correlation_with_arbitrage(self):
         """
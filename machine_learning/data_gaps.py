@@ -0,0 +1,151 @@
+import io
+import json
+import os
+import numpy as np
+import pandas as pd
+
+from dataset_catalog import Dataset_catalog
+
+INTERVAL_DURATIONS = {"1m": 60 * 1000, "5m": 5 * 60 * 1000, "15m": 15 * 60 * 1000}
+GAP_INDEX_FILE = "./dataset_index/gap_index.json"
+
+
+class Data_gaps:
+    def __init__(self, directory="./dataset", index_file=GAP_INDEX_FILE):
+        self.directory = directory
+        self.index_file = index_file
+        self.index = {}
+
+        self.load_index()
+
+    def load_index(self):
+        """
+        Load the stored index of expected and present candle timestamps, if it has been created before
+        """
+        if not os.path.exists(self.index_file):
+            return
+
+        with open(self.index_file, "r") as file:
+            self.index = json.load(file)
+
+    def save_index(self):
+        """
+        Save the index of expected and present candle timestamps into a JSON file
+        """
+        os.makedirs(os.path.dirname(self.index_file), exist_ok=True)
+        with open(self.index_file, "w") as file:
+            json.dump(self.index, file)
+
+    @staticmethod
+    def find_gaps(timestamps=None, duration=None, previous=None):
+        """
+        Find missing candles between consecutive timestamps of the dataset
+        :param timestamps: sorted timestamps of the candles in milliseconds
+        :param duration: duration of one candle in milliseconds
+        :param previous: timestamp of the candle preceding the provided ones, if any
+        :return: list of missing ranges as [first missing timestamp, last missing timestamp]
+        """
+        if previous is not None:
+            timestamps = np.concatenate(([previous], timestamps))
+
+        differences = np.diff(timestamps)
+        holes = np.flatnonzero(differences > duration)
+        return [[int(timestamps[hole] + duration), int(timestamps[hole + 1] - duration)] for hole in holes]
+
+    def is_appended(self, path=None, entry=None):
+        """
+        Check if the dataset has only been appended to since the last scan, by comparing the stored tail of the
+        previously scanned content with the current content of the file
+        :param path: path to the dataset file
+        :param entry: stored index entry of the dataset
+        :return: True if the previously scanned content is unchanged; False otherwise
+        """
+        if entry is None or os.path.getsize(path) < entry["offset"]:
+            return False
+
+        tail = entry["tail"].encode("latin-1")
+        with open(path, "rb") as handle:
+            handle.seek(entry["offset"] - len(tail))
+            return handle.read(len(tail)) == tail
+
+    def scan(self, file=None):
+        """
+        Update the index entry of the dataset, reading only the rows appended since the last scan; a dataset that has
+        been rewritten is scanned as a whole
+        :param file: name of the dataset file
+        :return: updated index entry of the dataset
+        """
+        path = os.path.join(self.directory, file)
+        entry = self.index.get(file)
+        if not self.is_appended(path, entry):
+            entry = None
+
+        with open(path, "rb") as handle:
+            header = handle.readline()
+            if entry is not None:
+                handle.seek(entry["offset"])
+            content = handle.read()
+
+        # an unterminated last line is parsed now but read again by the next scan
+        offset = (entry["offset"] if entry is not None else len(header)) + content.rfind(b"\n") + 1
+        if entry is not None and not content:
+            return entry
+
+        timestamps = np.empty(0, dtype=np.int64)
+        if content:
+            names = header.decode("latin-1").strip().split(',')
+            rows = pd.read_csv(io.BytesIO(content), header=None, names=names, usecols=["dateTime"])
+            timestamps = np.unique(pd.to_numeric(rows["dateTime"], errors="coerce").dropna().to_numpy(dtype=np.int64))
+
+        if entry is None:
+            exchange, pair, interval = Dataset_catalog.parse_filename(file)
+            entry = {"exchange": exchange, "pair": pair, "interval": interval,
+                     "duration": INTERVAL_DURATIONS[interval], "first": None, "last": None, "present": 0,
+                     "expected": 0, "gaps": []}
+
+        previous = entry["last"]
+        if previous is not None:
+            timestamps = timestamps[timestamps > previous]
+        if timestamps.size > 0:
+            entry["gaps"] += self.find_gaps(timestamps, entry["duration"], previous)
+            entry["first"] = int(timestamps[0]) if entry["first"] is None else entry["first"]
+            entry["last"] = int(timestamps[-1])
+            entry["present"] += int(timestamps.size)
+            entry["expected"] = (entry["last"] - entry["first"]) // entry["duration"] + 1
+
+        with open(path, "rb") as handle:
+            handle.seek(max(offset - 128, 0))
+            entry["tail"] = handle.read(offset - max(offset - 128, 0)).decode("latin-1")
+        entry["offset"] = offset
+        self.index[file] = entry
+        return entry
+
+    def update_index(self):
+        """
+        Update the index for every gathered dataset and save it
+        :return: updated index
+        """
+        for file in os.listdir(self.directory):
+            if Dataset_catalog.parse_filename(file) is not None:
+                self.scan(file)
+
+        self.save_index()
+        return self.index
+
+    def missing_ranges(self, file=None):
+        """
+        :param file: name of the dataset file
+        :return: list of missing ranges of the dataset according to the index
+        """
+        entry = self.index.get(file)
+        if entry is None:
+            return []
+        return entry["gaps"]
+
+    def report(self):
+        """
+        Print the number of expected and present candles together with the number of holes for every dataset
+        """
+        for file, entry in sorted(self.index.items()):
+            print(f"{entry['pair']} for {entry['interval']} interval on {entry['exchange']} exchange: "
+                  f"{entry['present']} of {entry.get('expected', 0)} candles present, {len(entry['gaps'])} gaps")
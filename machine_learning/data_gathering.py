@@ -1,18 +1,29 @@
+import os
 from datetime import datetime
 from dateutil.relativedelta import relativedelta
 import pandas as pd
 import numpy as np
 
+from data_gaps import Data_gaps
+from data_resampling import Data_resampling
+
 ONE_MINUTE_DIFFERENCE = 60 * 1000 * 200
 FIVE_MINUTES_DIFFERENCE = 5 * ONE_MINUTE_DIFFERENCE
 FIFTEEN_MINUTES_DIFFERENCE = 15 * ONE_MINUTE_DIFFERENCE
+BINANCE_COLUMNS = ["dateTime", "open", "high", "low", "close", "volume", "closeTime", "quoteAssetVolume",
+                   "numberOfTrades", "takerBuyBaseVol", "takerBuyQuoteVol", "ignore"]
+BYBIT_COLUMNS = ["dateTime", "open", "high", "low", "close", "volume", "turnover"]
+BYBIT_INTERVALS = {"1m": 1, "5m": 5, "15m": 15}
 
 
 class Data_gathering:
-    def __init__(self, Binance_client=None, Bybit_client=None, pairs=None):
+    def __init__(self, Binance_client=None, Bybit_client=None, pairs=None, backfill=False, derive_intervals=False):
         self.Binance_client = Binance_client
         self.Bybit_client = Bybit_client
         self.pairs = pairs
+        self.Binance_intervals, self.Bybit_intervals = ["1m", "5m", "15m"], [1, 5, 15]
+        if derive_intervals:
+            self.Binance_intervals, self.Bybit_intervals = ["1m"], [1]
 
         self.start_date = self.get_start_date()
         self.end_date = self.get_end_date()
@@ -21,8 +32,14 @@ class Data_gathering:
         except ValueError:
             return
 
+        if backfill:
+            self.backfill_missing_candles()
+            return
+
         self.get_Binance_historical_data()
         self.get_Bybit_historical_data()
+        if derive_intervals:
+            self.derive_intervals()
 
     def check_params(self):
         """
@@ -92,17 +109,31 @@ class Data_gathering:
         data = client.get_historical_klines(pair, interval, start_date)
         if data is None:
             return []
-        partial_historical_data = pd.DataFrame(data)
-        partial_historical_data.columns = columns
-        partial_historical_data["date"] = [datetime.fromtimestamp(int(d) / 1000) for d in
-                                           partial_historical_data.iloc[:, 0]]
+        return Data_gathering.decode_klines(data, columns)
+
+    @staticmethod
+    def decode_klines(data=None, columns=None):
+        """
+        Decode raw kline arrays returned by the API into typed columns in one vectorized step; timestamps are kept as
+        int64 milliseconds and the date column is derived from them as local datetime64 values
+        :param data: list of klines, each of them a list of string or numeric values
+        :param columns: names of the returned columns
+        :return: partial dataset with numeric price columns, empty if no kline has been returned
+        """
+        if data is None or len(data) == 0:
+            values = np.empty((0, len(columns)), dtype=np.float64)
+        else:
+            values = np.asarray(data, dtype=np.float64)
+        partial_historical_data = pd.DataFrame(values, columns=columns)
+        partial_historical_data["dateTime"] = values[:, 0].astype(np.int64)
+        partial_historical_data["date"] = Data_resampling.timestamps_to_dates(partial_historical_data["dateTime"])
         return partial_historical_data.loc[:, ["date", "dateTime", "open", "high", "low", "close", "volume"]]
 
     def get_Binance_historical_data(self):
         """
         Obtain a dataset of historical prices from the Binance exchange
         """
-        intervals = ["1m", "5m", "15m"]
+        intervals = self.Binance_intervals
 
         for interval in intervals:
             try:
@@ -116,12 +147,7 @@ class Data_gathering:
 
                 while current_start_date > (self.end_date - timestamp_interval):
                     partial_historical_data = self.get_partial_historical_data(self.Binance_client, pair, interval,
-                                                                               current_start_date,
-                                                                               ["dateTime", "open", "high", "low",
-                                                                                "close", "volume", "closeTime",
-                                                                                "quoteAssetVolume", "numberOfTrades",
-                                                                                "takerBuyBaseVol", "takerBuyQuoteVol",
-                                                                                "ignore"])
+                                                                               current_start_date, BINANCE_COLUMNS)
                     if partial_historical_data is None:
                         continue
 
@@ -138,7 +164,7 @@ class Data_gathering:
         """
         Obtain a dataset of historical prices from the Bybit exchange
         """
-        intervals = [1, 5, 15]
+        intervals = self.Bybit_intervals
 
         for interval in intervals:
             try:
@@ -152,9 +178,7 @@ class Data_gathering:
 
                 while current_start_date > (self.end_date - timestamp_interval):
                     partial_historical_data = self.get_partial_historical_data(self.Bybit_client, pair, interval,
-                                                                               current_start_date,
-                                                                               ["dateTime", "open", "high", "low",
-                                                                                "close", "volume", "turnover"])
+                                                                               current_start_date, BYBIT_COLUMNS)
                     if partial_historical_data is None:
                         continue
                     partial_historical_data = partial_historical_data.reindex(np.arange(199, -1, -1)).set_index(np.arange(200))
@@ -173,3 +197,119 @@ class Data_gathering:
 
                 filename = "./dataset/Bybit_data_" + pair + "_" + str_interval + ".csv"
                 historical_data.to_csv(filename, index=True)
+
+    def get_missing_range(self, client=None, pair=None, interval=None, start_date=None, end_date=None, duration=None,
+                          columns=None):
+        """
+        Obtain only the candles of one missing range of the dataset, page by page from its first missing timestamp
+        :param client: exchange to be used
+        :param pair: cryptocurrency pair to be analyzed
+        :param interval: time interval between individual records in the format of the exchange
+        :param start_date: timestamp of the first missing candle
+        :param end_date: timestamp of the last missing candle
+        :param duration: duration of one candle in milliseconds
+        :param columns: names of the returned columns
+        :return: candles found within the missing range
+        """
+        missing_data = []
+        current_start_date = start_date
+        while current_start_date <= end_date:
+            partial_historical_data = self.get_partial_historical_data(client, pair, interval, current_start_date,
+                                                                       columns)
+            if len(partial_historical_data) == 0:
+                break
+
+            in_range = (partial_historical_data["dateTime"] >= current_start_date) & \
+                       (partial_historical_data["dateTime"] <= end_date)
+            partial_historical_data = partial_historical_data[in_range]
+            if partial_historical_data.empty:
+                break
+
+            missing_data.append(partial_historical_data)
+            current_start_date = int(partial_historical_data["dateTime"].max()) + duration
+
+        return missing_data
+
+    @staticmethod
+    def merge_missing_data(filename=None, missing_data=None):
+        """
+        Merge the backfilled candles into the stored dataset, keeping it ordered by timestamp without duplicates
+        :param filename: path to the stored dataset
+        :param missing_data: list of partial datasets with the backfilled candles
+        """
+        if not missing_data:
+            return
+
+        historical_data = pd.read_csv(filename, index_col=0)
+        missing_data = pd.concat(missing_data, axis=0, ignore_index=True)
+        missing_data["date"] = missing_data["date"].dt.strftime("%Y-%m-%d %H:%M:%S")
+
+        historical_data = pd.concat([historical_data, missing_data], axis=0, ignore_index=True)
+        historical_data = historical_data.drop_duplicates(subset="dateTime").sort_values("dateTime")
+        historical_data.reset_index(drop=True).to_csv(filename, index=True)
+
+    def backfill_missing_candles(self):
+        """
+        Fetch only the missing ranges recorded in the gap index instead of downloading the whole datasets again
+        """
+        data_gaps = Data_gaps()
+        data_gaps.update_index()
+
+        for file, entry in data_gaps.index.items():
+            if entry["pair"] not in self.pairs or not entry["gaps"]:
+                continue
+
+            if entry["exchange"] == "Binance":
+                client, interval, columns = self.Binance_client, entry["interval"], BINANCE_COLUMNS
+            else:
+                client, interval, columns = self.Bybit_client, BYBIT_INTERVALS[entry["interval"]], BYBIT_COLUMNS
+
+            missing_data = []
+            for start_date, end_date in entry["gaps"]:
+                missing_data += self.get_missing_range(client, entry["pair"], interval, start_date, end_date,
+                                                       entry["duration"], columns)
+            self.merge_missing_data("./dataset/" + file, missing_data)
+
+        data_gaps.update_index()
+        data_gaps.report()
+
+    def derive_intervals(self, intervals=None, n_windows=3):
+        """
+        Derive coarser time intervals from the gathered 1m datasets locally and validate them against a sample of
+        windows of candles obtained from both exchanges
+        :param intervals: time intervals to be derived
+        :param n_windows: number of validated windows for each derived dataset
+        """
+        if intervals is None:
+            intervals = ["5m", "15m"]
+
+        data_resampling = Data_resampling(self.pairs)
+        data_resampling.resample_datasets(intervals)
+
+        generator = np.random.default_rng(2)
+        for exchange, client in [("Binance", self.Binance_client), ("Bybit", self.Bybit_client)]:
+            for pair in self.pairs:
+                for interval in intervals:
+                    filename = "./dataset/" + exchange + "_data_" + pair + "_" + interval + ".csv"
+                    if not os.path.exists(filename):
+                        continue
+                    resampled = pd.read_csv(filename, index_col=0)
+                    timestamps = resampled["dateTime"].to_numpy()
+                    compared, mismatched = 0, 0
+
+                    for start_date in generator.choice(timestamps, size=min(n_windows, len(timestamps)), replace=False):
+                        if exchange == "Binance":
+                            reference = self.get_partial_historical_data(client, pair, interval, int(start_date),
+                                                                         BINANCE_COLUMNS)
+                        else:
+                            reference = self.get_partial_historical_data(client, pair, BYBIT_INTERVALS[interval],
+                                                                         int(start_date), BYBIT_COLUMNS)
+                        if len(reference) == 0:
+                            continue
+
+                        window_compared, window_mismatched = data_resampling.compare(resampled, reference)
+                        compared += window_compared
+                        mismatched += window_mismatched
+
+                    print(f"{pair} for {interval} interval on {exchange} exchange: {mismatched} of {compared} "
+                          f"sampled candles differ from the exchange")
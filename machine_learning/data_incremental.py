@@ -0,0 +1,201 @@
+import io
+import json
+import os
+import numpy as np
+import pandas as pd
+
+from data_preprocessing import Data_preprocessing
+from data_streaming import Quantile_sketch, PRICE_COLUMNS
+from load_dataset import Load_dataset
+
+STATE_DIRECTORY = "./dataset_index/preprocessing_state"
+CANDLE_COLUMNS = ["open", "high", "low", "close", "volume"]
+
+
+class Data_incremental:
+    def __init__(self, pairs, intervals=None, state_directory=STATE_DIRECTORY):
+        self.pairs = pairs
+        self.state_directory = state_directory
+        self.load_dataset = Load_dataset(self.pairs, intervals)
+        self.handles = self.load_dataset.open_datasets()
+
+        for pair_key, pair in self.handles.items():
+            for interval_key, interval in pair.items():
+                if interval["Binance"] is None or interval["Bybit"] is None:
+                    continue
+                n_records = self.preprocess(pair_key, interval_key)
+                print(f"Preprocessing {pair_key} for {interval_key}: {n_records} new records appended")
+
+    def load_state(self, name=None):
+        """
+        Load the state of the incremental preprocessing of the dataset, consisting of the last processed timestamp,
+        the last preprocessed record, the read positions of the gathered files, the size and modification time of the
+        preprocessed dataset and the samples of price differences for the outlier bounds
+        :param name: name of the preprocessed dataset
+        :return: state of the dataset; None if the dataset has not been preprocessed incrementally yet or the
+        preprocessed dataset has been removed or rewritten since, e.g. by Data_preprocessing
+        """
+        filename = os.path.join(self.state_directory, name + ".json")
+        output = "./dataset_preprocessed/" + name + ".csv"
+        if not os.path.exists(filename) or not os.path.exists(output):
+            return None
+
+        with open(filename, "r") as file:
+            state = json.load(file)
+        if state.get("output") != {"size": os.path.getsize(output), "modified": os.path.getmtime(output)}:
+            return None
+        samples = np.load(os.path.join(self.state_directory, name + ".npz"))
+        state["sketches"] = {column: Quantile_sketch(sample=samples[column], count=count, seed=count)
+                             for column, count in state["counts"].items()}
+        return state
+
+    def save_state(self, name=None, state=None):
+        """
+        Save the state of the incremental preprocessing of the dataset
+        :param name: name of the preprocessed dataset
+        :param state: state of the dataset
+        """
+        os.makedirs(self.state_directory, exist_ok=True)
+        np.savez(os.path.join(self.state_directory, name + ".npz"),
+                 **{column: sketch.sample for column, sketch in state["sketches"].items()})
+
+        with open(os.path.join(self.state_directory, name + ".json"), "w") as file:
+            json.dump({"last_timestamp": state["last_timestamp"], "columns": state["columns"],
+                       "last_record": state["last_record"], "sources": state["sources"], "output": state["output"],
+                       "counts": {column: sketch.count for column, sketch in state["sketches"].items()}}, file)
+
+    @staticmethod
+    def remove_last_line(filename=None):
+        """
+        Remove the last record of the saved dataset, so that it can be appended again with the updated change
+        :param filename: path to the saved dataset
+        """
+        with open(filename, "rb+") as file:
+            file.seek(0, os.SEEK_END)
+            position = file.tell() - 1
+            while position > 0:
+                position -= 1
+                file.seek(position)
+                if file.read(1) == b"\n":
+                    file.truncate(position + 1)
+                    return
+
+    @staticmethod
+    def read_appended(entry=None, source=None):
+        """
+        Read only the complete lines appended to the gathered file after the stored position; the file is read from its
+        start when the line ending at the stored position has changed, which means that the file has been rewritten
+        :param entry: manifest entry of the gathered dataset
+        :param source: stored position and the line ending at it, None if the file has not been read yet
+        :return: read records, the position the reading started at and the position after every read record, each
+        position with the line ending at it
+        """
+        with open(entry["path"], "rb") as file:
+            offset, last_line = 0, None
+            if source is not None:
+                last_line = source["last_line"].encode()
+                if source["offset"] >= len(last_line):
+                    file.seek(source["offset"] - len(last_line))
+                    if file.read(len(last_line)) == last_line:
+                        offset = source["offset"]
+
+            file.seek(offset)
+            if offset == 0:
+                last_line = file.readline()
+                offset = len(last_line)
+            data = file.read()
+
+        lines = data[:data.rfind(b"\n") + 1].splitlines(keepends=True)
+        positions, end = [], offset
+        for line in lines:
+            end += len(line)
+            positions.append({"offset": end, "last_line": line.decode()})
+
+        names = [column if column else f"Unnamed: {index}" for index, column in enumerate(entry["columns"])]
+        dataset = pd.read_csv(io.BytesIO(b"".join(lines)), header=None, names=names, index_col=False) if lines else \
+            pd.DataFrame(columns=names)
+        return dataset, {"offset": offset, "last_line": last_line.decode()}, positions
+
+    def new_records(self, pair=None, interval=None, state=None):
+        """
+        Load the records of both exchanges gathered after the last processed timestamp and join them, the gathered
+        files are read from the positions where the previous run stopped; the new positions follow the last record
+        up to the last joined timestamp, so records without a counterpart yet are read again by the next run
+        :param pair: cryptocurrency pair of the datasets
+        :param interval: time interval of the datasets
+        :param state: state of the dataset; all records are loaded if None
+        :return: joined new records and the new read positions of the gathered files
+        """
+        datasets, read = {}, {}
+        for exchange in ["Binance", "Bybit"]:
+            dataset, start, positions = self.read_appended(self.handles[pair][interval][exchange].entry,
+                                                           None if state is None else state["sources"][exchange])
+            timestamps = pd.to_numeric(dataset["dateTime"], errors="coerce").to_numpy(dtype=np.float64)
+            read[exchange] = (timestamps, start, positions)
+            if state is not None:
+                dataset = dataset[timestamps > state["last_timestamp"]]
+            dataset = Data_preprocessing.clean_data(dataset, pair, interval, exchange)
+            datasets[exchange] = dataset.astype({column: np.float64 for column in CANDLE_COLUMNS})
+
+        dataset = Data_preprocessing.join_exchanges(datasets["Binance"], datasets["Bybit"])
+        last_timestamp = dataset["dateTime"].max() if not dataset.empty else \
+            (-np.inf if state is None else state["last_timestamp"])
+        sources = {}
+        for exchange, (timestamps, start, positions) in read.items():
+            processed = np.flatnonzero(timestamps <= last_timestamp)
+            sources[exchange] = positions[processed[-1]] if processed.size > 0 else start
+        return dataset, sources
+
+    def preprocess(self, pair=None, interval=None):
+        """
+        Preprocess only the records gathered since the last run and append them to the preprocessed dataset; the outlier
+        bounds are updated from the stored samples and the last preprocessed record is processed again together with
+        the new records, as its change depends on the following record
+        :param pair: cryptocurrency pair of the datasets
+        :param interval: time interval of the datasets
+        :return: number of appended records
+        """
+        name = pair + "_" + interval
+        filename = "./dataset_preprocessed/" + name + ".csv"
+        state = self.load_state(name)
+
+        dataset, sources = self.new_records(pair, interval, state)
+        if dataset.empty:
+            if state is not None:
+                state["sources"] = sources
+                self.save_state(name, state)
+            return 0
+
+        if state is None:
+            state = {"sketches": {column: Quantile_sketch() for column in PRICE_COLUMNS}, "last_record": None}
+        last_timestamp = int(dataset["dateTime"].max())
+
+        outliers = np.zeros(dataset.shape[0], dtype=bool)
+        for column, sketch in state["sketches"].items():
+            difference = dataset[column + "_Binance"] - dataset[column + "_Bybit"]
+            sketch.update(difference.dropna())
+            outliers |= ((difference < sketch.quantile(0.001)) | (difference > sketch.quantile(0.999))).to_numpy()
+        dataset = dataset[~outliers].dropna()
+
+        if state["last_record"] is not None:
+            last_record = pd.DataFrame([state["last_record"]], columns=state["columns"])
+            dataset = pd.concat([last_record.drop(columns=["change_Binance", "change_Bybit", "arbitrage"]), dataset])
+        dataset = Data_preprocessing.add_change(dataset.reset_index(drop=True))
+        dataset = Data_preprocessing.identify_arbitrage(dataset, pair)
+
+        if state["last_record"] is not None:
+            dataset.loc[0, "arbitrage"] = last_record.loc[0, "arbitrage"]
+            self.remove_last_line(filename)
+            dataset.to_csv(filename, mode="a", header=False, index=False)
+        else:
+            dataset.to_csv(filename, index=False)
+
+        n_records = dataset.shape[0] - (0 if state["last_record"] is None else 1)
+        state["last_timestamp"] = last_timestamp
+        state["sources"] = sources
+        state["output"] = {"size": os.path.getsize(filename), "modified": os.path.getmtime(filename)}
+        state["columns"] = dataset.columns.tolist()
+        state["last_record"] = [value.item() if isinstance(value, np.generic) else value
+                                for value in dataset.iloc[-1].tolist()]
+        self.save_state(name, state)
+        return n_records
@@ -1,133 +1,223 @@
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import pandas as pd
 import numpy as np
 import csv
 
+from data_validation import Data_validation
+from feature_pipeline import Feature_pipeline
 from load_dataset import Load_dataset
+from shared_arrays import Shared_arrays
 
 MIN_PERCENTAGE_PROFIT = 0.01
+TAKER_FEE = 0.04
+TRADED_AMOUNTS = {"BTCUSDT": 0.01, "ETHUSDT": 1}
+BINANCE_PRICE_COLUMNS = ["open_Binance", "high_Binance", "low_Binance", "close_Binance"]
+BYBIT_PRICE_COLUMNS = ["open_Bybit", "low_Bybit", "high_Bybit", "close_Bybit"]
 
 
 class Data_preprocessing:
-    def __init__(self, pairs):
+    def __init__(self, pairs, outlier_method="quantile", alignment_tolerance=None, workers=None):
         self.pairs = pairs
+        self.outlier_method = outlier_method
+        self.alignment_tolerance = alignment_tolerance
+        self.validation = Data_validation()
         self.load_dataset = Load_dataset(self.pairs)
         self.datasets = self.load_dataset.load_datasets()
 
         self.align_datasets()
-        self.concentrate_datasets()
+        if workers is not None and workers > 1:
+            self.preprocess_in_parallel(workers)
+            return
+
         for pair_key, pair in self.datasets.items():
             for interval_key, interval in pair.items():
                 print(f"Preprocessing {pair_key} for {interval_key}")
-                self.datasets[pair_key][interval_key] = self.handle_outliers(interval)
-                self.datasets[pair_key][interval_key] = self.add_change(interval)
-                self.datasets[pair_key][interval_key] = \
-                    self.identify_arbitrage(self.datasets[pair_key][interval_key], pair_key)
+                self.datasets[pair_key][interval_key] = self.preprocess(interval, pair_key, self.outlier_method)
 
         self.save_preprocessed_datasets()
 
     def align_datasets(self):
         """
-        Align datasets with the same cryptocurrency pair and time interval to start and end with the same timestamp
+        Align datasets with the same cryptocurrency pair and time interval by joining them on their timestamps and
+        report the records without a counterpart on the other exchange
         """
         for pair_key, pair in self.datasets.items():
-            start_date, end_date = None, None
-            for interval_key, interval in pair.items():
-                for exchange_key, exchange in interval.items():
-                    self.datasets[pair_key][interval_key][exchange_key] = self.clean_data(exchange, pair_key,
-                                                                                          interval_key, exchange_key)
-
-                    for currency_pair in self.pairs:
-                        start = self.datasets[currency_pair][interval_key][exchange_key].iloc[-1, 2]
-                        end = self.datasets[currency_pair][interval_key][exchange_key].iloc[0, 2]
-
-                        if start_date is None or start < start_date:
-                            start_date = start
-                        if end_date is None or end > end_date:
-                            end_date = end
-
-                for exchange_key, exchange in interval.items():
-                    for currency_pair in self.pairs:
-                        data = self.datasets[currency_pair][interval_key][exchange_key]
-                        self.datasets[currency_pair][interval_key][exchange_key] = \
-                            data.drop(data[data["dateTime"] < end_date].index).reset_index(drop=True)
-
-                        data = self.datasets[currency_pair][interval_key][exchange_key]
-                        self.datasets[currency_pair][interval_key][exchange_key] = \
-                            data.drop(data[data["dateTime"] > start_date].index).reset_index(drop=True)
-
-    def concentrate_datasets(self):
+            for interval_key in list(pair.keys()):
+                interval = pair[interval_key]
+                if interval["Binance"] is None or interval["Bybit"] is None:
+                    del pair[interval_key]
+                    continue
+
+                reports = {exchange: self.validate_dataset(interval[exchange], pair_key, interval_key, exchange)
+                           for exchange in ["Binance", "Bybit"]}
+                Binance_dataset = self.clean_data(interval["Binance"], pair_key, interval_key, "Binance",
+                                                  reports["Binance"])
+                Bybit_dataset = self.clean_data(interval["Bybit"], pair_key, interval_key, "Bybit", reports["Bybit"])
+                dataset = self.join_exchanges(Binance_dataset, Bybit_dataset, self.alignment_tolerance)
+
+                matched_Bybit = dataset["dateTime_Bybit"].nunique() if "dateTime_Bybit" in dataset.columns \
+                    else dataset.shape[0]
+                unmatched_Binance = Binance_dataset.shape[0] - dataset.shape[0]
+                unmatched_Bybit = Bybit_dataset.shape[0] - matched_Bybit
+                if unmatched_Binance > 0 or unmatched_Bybit > 0:
+                    print(f"UNMATCHED DATA FOUND\n{pair_key} for {interval_key} interval contains {unmatched_Binance} "
+                          f"Binance and {unmatched_Bybit} Bybit records without a counterpart")
+
+                self.datasets[pair_key][interval_key] = dataset.drop(columns=["dateTime_Bybit"], errors="ignore")
+
+        self.validation.save_reports()
+
+    def validate_dataset(self, dataset=None, pair=None, interval=None, exchange=None):
         """
-        Concentrate datasets with the same cryptocurrency pair and time interval into one file and rename the columns
+        Validate the gathered dataset, reusing the stored report if the file has not changed, and print the problems
+        found besides null values, which are handled by the cleaning
+        :param dataset: gathered dataset
+        :param pair: cryptocurrency pair of the dataset
+        :param interval: time interval of the dataset
+        :param exchange: exchange of the dataset
+        :return: validation report
         """
-        for pair_key, pair in self.datasets.items():
-            for interval_key, interval in pair.items():
-                Binance_dataset = interval["Binance"]
-                rename = {"Unnamed: 0": "Index", "date": "date", "dateTime": "dateTime", "open": "open_Binance",
-                          "high": "high_Binance", "low": "low_Binance", "close": "close_Binance",
-                          "volume": "volume_Binance"}
-                Binance_dataset.rename(columns=rename, inplace=True)
+        report = self.validation.get_report("./dataset/" + exchange + "_data_" + pair + "_" + interval + ".csv",
+                                            dataset)
+        Data_validation.print_report(dict(report, columns={}), f"{pair} for {interval} interval on {exchange} exchange")
+        return report
 
-                Bybit_dataset = interval["Bybit"].loc[:, ["open", "high", "low", "close", "volume"]]
-                Binance_dataset = pd.concat([Binance_dataset, Bybit_dataset], axis=1)
-
-                rename = {"open": "open_Bybit", "high": "high_Bybit", "low": "low_Bybit", "close": "close_Bybit",
-                          "volume": "volume_Bybit"}
-                Binance_dataset.rename(columns=rename, inplace=True)
-
-                self.datasets[pair_key][interval_key] = Binance_dataset
+    @staticmethod
+    def join_exchanges(Binance_dataset=None, Bybit_dataset=None, tolerance=None):
+        """
+        Join datasets of both exchanges on their timestamps and rename the columns; without a tolerance only records
+        with the same timestamp are joined, otherwise every Binance record is joined with the nearest Bybit record
+        within the tolerance; the timestamps must not contain null values, which the cleaning removes beforehand
+        :param Binance_dataset: dataset of the Binance exchange
+        :param Bybit_dataset: dataset of the Bybit exchange
+        :param tolerance: maximal difference of joined timestamps in milliseconds
+        :return: joined dataset, with the column dateTime_Bybit of joined Bybit timestamps if a tolerance is provided
+        """
+        rename = {"Unnamed: 0": "Index", "open": "open_Binance", "high": "high_Binance", "low": "low_Binance",
+                  "close": "close_Binance", "volume": "volume_Binance"}
+        Binance_dataset = Binance_dataset.rename(columns=rename).sort_values("dateTime")
+
+        rename = {"open": "open_Bybit", "high": "high_Bybit", "low": "low_Bybit", "close": "close_Bybit",
+                  "volume": "volume_Bybit"}
+        Bybit_dataset = Bybit_dataset.loc[:, ["dateTime", "open", "high", "low", "close", "volume"]] \
+            .rename(columns=rename).sort_values("dateTime")
+
+        if tolerance is None:
+            dataset = Binance_dataset.merge(Bybit_dataset.drop_duplicates(subset="dateTime"), on="dateTime",
+                                            how="inner")
+        else:
+            # the keys of an asof join must have the same type, a column that held NaN is read as float64
+            Binance_dataset = Binance_dataset.astype({"dateTime": np.int64})
+            Bybit_dataset = Bybit_dataset.astype({"dateTime": np.int64})
+            Bybit_dataset["dateTime_Bybit"] = Bybit_dataset["dateTime"]
+            dataset = pd.merge_asof(Binance_dataset, Bybit_dataset, on="dateTime", direction="nearest",
+                                    tolerance=tolerance).dropna(subset=["dateTime_Bybit"])
+        return dataset.reset_index(drop=True)
 
     @staticmethod
-    def clean_data(dataset, pair, interval, exchange):
+    def clean_data(dataset, pair, interval, exchange, report=None):
         """
         Clean the dataset of null values if any of them occur
         :param dataset: dataset to be analyzed
         :param pair: name of the cryptocurrency pair in the dataset
         :param interval: name of the time interval of the dataset
         :param exchange: name of the exchange of the dataset
+        :param report: validation report of the dataset, computed if None
         :return: dataset without null values
         """
-        for column in dataset.columns:
-            if column != "date":
-                dataset[column] = pd.to_numeric(dataset[column], errors="coerce")
+        if report is None:
+            report = Data_validation.validate(dataset)
 
-        null_sum = dataset.isnull().sum()
-        if null_sum.any() > 0:
-            null_percentage = max(null_sum)/dataset.shape[0]
+        null_sum = {column: statistics["nulls"] for column, statistics in report["columns"].items()}
+        if any(null_sum.values()):
+            null_percentage = max(null_sum.values())/report["n_records"]
             print(f"NULL DATA FOUND\n{pair} for {interval} interval on {exchange} exchange contains {null_sum} "
                   f"({null_percentage}%) NULL values")
 
             if null_percentage < 0.1:
                 dataset = dataset.dropna(how="any", axis=0)
             else:
-                dataset = dataset.fillna(dataset.mean())
+                dataset = dataset.fillna({column: statistics["mean"]
+                                          for column, statistics in report["columns"].items()})
 
         return dataset
 
     @staticmethod
-    def handle_outliers(dataset):
+    def quantile_outliers(difference=None, low=0.001, high=0.999):
         """
-        Delete extreme outliers lower than the 0,1% quantile or higher than the 99,9% quantile that indicate an error
-        in the dataset
-        :param dataset: dataset to be analyzed
-        :return: dataset without outliers
+        Mark the differences lower than the low quantile or higher than the high quantile
+        :param difference: differences between the prices on both exchanges
+        :param low: lower quantile
+        :param high: upper quantile
+        :return: boolean mask of outliers
+        """
+        low_quantile, high_quantile = difference.quantile(low), difference.quantile(high)
+        return ((difference < low_quantile) | (difference > high_quantile)).to_numpy()
+
+    @staticmethod
+    def mad_outliers(difference=None, threshold=3.5):
+        """
+        Mark the differences whose modified z-score based on the median absolute deviation exceeds the threshold;
+        when more than half of the differences equal the median, the deviation is zero and the z-score is based on the
+        mean absolute deviation instead, and nothing is marked if that is zero as well
+        :param difference: differences between the prices on both exchanges
+        :param threshold: maximal modified z-score
+        :return: boolean mask of outliers
         """
-        for col_index in range(dataset.shape[1]):
-            if dataset.columns[col_index] in ["open_Binance", "high_Binance", "low_Binance", "close_Binance"]:
-                difference = []
+        median = difference.median()
+        absolute_deviation = (difference - median).abs()
+        deviation = absolute_deviation.median()
+        if deviation != 0:
+            return (0.6745 * absolute_deviation / deviation > threshold).to_numpy()
+        deviation = absolute_deviation.mean()
+        if deviation != 0:
+            return (0.7979 * absolute_deviation / deviation > threshold).to_numpy()
+        return np.zeros(len(difference), dtype=bool)
 
-                if col_index + 5 < dataset.shape[1]:
-                    difference = dataset.iloc[:, col_index] - dataset.iloc[:, col_index + 5]
+    @staticmethod
+    def rolling_zscore_outliers(difference=None, window=1000, threshold=6):
+        """
+        Mark the differences whose z-score with respect to the preceding window of records exceeds the threshold
+        :param difference: differences between the prices on both exchanges
+        :param window: number of preceding records
+        :param threshold: maximal z-score
+        :return: boolean mask of outliers
+        """
+        rolling = difference.shift(1).rolling(window, min_periods=2)
+        zscore = (difference - rolling.mean()) / rolling.std()
+        return (zscore.abs() > threshold).to_numpy()
 
-                low_quantile = difference.quantile(0.001)
-                high_quantile = difference.quantile(0.999)
-                for row_index in range(len(difference)):
-                    if difference[row_index] < low_quantile or difference[row_index] > high_quantile:
-                        if row_index < dataset.shape[0]:
-                            dataset.iloc[row_index, :] = np.nan
+    @staticmethod
+    def find_outliers(dataset=None, method="quantile", **parameters):
+        """
+        Mark the records with an outlier in the difference between the prices on both exchanges in any price column
+        :param dataset: dataset or dictionary of its columns
+        :param method: name of the method marking the outliers, one of quantile, mad and rolling_zscore
+        :param parameters: parameters of the method
+        :return: boolean mask of outliers
+        """
+        mark_outliers = getattr(Data_preprocessing, method + "_outliers")
+        outliers = np.zeros(len(dataset["open_Binance"]), dtype=bool)
+        for Binance_column in BINANCE_PRICE_COLUMNS:
+            difference = pd.Series(dataset[Binance_column]) - pd.Series(dataset[Binance_column.replace("Binance",
+                                                                                                       "Bybit")])
+            outliers |= mark_outliers(difference, **parameters)
+        return outliers
 
-        dataset.dropna(inplace=True)
-        dataset.reset_index(drop=True, inplace=True)
-        return dataset
+    @staticmethod
+    def handle_outliers(dataset, method="quantile", **parameters):
+        """
+        Delete extreme outliers in the differences between the prices on both exchanges that indicate an error in the
+        dataset; by default the differences lower than the 0,1% quantile or higher than the 99,9% quantile are deleted
+        :param dataset: dataset to be analyzed
+        :param method: name of the method marking the outliers, one of quantile, mad and rolling_zscore
+        :param parameters: parameters of the method
+        :return: dataset without outliers
+        """
+        outliers = Data_preprocessing.find_outliers(dataset, method, **parameters)
+        return dataset[~outliers].dropna().reset_index(drop=True)
 
     @staticmethod
     def add_change(dataset):
@@ -137,18 +227,7 @@ class Data_preprocessing:
         :param dataset: dataset to be analyzed
         :return: dataset with appended change on Binance and Bybit
         """
-        Binance_change = pd.Series(0, index=np.arange(dataset.shape[0]), name="change_Binance")
-        Bybit_change = pd.Series(0, index=np.arange(dataset.shape[0]), name="change_Bybit")
-        for index, row in dataset.iterrows():
-            if index + 1 < dataset.shape[0]:
-                Binance_change[index] = pd.Series((dataset.loc[index + 1, "open_Binance"] - row["open_Binance"]) /
-                                                  row["open_Binance"]) * 100
-                Bybit_change[index] = pd.Series((dataset.loc[index + 1, "open_Bybit"] - row["open_Bybit"]) /
-                                                row["open_Bybit"]) * 100
-
-        dataset = pd.concat([dataset, Binance_change], axis=1)
-        dataset = pd.concat([dataset, Bybit_change], axis=1)
-        return dataset
+        return Feature_pipeline.transform(dataset)
 
     @staticmethod
     def check_for_arbitrage(Binance_value, Bybit_value, pair):
@@ -159,13 +238,9 @@ class Data_preprocessing:
         :param pair: cryptocurrency pair analyzed
         :return: True if an occurrence of arbitrage is likely; False otherwise
         """
-        taker_fee = 0.04
+        taker_fee = TAKER_FEE
         percentage_profit = 0
-        traded_amount = 0
-        if pair == "BTCUSDT":
-            traded_amount = 0.01
-        if pair == "ETHUSDT":
-            traded_amount = 1
+        traded_amount = TRADED_AMOUNTS.get(pair, 0)
 
         Binance_opportunity = Binance_value - Bybit_value
         Bybit_opportunity = Bybit_value - Binance_value
@@ -187,31 +262,177 @@ class Data_preprocessing:
             return True
         return False
 
-    def identify_arbitrage(self, dataset, pair):
+    @staticmethod
+    def compute_percentage_profits(Binance_values=None, Bybit_values=None, taker_fees=None, traded_amounts=None):
+        """
+        Compute the percentage profit of an arbitrage for all pairs of prices and all combinations of fees and traded
+        amounts at once, following the same rules as check_for_arbitrage
+        :param Binance_values: array of prices on Binance
+        :param Bybit_values: array of prices on Bybit with the same shape
+        :param taker_fees: list of taker fees
+        :param traded_amounts: list of traded amounts
+        :return: array of percentage profits with the shape (fees, amounts) + shape of the prices
+        """
+        Binance_values = np.asarray(Binance_values, dtype=np.float64)
+        Bybit_values = np.asarray(Bybit_values, dtype=np.float64)
+        taker_fee = np.asarray(taker_fees, dtype=np.float64).reshape((-1, 1) + (1,) * Binance_values.ndim)
+        traded_amount = np.asarray(traded_amounts, dtype=np.float64).reshape((1, -1) + (1,) * Binance_values.ndim)
+
+        fee = taker_fee * Binance_values * traded_amount + taker_fee * Bybit_values * traded_amount
+        profit = np.abs((Binance_values - Bybit_values) * traded_amount) - fee
+        with np.errstate(divide="ignore", invalid="ignore"):
+            percentage_profit = np.where(Binance_values < Bybit_values, profit / Binance_values * 100,
+                                         np.where(Bybit_values < Binance_values, profit / Bybit_values * 100, 0))
+        return percentage_profit
+
+    @staticmethod
+    def label_arbitrage(dataset=None, pair=None, taker_fees=None, traded_amounts=None, min_percentage_profits=None):
         """
-        Identify an occurrence of probable arbitrage for each record and each pair of prices in the dataset
+        Label the probable occurrence of an arbitrage for the whole dataset and a grid of fees, traded amounts and
+        minimal profits in a single pass; a record is labelled when any pair of prices of the previous record is
+        profitable
         :param dataset: dataset to be analyzed
         :param pair: cryptocurrency pair to be analyzed
-        :return: dataset with the probable occurrence of an arbitrage
+        :param taker_fees: list of taker fees, the default fee if None
+        :param traded_amounts: list of traded amounts, the default amount of the pair if None
+        :param min_percentage_profits: list of minimal percentage profits, the default minimal profit if None
+        :return: dataframe with the column arbitrage_<fee>_<amount>_<profit> for every combination
         """
-        arbitrage = pd.Series(0, index=np.arange(dataset.shape[0]), name="arbitrage")
+        if taker_fees is None:
+            taker_fees = [TAKER_FEE]
+        if traded_amounts is None:
+            traded_amounts = [TRADED_AMOUNTS.get(pair, 0)]
+        if min_percentage_profits is None:
+            min_percentage_profits = [MIN_PERCENTAGE_PROFIT]
+
+        percentage_profit = Data_preprocessing.compute_percentage_profits(
+            dataset.loc[:, BINANCE_PRICE_COLUMNS].to_numpy(), dataset.loc[:, BYBIT_PRICE_COLUMNS].to_numpy(),
+            taker_fees, traded_amounts)
+        best_profit = np.max(percentage_profit, axis=-1)
+        profitable = best_profit[:, :, None, :] > np.asarray(min_percentage_profits).reshape((1, 1, -1, 1))
+
+        labels = np.zeros(profitable.shape, dtype=np.int64)
+        labels[..., 1:] = profitable[..., :-1]
+        columns = {f"arbitrage_{fee}_{amount}_{profit}": labels[fee_index, amount_index, profit_index]
+                   for fee_index, fee in enumerate(taker_fees)
+                   for amount_index, amount in enumerate(traded_amounts)
+                   for profit_index, profit in enumerate(min_percentage_profits)}
+        return pd.DataFrame(columns, index=dataset.index)
 
-        for line in range(dataset.shape[0] - 1):
-            Binance_columns = ["open_Binance", "high_Binance", "low_Binance", "close_Binance"]
-            Bybit_columns = ["open_Bybit", "low_Bybit", "high_Bybit", "close_Bybit"]
-            for Binance_value, Bybit_value in zip(dataset.loc[line, Binance_columns], dataset.loc[line, Bybit_columns]):
-                if self.check_for_arbitrage(Binance_value, Bybit_value, pair):
-                    arbitrage[line + 1] = pd.Series(1)
-                    break
+    @staticmethod
+    def label_sensitivity(dataset=None, pair=None, taker_fees=None, traded_amounts=None, min_percentage_profits=None):
+        """
+        Summarize the share of records labelled as an arbitrage for every combination of the grid
+        :param dataset: dataset to be analyzed
+        :param pair: cryptocurrency pair to be analyzed
+        :param taker_fees: list of taker fees
+        :param traded_amounts: list of traded amounts
+        :param min_percentage_profits: list of minimal percentage profits
+        :return: dataframe with the fee, traded amount, minimal profit and share of arbitrages for every combination
+        """
+        labels = Data_preprocessing.label_arbitrage(dataset, pair, taker_fees, traded_amounts, min_percentage_profits)
+        settings = [column.split('_')[1:] for column in labels.columns]
+        return pd.DataFrame({"taker_fee": [float(setting[0]) for setting in settings],
+                             "traded_amount": [float(setting[1]) for setting in settings],
+                             "min_percentage_profit": [float(setting[2]) for setting in settings],
+                             "arbitrage_share": labels.mean(axis=0).to_numpy()})
 
+    @staticmethod
+    def identify_arbitrage(dataset, pair):
+        """
+        Identify an occurrence of probable arbitrage for each record and each pair of prices in the dataset
+        :param dataset: dataset to be analyzed
+        :param pair: cryptocurrency pair to be analyzed
+        :return: dataset with the probable occurrence of an arbitrage
+        """
+        arbitrage = Data_preprocessing.label_arbitrage(dataset, pair).iloc[:, 0].rename("arbitrage")
         dataset = pd.concat([dataset, arbitrage], axis=1)
         return dataset
 
-    def save_preprocessed_datasets(self):
+    @staticmethod
+    def preprocess(dataset=None, pair=None, outlier_method="quantile"):
         """
-        Save datasets after the pre-processing phase into the dataset_preprocessed dictionary
+        Delete outliers, add the percentage change and identify arbitrages in an aligned dataset
+        :param dataset: aligned dataset to be preprocessed
+        :param pair: cryptocurrency pair of the dataset
+        :param outlier_method: name of the method marking the outliers
+        :return: preprocessed dataset
         """
-        for pair_key, pair in self.datasets.items():
-            for interval_key, interval in pair.items():
-                filename = "./dataset_preprocessed/" + pair_key + "_" + interval_key + ".csv"
-                interval.to_csv(filename, index=False)
+        dataset = Data_preprocessing.handle_outliers(dataset, outlier_method)
+        dataset = Data_preprocessing.add_change(dataset)
+        return Data_preprocessing.identify_arbitrage(dataset, pair)
+
+    @staticmethod
+    def preprocess_shared(description=None, pair=None, interval=None, outlier_method="quantile"):
+        """
+        Preprocess an aligned dataset mapped from shared files in a worker process and save the result; the outliers
+        and null values are found on the memory-mapped columns, so only the kept records are copied into the worker
+        :param description: description of the shared dataset
+        :param pair: cryptocurrency pair of the dataset
+        :param interval: time interval of the dataset
+        :param outlier_method: name of the method marking the outliers
+        :return: pair, time interval, number of records, path and validation report of the preprocessed dataset
+        """
+        columns = Shared_arrays.load_columns(description)
+        kept = ~Data_preprocessing.find_outliers(columns, outlier_method)
+        for values in columns.values():
+            if values.dtype.kind != "U":
+                kept &= ~pd.isna(values)
+
+        dataset = pd.DataFrame({column: values[kept] for column, values in columns.items()})
+        dataset = Data_preprocessing.identify_arbitrage(Data_preprocessing.add_change(dataset), pair)
+        filename, report = Data_preprocessing.save_preprocessed_dataset(dataset, pair, interval, Data_validation())
+        return pair, interval, dataset.shape[0], filename, report
+
+    def preprocess_in_parallel(self, workers=None):
+        """
+        Preprocess the independent datasets of every pair and time interval in a pool of processes, each dataset is
+        passed to the workers through memory-mapped files and saved by the worker as soon as it is preprocessed, the
+        validation reports of the workers are stored as in the sequential preprocessing
+        :param workers: number of worker processes
+        """
+        reports = {}
+        with tempfile.TemporaryDirectory() as directory:
+            with ProcessPoolExecutor(max_workers=min(workers, os.cpu_count() or 1)) as executor:
+                futures = []
+                for pair_key, pair in self.datasets.items():
+                    for interval_key, interval in pair.items():
+                        description = Shared_arrays.share_frame(interval, directory, pair_key + "_" + interval_key)
+                        futures.append(executor.submit(self.preprocess_shared, description, pair_key, interval_key,
+                                                       self.outlier_method))
+
+                for future in as_completed(futures):
+                    pair_key, interval_key, n_records, filename, report = future.result()
+                    reports[filename] = report
+                    print(f"Preprocessed {pair_key} for {interval_key} with {n_records} records")
+
+        self.save_preprocessed_datasets(reports)
+
+    @staticmethod
+    def save_preprocessed_dataset(dataset=None, pair=None, interval=None, validation=None):
+        """
+        Save one preprocessed dataset into the dataset_preprocessed directory and validate the saved dataset
+        :param dataset: preprocessed dataset
+        :param pair: cryptocurrency pair of the dataset
+        :param interval: time interval of the dataset
+        :param validation: data validation holding the reports
+        :return: path and validation report of the saved dataset
+        """
+        filename = "./dataset_preprocessed/" + pair + "_" + interval + ".csv"
+        dataset.to_csv(filename, index=False)
+        return filename, validation.get_report(filename, dataset)
+
+    def save_preprocessed_datasets(self, reports=None):
+        """
+        Save datasets after the pre-processing phase into the dataset_preprocessed dictionary and store their validation
+        reports; the datasets preprocessed in parallel are already saved and only their reports are stored
+        :param reports: validation reports of the datasets saved by the workers, None for the sequential preprocessing
+        """
+        if reports is None:
+            for pair_key, pair in self.datasets.items():
+                for interval_key, interval in pair.items():
+                    self.save_preprocessed_dataset(interval, pair_key, interval_key, self.validation)
+        else:
+            self.validation.reports.update(reports)
+
+        self.validation.save_reports()
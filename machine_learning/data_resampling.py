@@ -0,0 +1,129 @@
+import os
+import numpy as np
+import pandas as pd
+from dateutil.tz import tzlocal
+
+from data_gaps import INTERVAL_DURATIONS
+
+PRICE_TOLERANCE = 1e-9
+VOLUME_TOLERANCE = 1e-6
+
+
+class Data_resampling:
+    def __init__(self, pairs=None, exchanges=None, directory="./dataset"):
+        self.pairs = pairs
+        self.exchanges = exchanges if exchanges is not None else ["Binance", "Bybit"]
+        self.directory = directory
+
+    @staticmethod
+    def resample(dataset=None, interval=None, complete_only=True):
+        """
+        Build candles of a coarser time interval from 1m candles by a vectorized aggregation of consecutive groups, the
+        open is the first open, the high the maximal high, the low the minimal low, the close the last close and the
+        volume the sum of volumes within the group
+        :param dataset: dataset of 1m candles
+        :param interval: requested time interval, e.g. 15m
+        :param complete_only: keep only the candles built from every 1m candle of their time interval
+        :return: dataset of candles for the requested time interval
+        """
+        duration = INTERVAL_DURATIONS[interval]
+        dataset = dataset.sort_values("dateTime").drop_duplicates(subset="dateTime")
+        timestamps = dataset["dateTime"].to_numpy(dtype=np.int64)
+        buckets = timestamps - timestamps % duration
+
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1))
+        ends = np.concatenate((starts[1:], [len(buckets)])) - 1
+
+        resampled = pd.DataFrame({"dateTime": buckets[starts],
+                                  "open": dataset["open"].to_numpy(dtype=np.float64)[starts],
+                                  "high": np.maximum.reduceat(dataset["high"].to_numpy(dtype=np.float64), starts),
+                                  "low": np.minimum.reduceat(dataset["low"].to_numpy(dtype=np.float64), starts),
+                                  "close": dataset["close"].to_numpy(dtype=np.float64)[ends],
+                                  "volume": np.add.reduceat(dataset["volume"].to_numpy(dtype=np.float64), starts)})
+        if complete_only:
+            resampled = resampled[ends - starts + 1 == duration // INTERVAL_DURATIONS["1m"]]
+
+        resampled.insert(0, "date", Data_resampling.timestamps_to_dates(resampled["dateTime"]))
+        return resampled.reset_index(drop=True)
+
+    @staticmethod
+    def timestamps_to_dates(timestamps=None):
+        """
+        Convert timestamps to local dates in one vectorized step
+        :param timestamps: timestamps in milliseconds
+        :return: local dates as datetime64 values
+        """
+        dates = pd.to_datetime(np.asarray(timestamps, dtype=np.int64), unit="ms", utc=True)
+        return dates.tz_convert(tzlocal()).tz_localize(None)
+
+    @staticmethod
+    def compare(resampled=None, reference=None):
+        """
+        Compare resampled candles with the candles obtained from the exchange for the timestamps present in both
+        :param resampled: dataset of resampled candles
+        :param reference: dataset of candles of the same time interval obtained from the exchange
+        :return: number of compared candles and number of candles that do not match
+        """
+        columns = ["dateTime", "open", "high", "low", "close", "volume"]
+        merged = resampled.loc[:, columns].merge(reference.loc[:, columns], on="dateTime",
+                                                 suffixes=("_resampled", "_reference"))
+
+        mismatch = np.zeros(merged.shape[0], dtype=bool)
+        for column in ["open", "high", "low", "close"]:
+            mismatch |= ~np.isclose(merged[column + "_resampled"], merged[column + "_reference"],
+                                    rtol=PRICE_TOLERANCE, atol=0)
+        mismatch |= ~np.isclose(merged["volume_resampled"], merged["volume_reference"], rtol=VOLUME_TOLERANCE, atol=0)
+        return merged.shape[0], int(mismatch.sum())
+
+    def sample_windows(self, reference=None, n_windows=5, window_size=200, seed=2):
+        """
+        Select random contiguous windows of candles obtained from the exchange for the validation of resampling
+        :param reference: dataset of candles obtained from the exchange
+        :param n_windows: number of windows
+        :param window_size: number of candles in one window
+        :param seed: seed of the random generator
+        :return: sampled candles
+        """
+        if reference.shape[0] <= window_size:
+            return reference
+
+        generator = np.random.default_rng(seed)
+        starts = generator.choice(reference.shape[0] - window_size, size=n_windows, replace=False)
+        rows = (starts[:, None] + np.arange(window_size)).ravel()
+        return reference.iloc[np.unique(rows)]
+
+    def resample_datasets(self, intervals=None):
+        """
+        Derive datasets of coarser time intervals from the gathered 1m datasets and save them; when a dataset obtained
+        from the exchange already exists, the resampled candles are validated against a sample of its windows first
+        and the dataset is replaced only if all of them match
+        :param intervals: time intervals to be derived
+        :return: validation results as (compared candles, mismatched candles) for each derived dataset
+        """
+        if intervals is None:
+            intervals = ["5m", "15m"]
+
+        results = {}
+        for exchange in self.exchanges:
+            for pair in self.pairs:
+                filename = os.path.join(self.directory, exchange + "_data_" + pair + "_1m.csv")
+                if not os.path.exists(filename):
+                    continue
+                one_minute_dataset = pd.read_csv(filename, index_col=0)
+
+                for interval in intervals:
+                    resampled = self.resample(one_minute_dataset, interval)
+                    filename = os.path.join(self.directory, exchange + "_data_" + pair + "_" + interval + ".csv")
+
+                    if os.path.exists(filename):
+                        reference = self.sample_windows(pd.read_csv(filename, index_col=0))
+                        compared, mismatched = self.compare(resampled, reference)
+                        results[(exchange, pair, interval)] = (compared, mismatched)
+                        print(f"{pair} for {interval} interval on {exchange} exchange: {mismatched} of {compared} "
+                              f"sampled candles differ from the exchange")
+                        if mismatched > 0:
+                            continue
+
+                    resampled.to_csv(filename, index=True)
+
+        return results
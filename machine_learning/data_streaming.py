@@ -0,0 +1,180 @@
+import os
+import numpy as np
+import pandas as pd
+
+from data_preprocessing import Data_preprocessing
+from load_dataset import Load_dataset
+
+CHUNK_SIZE = 100000
+SKETCH_SIZE = 200000
+PRICE_COLUMNS = ["open", "high", "low", "close"]
+
+
+def with_overlap(chunks=None, before=0, after=0):
+    """
+    Extend time-ordered chunks with the last rows of the preceding chunks and the first rows of the following ones,
+    which are required by the steps that look at neighbouring records
+    :param chunks: iterable of time-ordered chunks
+    :param before: number of preceding rows added to every chunk
+    :param after: number of following rows added to every chunk
+    :return: generator of (window, start, stop), where window.iloc[start:stop] are the rows of the original chunk
+    """
+    iterator = iter(chunks)
+    upcoming = []
+    tail = None
+    current = next(iterator, None)
+
+    while current is not None:
+        while sum(len(chunk) for chunk in upcoming) < after:
+            following = next(iterator, None)
+            if following is None:
+                break
+            upcoming.append(following)
+
+        if len(current) > 0:
+            head = pd.concat(upcoming).iloc[:after] if upcoming and after > 0 else None
+            window = pd.concat([part for part in (tail, current, head) if part is not None], ignore_index=True)
+            start = 0 if tail is None else len(tail)
+            yield window, start, start + len(current)
+
+            if before > 0:
+                tail = pd.concat([part for part in (tail, current) if part is not None]).iloc[-before:]
+
+        current = upcoming.pop(0) if upcoming else next(iterator, None)
+
+
+class Quantile_sketch:
+    def __init__(self, size=SKETCH_SIZE, seed=2, sample=None, count=0):
+        self.size = size
+        self.generator = np.random.default_rng(seed)
+        self.sample = np.empty(0) if sample is None else np.asarray(sample, dtype=np.float64)
+        self.count = count
+
+    def update(self, values=None):
+        """
+        Add values to the bounded uniform sample of all values seen so far; the sample is exact as long as fewer than
+        size values have been seen
+        :param values: new values
+        """
+        values = np.asarray(values, dtype=np.float64)
+        free = max(self.size - self.sample.size, 0)
+        self.sample = np.concatenate((self.sample, values[:free]))
+        self.count += min(free, values.size)
+
+        values = values[free:]
+        if values.size > 0:
+            positions = self.generator.integers(0, self.count + np.arange(1, values.size + 1))
+            replaced = positions < self.size
+            self.sample[positions[replaced]] = values[replaced]
+            self.count += values.size
+
+    def quantile(self, q=None):
+        """
+        :param q: requested quantile
+        :return: estimate of the quantile of all values seen so far
+        """
+        return np.quantile(self.sample, q)
+
+
+class Data_streaming:
+    def __init__(self, pairs, intervals=None, chunk_size=CHUNK_SIZE):
+        self.pairs = pairs
+        self.chunk_size = chunk_size
+        self.load_dataset = Load_dataset(self.pairs, intervals)
+        self.handles = self.load_dataset.open_datasets()
+
+        for pair_key, pair in self.handles.items():
+            for interval_key, interval in pair.items():
+                if interval["Binance"] is None or interval["Bybit"] is None:
+                    continue
+                print(f"Preprocessing {pair_key} for {interval_key} in chunks of {self.chunk_size} records")
+                self.preprocess(pair_key, interval_key, interval["Binance"], interval["Bybit"])
+
+    @staticmethod
+    def clean_chunk(chunk=None):
+        """
+        Convert all columns except the date to numbers and drop records with null values, as the mean of the whole
+        dataset is not available while streaming
+        :param chunk: chunk of the dataset
+        :return: cleaned chunk
+        """
+        for column in chunk.columns:
+            if column != "date":
+                chunk[column] = pd.to_numeric(chunk[column], errors="coerce")
+        return chunk.dropna(how="any", axis=0)
+
+    def aligned_chunks(self, Binance_handle=None, Bybit_handle=None):
+        """
+        Stream both datasets at once and join their chunks on timestamps, holding only the Bybit records that have not
+        been matched yet
+        :param Binance_handle: lazy handle of the Binance dataset
+        :param Bybit_handle: lazy handle of the Bybit dataset
+        :return: generator of joined chunks
+        """
+        Bybit_stream = Bybit_handle.stream(self.chunk_size)
+        Bybit_buffer = None
+        for Binance_chunk in Binance_handle.stream(self.chunk_size):
+            Binance_chunk = self.clean_chunk(Binance_chunk)
+            if Binance_chunk.empty:
+                continue
+
+            last = Binance_chunk["dateTime"].max()
+            while Bybit_buffer is None or Bybit_buffer.empty or Bybit_buffer["dateTime"].max() < last:
+                Bybit_chunk = next(Bybit_stream, None)
+                if Bybit_chunk is None:
+                    break
+                Bybit_buffer = pd.concat([Bybit_buffer, self.clean_chunk(Bybit_chunk)], ignore_index=True)
+            if Bybit_buffer is None:
+                return
+
+            yield Data_preprocessing.join_exchanges(Binance_chunk, Bybit_buffer)
+            Bybit_buffer = Bybit_buffer[Bybit_buffer["dateTime"] > last]
+
+    def outlier_bounds(self, Binance_handle=None, Bybit_handle=None):
+        """
+        Estimate the 0,1% and 99,9% quantiles of the differences between prices on both exchanges in the first pass
+        over the datasets
+        :param Binance_handle: lazy handle of the Binance dataset
+        :param Bybit_handle: lazy handle of the Bybit dataset
+        :return: dictionary of the lower and upper bound for each price column
+        """
+        sketches = {column: Quantile_sketch() for column in PRICE_COLUMNS}
+        for chunk in self.aligned_chunks(Binance_handle, Bybit_handle):
+            for column, sketch in sketches.items():
+                sketch.update(chunk[column + "_Binance"] - chunk[column + "_Bybit"])
+
+        return {column: (sketch.quantile(0.001), sketch.quantile(0.999)) for column, sketch in sketches.items()}
+
+    def filtered_chunks(self, Binance_handle=None, Bybit_handle=None, bounds=None):
+        """
+        Drop the extreme outliers from the joined chunks according to the estimated bounds
+        :param Binance_handle: lazy handle of the Binance dataset
+        :param Bybit_handle: lazy handle of the Bybit dataset
+        :param bounds: lower and upper bound for each price column
+        :return: generator of chunks without outliers
+        """
+        for chunk in self.aligned_chunks(Binance_handle, Bybit_handle):
+            outliers = np.zeros(chunk.shape[0], dtype=bool)
+            for column, (low_quantile, high_quantile) in bounds.items():
+                difference = chunk[column + "_Binance"] - chunk[column + "_Bybit"]
+                outliers |= ((difference < low_quantile) | (difference > high_quantile)).to_numpy()
+            yield chunk[~outliers]
+
+    def preprocess(self, pair=None, interval=None, Binance_handle=None, Bybit_handle=None):
+        """
+        Preprocess the datasets of one pair and time interval in bounded memory; every chunk is extended by the last
+        record of the preceding chunk for the arbitrage and the first record of the following chunk for the change
+        :param pair: cryptocurrency pair of the datasets
+        :param interval: time interval of the datasets
+        :param Binance_handle: lazy handle of the Binance dataset
+        :param Bybit_handle: lazy handle of the Bybit dataset
+        """
+        bounds = self.outlier_bounds(Binance_handle, Bybit_handle)
+        filename = "./dataset_preprocessed/" + pair + "_" + interval + ".csv"
+        if os.path.exists(filename):
+            os.remove(filename)
+
+        for window, start, stop in with_overlap(self.filtered_chunks(Binance_handle, Bybit_handle, bounds), 1, 1):
+            window = Data_preprocessing.add_change(window)
+            window = Data_preprocessing.identify_arbitrage(window, pair)
+            window.iloc[start:stop].to_csv(filename, mode="a", header=not os.path.exists(filename), index=False)
@@ -0,0 +1,140 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+
+VALIDATION_FILE = "./dataset_index/validation.json"
+PRICE_COLUMNS = ["open", "high", "low", "close"]
+STATISTICS = ["count", "mean", "std", "min", "25%", "50%", "75%", "max"]
+
+
+class Data_validation:
+    def __init__(self, validation_file=VALIDATION_FILE):
+        self.validation_file = validation_file
+        self.reports = {}
+        self.load_reports()
+
+    def load_reports(self):
+        """
+        Load the stored validation reports, if they have been created before
+        """
+        if not os.path.exists(self.validation_file):
+            return
+
+        with open(self.validation_file, "r") as file:
+            self.reports = json.load(file)
+
+    def save_reports(self):
+        """
+        Save the validation reports of all validated datasets into a JSON file
+        """
+        os.makedirs(os.path.dirname(self.validation_file), exist_ok=True)
+        with open(self.validation_file, "w") as file:
+            json.dump(self.reports, file)
+
+    @staticmethod
+    def to_numeric(dataset=None):
+        """
+        Convert the columns read as text, except the date, to numbers; values that cannot be converted become null
+        :param dataset: dataset to be converted
+        :return: converted dataset
+        """
+        for column in dataset.columns:
+            if column != "date" and dataset[column].dtype == object:
+                dataset[column] = pd.to_numeric(dataset[column], errors="coerce")
+        return dataset
+
+    @staticmethod
+    def validate(dataset=None, key="dateTime"):
+        """
+        Compute the null counts and descriptive statistics of all numeric columns at once, check that the timestamps
+        are increasing and unique, and that the prices are positive and consistent with the high and low prices
+        :param dataset: dataset to be validated, text columns are converted to numbers in place
+        :param key: column of timestamps
+        :return: validation report
+        """
+        dataset = Data_validation.to_numeric(dataset)
+        columns = [column for column in dataset.columns if column != "date"]
+        values = dataset[columns].to_numpy(dtype=np.float64)
+
+        nulls = np.isnan(values).sum(axis=0)
+        statistics = np.full((len(STATISTICS), len(columns)), np.nan)
+        statistics[0] = values.shape[0] - nulls
+        if values.shape[0] > 0:
+            statistics[1] = np.nanmean(values, axis=0)
+            statistics[2] = np.nanstd(values, axis=0, ddof=1)
+            statistics[3] = np.nanmin(values, axis=0)
+            statistics[4:7] = np.nanpercentile(values, [25, 50, 75], axis=0)
+            statistics[7] = np.nanmax(values, axis=0)
+
+        report = {"n_records": int(values.shape[0]),
+                  "columns": {column: dict({"nulls": int(nulls[index])},
+                                           **{name: None if np.isnan(value) else float(value)
+                                              for name, value in zip(STATISTICS, statistics[:, index])})
+                              for index, column in enumerate(columns)}}
+
+        if key in dataset.columns:
+            timestamps = dataset[key].to_numpy(dtype=np.float64)
+            report["non_increasing"] = int((np.diff(timestamps) <= 0).sum())
+            report["monotonic"] = report["non_increasing"] == 0
+            report["duplicate_keys"] = int(dataset[key].duplicated().sum())
+
+        report["price_violations"] = {}
+        for suffix in ["", "_Binance", "_Bybit"]:
+            if not all(column + suffix in dataset.columns for column in PRICE_COLUMNS):
+                continue
+            open_prices, high, low, close = (dataset[column + suffix].to_numpy(dtype=np.float64)
+                                             for column in PRICE_COLUMNS)
+            with np.errstate(invalid="ignore"):
+                violations = (np.minimum.reduce([open_prices, high, low, close]) <= 0) | \
+                             (high < np.maximum(open_prices, close)) | (low > np.minimum(open_prices, close))
+            report["price_violations"][suffix.strip("_") or "prices"] = int(violations.sum())
+
+        return report
+
+    def get_report(self, path=None, dataset=None):
+        """
+        Return the stored report of the dataset if its file has not changed since the validation, otherwise validate
+        the dataset and store the new report
+        :param path: path to the file of the dataset
+        :param dataset: loaded dataset, text columns are converted to numbers in place
+        :return: validation report
+        """
+        size, modified = os.path.getsize(path), os.path.getmtime(path)
+        report = self.reports.get(path)
+        if report is not None and report["size"] == size and report["modified"] == modified:
+            Data_validation.to_numeric(dataset)
+            return report
+
+        report = dict(self.validate(dataset), size=size, modified=modified)
+        self.reports[path] = report
+        return report
+
+    @staticmethod
+    def describe(report=None, columns=None):
+        """
+        :param report: validation report
+        :param columns: columns to be described, all of them if None
+        :return: descriptive statistics in the layout of pandas describe
+        """
+        columns = columns if columns is not None else list(report["columns"])
+        return pd.DataFrame({column: [report["columns"][column][name] for name in STATISTICS] for column in columns},
+                            index=STATISTICS)
+
+    @staticmethod
+    def print_report(report=None, name=None):
+        """
+        Print the problems found in the dataset
+        :param report: validation report
+        :param name: name of the dataset
+        """
+        nulls = {column: statistics["nulls"] for column, statistics in report["columns"].items() if statistics["nulls"]}
+        if nulls:
+            print(f"NULL DATA FOUND\n{name} contains NULL values {nulls}")
+        if report.get("non_increasing"):
+            print(f"UNORDERED DATA FOUND\n{name} contains {report['non_increasing']} non-increasing timestamps")
+        if report.get("duplicate_keys"):
+            print(f"DUPLICATE DATA FOUND\n{name} contains {report['duplicate_keys']} duplicate timestamps")
+        for prices, violations in report["price_violations"].items():
+            if violations:
+                print(f"INVALID PRICES FOUND\n{name} contains {violations} records with inconsistent {prices}")
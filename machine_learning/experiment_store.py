@@ -0,0 +1,67 @@
+import hashlib
+import json
+import os
+import pickle
+import numpy as np
+
+EXPERIMENT_DIRECTORY = "../experiments"
+RESULT_FILE = "result.json"
+PREDICTION_FILE = "prediction.npy"
+MODEL_FILE = "model.pkl"
+
+
+class Experiment_store:
+    def __init__(self, directory=EXPERIMENT_DIRECTORY):
+        self.directory = directory
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def get_key(fingerprint=None, config=None, spec=None, parameters=None, seed=None):
+        """
+        :param fingerprint: fingerprint of the dataset
+        :param config: configuration of the preprocessing applied before the training
+        :param spec: key of the model specification in MODEL_SPECS
+        :param parameters: all hyperparameters of the model
+        :param seed: random seed of the model
+        :return: key of the experiment
+        """
+        description = json.dumps({"fingerprint": fingerprint, "config": config, "spec": spec,
+                                  "parameters": parameters, "seed": seed}, sort_keys=True,
+                                 default=lambda value: getattr(value, "__name__", repr(value)))
+        return hashlib.sha1(description.encode()).hexdigest()[:20]
+
+    def save(self, key=None, result=None, prediction=None, model=None):
+        """
+        Save the metrics, predictions and fitted model of the experiment, the result file is written last under
+        a temporary name, so an interrupted experiment is never taken as finished
+        :param key: key of the experiment
+        :param result: dictionary of the description and metrics of the experiment
+        :param prediction: predictions on the testing dataset
+        :param model: fitted pipeline
+        """
+        directory = os.path.join(self.directory, key)
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, PREDICTION_FILE), prediction, allow_pickle=False)
+        with open(os.path.join(directory, MODEL_FILE), "wb") as file:
+            pickle.dump(model, file)
+
+        path = os.path.join(directory, RESULT_FILE)
+        with open(path + ".tmp", "w") as file:
+            json.dump(result, file)
+        os.replace(path + ".tmp", path)
+
+    def load(self, key=None):
+        """
+        :param key: key of the experiment
+        :return: result of the experiment with its predictions and fitted model, None if it has not been performed
+        """
+        directory = os.path.join(self.directory, key)
+        if not os.path.exists(os.path.join(directory, RESULT_FILE)):
+            return None
+
+        with open(os.path.join(directory, RESULT_FILE), "r") as file:
+            result = json.load(file)
+        with open(os.path.join(directory, MODEL_FILE), "rb") as file:
+            result["model"] = pickle.load(file)
+        result["prediction"] = np.load(os.path.join(directory, PREDICTION_FILE), mmap_mode="r")
+        return result
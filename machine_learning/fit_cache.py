@@ -0,0 +1,178 @@
+import hashlib
+import json
+import os
+import pickle
+import time
+import numpy as np
+from sklearn.base import clone
+
+FIT_CACHE_DIRECTORY = "./dataset_index/fit_cache"
+MAX_CACHE_SIZE = 5 * 1024 ** 3
+MAX_CACHE_AGE = 30 * 24 * 60 * 60
+
+
+class Fit_cache:
+    def __init__(self, directory=FIT_CACHE_DIRECTORY, max_size=MAX_CACHE_SIZE, max_age=MAX_CACHE_AGE):
+        self.directory = directory
+        self.max_size = max_size
+        self.max_age = max_age
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def fingerprint(*arrays):
+        """
+        :param arrays: arrays the fitted stage depends on
+        :return: hash of the types, shapes and contents of the arrays
+        """
+        digest = hashlib.sha1()
+        for array in arrays:
+            array = np.ascontiguousarray(array)
+            digest.update(f"{array.dtype.str}{array.shape}".encode())
+            digest.update(array.data)
+        return digest.hexdigest()
+
+    @staticmethod
+    def get_key(fingerprint=None, stage=None):
+        """
+        :param fingerprint: fingerprint of the data the stage is fitted on
+        :param stage: unfitted stage
+        :return: key of the fitted stage given by the data, the type of the stage and its parameters
+        """
+        parameters = json.dumps(stage.get_params(), sort_keys=True,
+                                default=lambda value: getattr(value, "__name__", repr(value)))
+        return hashlib.sha1(f"{fingerprint}{type(stage).__name__}{parameters}".encode()).hexdigest()[:20]
+
+    def save(self, path=None, save_file=None):
+        """
+        Write the cached file under a temporary name first, so that concurrent readers never see a partial file
+        :param path: path to the cached file
+        :param save_file: function writing the content into an open binary file
+        """
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as file:
+            save_file(file)
+        os.replace(temporary, path)
+
+    def evict(self, max_size=None, max_age=None):
+        """
+        Remove the least recently used fitted stages and arrays until the cache fits into max_size bytes, together
+        with all of them unused for longer than max_age seconds; a removed entry is simply fitted again when needed
+        :param max_size: maximal size of the cache in bytes, the size of the cache if None
+        :param max_age: maximal age of the cached files in seconds, the age of the cache if None
+        :return: number of removed files
+        """
+        max_size = max_size if max_size is not None else self.max_size
+        max_age = max_age if max_age is not None else self.max_age
+        files = []
+        for name in os.listdir(self.directory):
+            if name.endswith((".pkl", ".npy")):
+                try:
+                    status = os.stat(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    continue
+                files.append((status.st_mtime, status.st_size, os.path.join(self.directory, name)))
+
+        files.sort()
+        now, total, removed = time.time(), sum(size for _, size, _ in files), 0
+        for modified, size, path in files:
+            if total <= max_size and now - modified <= max_age:
+                break
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+        return removed
+
+    def clear(self):
+        """
+        Remove every cached file, including the scores of the hyperparameter search
+        :return: number of removed files
+        """
+        removed = 0
+        for name in os.listdir(self.directory):
+            if os.path.isfile(os.path.join(self.directory, name)):
+                os.remove(os.path.join(self.directory, name))
+                removed += 1
+        return removed
+
+    @staticmethod
+    def touch(*paths):
+        """
+        Mark the cached files as recently used, so that the eviction keeps them
+        :param paths: paths to the cached files
+        """
+        for path in paths:
+            os.utime(path)
+
+    def fit_transform(self, stage=None, x=None, y=None, fingerprint=None):
+        """
+        Fit the stage and transform the data, unless the same stage has already been fitted on the same data
+        :param stage: unfitted stage
+        :param x: data the stage is fitted on
+        :param y: target variable
+        :param fingerprint: fingerprint of x and y
+        :return: fitted stage, transformed data and the key of the stage, which is the fingerprint of the transformed
+        data for the following stage
+        """
+        key = self.get_key(fingerprint, stage)
+        stage_path = os.path.join(self.directory, key + ".pkl")
+        output_path = os.path.join(self.directory, key + ".npy")
+
+        if os.path.exists(stage_path) and os.path.exists(output_path):
+            try:
+                self.touch(stage_path, output_path)
+                with open(stage_path, "rb") as file:
+                    return pickle.load(file), np.load(output_path, mmap_mode="r"), key
+            except FileNotFoundError:
+                # evicted by another process in the meantime
+                pass
+
+        stage = clone(stage).fit(x, y)
+        output = stage.transform(x)
+        self.save(output_path, lambda file: np.save(file, output, allow_pickle=False))
+        self.save(stage_path, lambda file: pickle.dump(stage, file))
+        self.evict()
+        return stage, output, key
+
+    def fit_stages(self, stages=None, x=None, y=None):
+        """
+        Fit a chain of stages, every stage is fitted on the output of the previous one exactly as in a pipeline
+        :param stages: list of (name, unfitted stage) pairs
+        :param x: data the first stage is fitted on
+        :param y: target variable
+        :return: list of (name, fitted stage) pairs and the output of the last stage
+        """
+        fingerprint = self.fingerprint(x, y)
+        fitted = []
+        for name, stage in stages:
+            stage, x, fingerprint = self.fit_transform(stage, x, y, fingerprint)
+            fitted.append((name, stage))
+        return fitted, x
+
+    def resample(self, sampler=None, x=None, y=None):
+        """
+        Resample the data, unless the same sampler with the same parameters has already resampled the same data
+        :param sampler: unfitted sampler of imbalanced-learn
+        :param x: data to be resampled
+        :param y: target variable
+        :return: resampled data and target variable
+        """
+        key = self.get_key(self.fingerprint(x, y), sampler)
+        x_path = os.path.join(self.directory, key + "_x.npy")
+        y_path = os.path.join(self.directory, key + "_y.npy")
+
+        if os.path.exists(x_path) and os.path.exists(y_path):
+            try:
+                self.touch(x_path, y_path)
+                return np.load(x_path, mmap_mode="r"), np.load(y_path, mmap_mode="r")
+            except FileNotFoundError:
+                # evicted by another process in the meantime
+                pass
+
+        x, y = clone(sampler).fit_resample(x, y)
+        self.save(y_path, lambda file: np.save(file, y, allow_pickle=False))
+        self.save(x_path, lambda file: np.save(file, x, allow_pickle=False))
+        self.evict()
+        return x, y
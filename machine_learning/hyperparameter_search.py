@@ -0,0 +1,224 @@
+import hashlib
+import inspect
+import json
+import math
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from sklearn.feature_selection import SelectKBest
+from sklearn.metrics import f1_score
+from sklearn.model_selection import ParameterGrid, train_test_split
+from sklearn.preprocessing import StandardScaler
+from sklearn.utils.class_weight import compute_sample_weight
+from imblearn.over_sampling import SMOTE
+
+from feature_library import Feature_library
+from fit_cache import Fit_cache, FIT_CACHE_DIRECTORY
+from load_dataset import Load_dataset
+from model_specs import MODEL_SPECS, SEARCH_SPACES, IMBALANCE_STRATEGIES, TEST_SIZE, SPLIT_SEED
+from shared_arrays import Shared_arrays
+
+SEARCH_RESULTS_FILE = "../best_models/hyperparameters.json"
+SEARCH_CACHE_FILE = os.path.join(FIT_CACHE_DIRECTORY, "search_cache.json")
+HALVING_FACTOR = 3
+MIN_RESOURCES = 2000
+VALIDATION_SIZE = 0.2
+SMOTE_NEIGHBOURS = 5
+
+
+class Hyperparameter_search:
+    def __init__(self, pairs, specs=None, budget=30, workers=None, factor=HALVING_FACTOR, min_resources=MIN_RESOURCES,
+                 seed=2, features=None, imbalance="smote"):
+        if imbalance not in IMBALANCE_STRATEGIES:
+            raise ValueError(f"Unknown imbalance strategy {imbalance}, choose from {list(IMBALANCE_STRATEGIES)}.")
+        self.pairs = pairs
+        self.features = features
+        self.imbalance = imbalance
+        self.specs = specs if specs is not None else list(MODEL_SPECS)
+        self.budget = budget
+        self.workers = workers if workers is not None else os.cpu_count() or 1
+        self.factor = factor
+        self.min_resources = min_resources
+        self.generator = np.random.default_rng(seed)
+        self.load_dataset = Load_dataset(pairs)
+        self.datasets = self.load_dataset.load_preprocessed_datasets_for_training()
+        if features is not None:
+            self.extend_datasets(Feature_library(features))
+        self.cache = self.load_json(SEARCH_CACHE_FILE)
+        self.results = self.load_json(SEARCH_RESULTS_FILE)
+
+        self.search_all()
+
+    @staticmethod
+    def load_json(filename=None):
+        """
+        :param filename: path to the JSON file
+        :return: content of the file, an empty dictionary if it does not exist
+        """
+        if not os.path.exists(filename):
+            return {}
+
+        with open(filename, "r") as file:
+            return json.load(file)
+
+    @staticmethod
+    def save_json(filename=None, content=None):
+        """
+        :param filename: path to the JSON file
+        :param content: content to be saved
+        """
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        with open(filename, "w") as file:
+            json.dump(content, file)
+
+    def extend_datasets(self, feature_library=None):
+        """
+        Extend the loaded datasets with the rolling-window features of the library, as the training of the models does
+        :param feature_library: feature library with the selected configuration
+        """
+        for pair_key, pair in self.datasets.items():
+            for interval_key, interval in pair.items():
+                if interval is not None:
+                    pair[interval_key] = feature_library.extend(interval, pair_key, interval_key)
+
+    def count_fits(self, n_candidates=None):
+        """
+        :param n_candidates: number of candidates in the first round
+        :return: number of trained models of the successive halving
+        """
+        n_fits = n_candidates
+        while n_candidates > 1:
+            n_candidates = math.ceil(n_candidates / self.factor)
+            n_fits += n_candidates
+        return n_fits
+
+    def get_n_candidates(self, spec=None):
+        """
+        :param spec: key of the model specification in MODEL_SPECS
+        :return: largest number of candidates whose successive halving fits into the budget of trained models
+        """
+        n_candidates = 1
+        while n_candidates < len(ParameterGrid(SEARCH_SPACES[spec])) and self.count_fits(n_candidates + 1) <= \
+                self.budget:
+            n_candidates += 1
+        return n_candidates
+
+    @staticmethod
+    def evaluate(spec=None, parameters=None, n_resources=None, paths=None, train_end=None, imbalance="smote"):
+        """
+        Train the model with the candidate hyperparameters on the most recent n_resources training records and compute
+        its F1 score on the following validation records; the imbalance is handled by the same strategy as in the
+        training of the models
+        :param spec: key of the model specification in MODEL_SPECS
+        :param parameters: candidate hyperparameters
+        :param n_resources: number of training records
+        :param paths: paths to the shared dataset and arbitrages
+        :param train_end: position of the end of the training part
+        :param imbalance: imbalance strategy, a key of IMBALANCE_STRATEGIES
+        :return: F1 score on the validation part
+        """
+        dataset, arbitrages = Shared_arrays.load_array(paths[0]), Shared_arrays.load_array(paths[1])
+        train_dataset, train_arbitrage = dataset[train_end - n_resources:train_end], \
+            arbitrages[train_end - n_resources:train_end]
+
+        minority = np.bincount(train_arbitrage, minlength=2).min()
+        if minority == 0:
+            return 0.0
+        scaler = StandardScaler().fit(train_dataset)
+        train_dataset = scaler.transform(train_dataset)
+        if imbalance == "smote" and minority > SMOTE_NEIGHBOURS:
+            train_dataset, train_arbitrage = SMOTE(random_state=2, k_neighbors=SMOTE_NEIGHBOURS).fit_resample(
+                train_dataset, train_arbitrage)
+        elif imbalance == "undersample":
+            train_dataset, train_arbitrage = IMBALANCE_STRATEGIES[imbalance].fit_resample(train_dataset,
+                                                                                         train_arbitrage)
+
+        selector = SelectKBest().fit(train_dataset, train_arbitrage)
+        model = MODEL_SPECS[spec]["model"](**dict(MODEL_SPECS[spec]["parameters"], **parameters))
+        fit_parameters = {}
+        if imbalance == "class_weight" and "class_weight" in model.get_params():
+            model.set_params(class_weight="balanced")
+        elif imbalance == "class_weight" and "sample_weight" in inspect.signature(model.fit).parameters:
+            fit_parameters["sample_weight"] = compute_sample_weight("balanced", train_arbitrage)
+        model.fit(selector.transform(train_dataset), train_arbitrage, **fit_parameters)
+        prediction = model.predict(selector.transform(scaler.transform(dataset[train_end:])))
+        return float(f1_score(arbitrages[train_end:], prediction, zero_division=0))
+
+    def successive_halving(self, executor=None, spec=None, paths=None, n_records=None, fingerprint=None):
+        """
+        Evaluate random candidates on a small number of training records and promote the best third of them to a three
+        times larger number of records until one candidate remains or all training records are used; scores already
+        evaluated on the same data are taken from the cache
+        :param executor: pool of processes
+        :param spec: key of the model specification in MODEL_SPECS
+        :param paths: paths to the shared dataset and arbitrages
+        :param n_records: number of records of the dataset
+        :param fingerprint: fingerprint of the dataset
+        :return: best hyperparameters and their F1 score
+        """
+        grid = list(ParameterGrid(SEARCH_SPACES[spec]))
+        candidates = [grid[index] for index in self.generator.permutation(len(grid))[:self.get_n_candidates(spec)]]
+        train_end = int(n_records * (1 - VALIDATION_SIZE))
+        n_resources = min(self.min_resources, train_end)
+
+        while True:
+            keys = [hashlib.sha1(f"{fingerprint}{spec}{json.dumps(candidate, sort_keys=True)}{n_resources}"
+                                 f"{self.imbalance}".encode()).hexdigest() for candidate in candidates]
+            futures = {key: executor.submit(self.evaluate, spec, candidate, n_resources, paths, train_end,
+                                            self.imbalance)
+                       for key, candidate in zip(keys, candidates) if key not in self.cache}
+            for key, future in futures.items():
+                self.cache[key] = future.result()
+
+            scores = [self.cache[key] for key in keys]
+            print(f"{MODEL_SPECS[spec]['name']}: {len(candidates)} candidates on {n_resources} records, best F1 "
+                  f"{max(scores)}")
+            if len(candidates) == 1 or n_resources == train_end:
+                best = int(np.argmax(scores))
+                return candidates[best], scores[best]
+
+            order = np.argsort(-np.array(scores), kind="stable")
+            candidates = [candidates[index] for index in order[:math.ceil(len(candidates) / self.factor)]]
+            n_resources = min(n_resources * self.factor, train_end)
+
+    @staticmethod
+    def get_train_positions(n_records=None):
+        """
+        Positions of the training records of the split used by the training of the models, the testing records are
+        never seen by the search
+        :param n_records: number of records of the dataset
+        :return: time-ordered positions of the training records
+        """
+        return np.sort(train_test_split(np.arange(n_records), test_size=TEST_SIZE, random_state=SPLIT_SEED)[0])
+
+    def search_all(self):
+        """
+        Search the hyperparameters of every model specification on the training part of every dataset and save the
+        best ones with the features and the imbalance strategy they were searched with, the training of the models
+        uses them only with the same ones; the latest training records are the validation part
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                for pair_key, pair in self.datasets.items():
+                    for interval_key, interval in pair.items():
+                        if interval is None:
+                            continue
+                        name = pair_key + "_" + interval_key
+                        positions = self.get_train_positions(len(interval))
+                        dataset, arbitrages = interval.matrix()[positions], interval.target[positions]
+                        paths = [Shared_arrays.share_array(dataset, directory, name),
+                                 Shared_arrays.share_array(arbitrages, directory, name + "_arbitrage")]
+                        fingerprint = Fit_cache.fingerprint(dataset, arbitrages)
+
+                        for spec in self.specs:
+                            print(f"\nHyperparameter search of {MODEL_SPECS[spec]['name']} for {pair_key} for "
+                                  f"{interval_key} interval")
+                            parameters, score = self.successive_halving(executor, spec, paths, positions.size,
+                                                                        fingerprint)
+                            self.results[f"{spec}_{name}"] = {"parameters": parameters, "f1": score,
+                                                              "features": self.features,
+                                                              "imbalance": self.imbalance}
+                            self.save_json(SEARCH_CACHE_FILE, self.cache)
+                            self.save_json(SEARCH_RESULTS_FILE, self.results)
@@ -1,15 +1,26 @@
 from building_models import Building_models
 from data_description import Data_description
 from data_gathering import Data_gathering
+from data_incremental import Data_incremental
 from data_preprocessing import Data_preprocessing
+from data_streaming import Data_streaming
 from data_visualization import Data_visualization
+from hyperparameter_search import Hyperparameter_search
 from hypothesis_testing import Hypothesis_testing
+from walk_forward import Walk_forward
 from exchange_connection import Exchange_connection
 
 
 class Machine_learning:
-    def __init__(self, cryptocurrency_pairs):
+    def __init__(self, cryptocurrency_pairs, incremental=False, streaming=False, features=None, imbalance="smote",
+                 backfill=False, derive_intervals=False):
         self.cryptocurrency_pairs = cryptocurrency_pairs
+        self.incremental = incremental
+        self.streaming = streaming
+        self.features = features
+        self.imbalance = imbalance
+        self.backfill = backfill
+        self.derive_intervals = derive_intervals
         self.exchange_connection = Exchange_connection()
 
         self.Binance_client = self.exchange_connection.Binance_client
@@ -21,13 +32,26 @@ class Machine_learning:
 
     def machine_learning_process(self):
         """
-        Execute all steps of the Machine Learnig process
+        Execute all steps of the Machine Learnig process; the gathering only downloads the candles missing in the
+        gathered datasets if backfill is set and derives the 5m and 15m datasets from the 1m ones if derive_intervals
+        is set, the preprocessing appends only the newly gathered records to the preprocessed datasets if incremental
+        is set, or reads the gathered datasets in chunks in bounded memory if streaming is set, which removes the
+        outliers by the quantiles and drops the records with null values instead of filling them; the hyperparameters
+        are searched with the same features and imbalance strategy as the models are built with
         """
-        Data_gathering(self.Binance_client, self.Bybit_client, self.cryptocurrency_pairs)
-        Data_preprocessing(self.cryptocurrency_pairs)
+        Data_gathering(self.Binance_client, self.Bybit_client, self.cryptocurrency_pairs, self.backfill,
+                       self.derive_intervals)
+        if self.incremental:
+            Data_incremental(self.cryptocurrency_pairs)
+        elif self.streaming:
+            Data_streaming(self.cryptocurrency_pairs)
+        else:
+            Data_preprocessing(self.cryptocurrency_pairs)
         Data_description(self.cryptocurrency_pairs)
         Data_visualization(self.cryptocurrency_pairs)
-        Building_models(self.cryptocurrency_pairs)
+        Hyperparameter_search(self.cryptocurrency_pairs, features=self.features, imbalance=self.imbalance)
+        Building_models(self.cryptocurrency_pairs, self.features, imbalance=self.imbalance)
+        Walk_forward(self.cryptocurrency_pairs)
         hypothesis_testing = Hypothesis_testing("file")
         hypothesis_testing.perform_tests()
 
@@ -0,0 +1,31 @@
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn import svm
+from sklearn.neural_network import MLPClassifier
+from imblearn.over_sampling import SMOTE
+from imblearn.under_sampling import RandomUnderSampler
+
+# shared by the training and the hyperparameter search, which tunes only on the training part of the same split
+TEST_SIZE = 0.2
+SPLIT_SEED = 2
+IMBALANCE_STRATEGIES = {"smote": SMOTE(random_state=2), "undersample": RandomUnderSampler(random_state=2),
+                        "class_weight": None, "none": None}
+
+MODEL_SPECS = {"logistic_regression": {"name": "Logistic Regression", "model": LogisticRegression,
+                                       "parameters": {"penalty": "l2", "solver": "lbfgs", "C": 10, "max_iter": 500}},
+               "random_forest": {"name": "Random Forest", "model": RandomForestClassifier,
+                                 "parameters": {"n_estimators": 150, "criterion": "gini", "min_samples_split": 10,
+                                                "max_features": "sqrt", "bootstrap": True}},
+               "support_vector_machine": {"name": "Support vector machine", "model": svm.LinearSVC,
+                                          "parameters": {"C": 10, "penalty": "l2", "max_iter": 1500}},
+               "multilayer_perceptron": {"name": "Multilayer perceptron", "model": MLPClassifier,
+                                         "parameters": {"activation": "relu", "solver": "sgd",
+                                                        "learning_rate_init": 0.01, "max_iter": 100,
+                                                        "hidden_layer_sizes": (5, 5)}}}
+
+SEARCH_SPACES = {"logistic_regression": {"C": [0.01, 0.1, 1, 10, 100]},
+                 "random_forest": {"n_estimators": [50, 150, 300], "min_samples_split": [2, 10, 50],
+                                   "max_features": ["sqrt", "log2"], "max_depth": [None, 10, 20]},
+                 "support_vector_machine": {"C": [0.01, 0.1, 1, 10, 100]},
+                 "multilayer_perceptron": {"hidden_layer_sizes": [[5, 5], [10, 10], [20], [20, 10]],
+                                           "learning_rate_init": [0.001, 0.01, 0.1], "alpha": [0.0001, 0.001]}}
@@ -0,0 +1,151 @@
+from collections import deque
+import numpy as np
+import pandas as pd
+
+from data_preprocessing import Data_preprocessing
+from feature_library import Feature_library
+from feature_pipeline import Feature_pipeline, FEATURE_COLUMNS, FEATURE_DTYPE
+from model_registry import Model_registry
+
+BUFFER_SIZE = 20000
+REFIT_EVERY = 1440
+REPLAY_BATCH = 32
+EXPORT_EVERY = 1440
+
+
+class Online_learning:
+    def __init__(self, pair, model, buffer_size=BUFFER_SIZE, refit_every=REFIT_EVERY, replay_batch=REPLAY_BATCH,
+                 export_every=EXPORT_EVERY, manifest=None, tag=None, seed=2):
+        self.pair = pair
+        self.model = model
+        self.refit_every = refit_every
+        self.replay_batch = replay_batch
+        self.export_every = export_every
+        self.manifest = manifest
+        self.tag = tag
+        self.version = None if manifest is None else manifest["version"]
+        self.model_registry = Model_registry()
+        self.generator = np.random.default_rng(seed)
+        feature_config = None if manifest is None else manifest.get("feature_config")
+        self.feature_pipeline = Feature_pipeline(None if feature_config is None else Feature_library(feature_config))
+        self.buffer = deque(maxlen=buffer_size)
+        self.previous_record = None
+        self.n_updates = 0
+
+        estimator = self.model.named_steps["model"]
+        self.incremental = hasattr(estimator, "partial_fit")
+        if not self.incremental and "warm_start" in estimator.get_params() and not hasattr(estimator, "estimators_"):
+            estimator.set_params(warm_start=True)
+
+    @staticmethod
+    def from_registry(pair=None, selection=None, tag="online", **options):
+        """
+        Continue the learning of a registered model of the pair, the tag points to the selected version at first and
+        is moved to every exported version, so the arbitrage bot uses the latest updates when the tag is selected
+        :param pair: cryptocurrency pair
+        :param selection: number of the version or a tag of the model, the current version if None
+        :param tag: tag of the continuously updated versions
+        :return: online learning of the model
+        """
+        registry = Model_registry()
+        manifest = registry.get_manifest(pair, selection)
+        registry.tag(pair, manifest["version"], tag)
+        return Online_learning(pair, registry.load_pipeline(pair, manifest["version"]), manifest=manifest, tag=tag,
+                               **options)
+
+    def warm_up(self, dataset=None):
+        """
+        Fill the replay buffer with the most recent labelled records of the compact dataset
+        :param dataset: compact dataset with the features of FEATURE_COLUMNS
+        """
+        self.buffer.extend(zip(dataset.matrix()[-self.buffer.maxlen:], dataset.target[-self.buffer.maxlen:]))
+
+    def label(self, record=None):
+        """
+        Label the completed candle by the labelling of the preprocessing, which marks a record when the prices of the
+        previous record are profitable
+        :param record: prices and volumes of the completed candle on both exchanges
+        :return: arbitrage label of the completed candle
+        """
+        records = pd.DataFrame([self.previous_record, record], columns=FEATURE_COLUMNS[:len(record)])
+        return int(Data_preprocessing.label_arbitrage(records, self.pair).iloc[1, 0])
+
+    def update(self, Binance_candle=None, Bybit_candle=None):
+        """
+        Feed the newest candles of both exchanges; once a candle is completed, its features and label are added to
+        the replay buffer and the model is updated
+        :param Binance_candle: kline of Binance as [timestamp, open, high, low, close, volume, ...]
+        :param Bybit_candle: kline of Bybit with the same timestamp
+        :return: label of the completed candle, None if no candle has been completed
+        """
+        pending = self.feature_pipeline.pending
+        features = self.feature_pipeline.update(Binance_candle, Bybit_candle)
+        if pending is None or int(Binance_candle[0]) <= pending[0]:
+            return None
+
+        record = pending[1]
+        if self.previous_record is None or features is None:
+            self.previous_record = record
+            return None
+        label = self.label(record)
+        self.previous_record = record
+
+        self.learn(features, label)
+        return label
+
+    def learn(self, features=None, label=None):
+        """
+        Update the model with the new labelled record, estimators supporting incremental fitting are updated at once
+        with a batch replayed from the buffer, the others are refitted on the whole buffer periodically; the model is
+        exported after every export_every updates
+        :param features: feature vector of the record
+        :param label: arbitrage label of the record
+        """
+        self.buffer.append((features, label))
+        self.n_updates += 1
+
+        if self.incremental:
+            self.partial_fit()
+        elif self.n_updates % self.refit_every == 0:
+            self.refit()
+        if self.n_updates % self.export_every == 0:
+            self.export()
+
+    def partial_fit(self):
+        """
+        Update the estimator with the newest record and records sampled from the replay buffer, which prevents
+        forgetting of the older records; the fitted scaling and feature selection stay unchanged
+        """
+        indices = self.generator.integers(0, len(self.buffer), min(self.replay_batch, len(self.buffer)) - 1)
+        batch = [self.buffer[-1]] + [self.buffer[index] for index in indices]
+        features = np.array([record for record, _ in batch], dtype=FEATURE_DTYPE)
+        labels = np.array([label for _, label in batch])
+
+        self.model.named_steps["model"].partial_fit(self.model[:-1].transform(features), labels)
+
+    def refit(self):
+        """
+        Refit the estimator on the replay buffer, starting from the current weights where the estimator supports a
+        warm start; the fitted scaling and feature selection stay unchanged
+        """
+        features = np.array([record for record, _ in self.buffer], dtype=FEATURE_DTYPE)
+        labels = np.array([label for _, label in self.buffer])
+        if np.unique(labels).size < 2:
+            return
+
+        self.model.named_steps["model"].fit(self.model[:-1].transform(features), labels)
+        print(f"Model for {self.pair} refitted on {labels.size} records")
+
+    def export(self):
+        """
+        Register the updated model as a new version derived from the previous one and move the tag to it, the
+        registered versions stay unchanged and the arbitrage bot switches to the new version at once
+        """
+        if self.manifest is None:
+            return
+
+        self.version = self.model_registry.register(
+            self.pair, self.model, self.manifest["fingerprint"], self.manifest["features"], None, [self.tag],
+            activate=False, feature_config=self.manifest.get("feature_config"), parent=self.version,
+            online_updates=self.n_updates)
+        print(f"Model for {self.pair} updated online registered as version {self.version}")
@@ -0,0 +1,50 @@
+import os
+import numpy as np
+
+
+class Shared_arrays:
+    @staticmethod
+    def share_array(array=None, directory=None, name=None):
+        """
+        Save an array into a .npy file, which other processes can map into memory instead of receiving a pickled copy
+        :param array: array to be shared
+        :param directory: directory of the shared files
+        :param name: name of the shared file without the extension
+        :return: path to the shared file
+        """
+        path = os.path.join(directory, name + ".npy")
+        np.save(path, np.ascontiguousarray(array), allow_pickle=False)
+        return path
+
+    @staticmethod
+    def load_array(path=None):
+        """
+        :param path: path to the shared file
+        :return: read-only memory-mapped array
+        """
+        return np.load(path, mmap_mode="r", allow_pickle=False)
+
+    @staticmethod
+    def share_frame(dataset=None, directory=None, name=None):
+        """
+        Save every column of the dataset into its own .npy file, string columns are stored as fixed-width unicode
+        :param dataset: dataset to be shared
+        :param directory: directory of the shared files
+        :param name: prefix of the shared files
+        :return: description of the shared dataset as a list of (column, path) pairs
+        """
+        description = []
+        for index, column in enumerate(dataset.columns):
+            values = dataset[column].to_numpy()
+            if values.dtype == object:
+                values = values.astype(str)
+            description.append((column, Shared_arrays.share_array(values, directory, f"{name}_{index}")))
+        return description
+
+    @staticmethod
+    def load_columns(description=None):
+        """
+        :param description: description of the shared dataset returned by share_frame
+        :return: dictionary of the memory-mapped columns, which are not copied until they are used
+        """
+        return {column: Shared_arrays.load_array(path) for column, path in description}
@@ -0,0 +1,135 @@
+import copy
+import os
+import pickle
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+
+from sklearn.feature_selection import SelectKBest
+from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
+from sklearn.preprocessing import StandardScaler
+from imblearn.over_sampling import SMOTE
+
+from load_dataset import Load_dataset
+from model_specs import MODEL_SPECS
+from shared_arrays import Shared_arrays
+
+N_FOLDS = 5
+SMOTE_NEIGHBOURS = 5
+
+
+class Walk_forward:
+    def __init__(self, pairs, n_folds=N_FOLDS, specs=None, workers=None):
+        self.pairs = pairs
+        self.n_folds = n_folds
+        self.specs = specs if specs is not None else list(MODEL_SPECS)
+        self.workers = workers if workers is not None else os.cpu_count() or 1
+        self.load_dataset = Load_dataset(pairs)
+        self.datasets = self.load_dataset.load_preprocessed_datasets_for_training()
+        self.results = {}
+
+        self.evaluate()
+        self.summarize()
+
+    def get_boundaries(self, n_records=None):
+        """
+        Divide the time-ordered records into n_folds + 1 consecutive blocks, fold k is trained on the first k + 1 blocks
+        and tested on the following one
+        :param n_records: number of records of the dataset
+        :return: positions of the ends of the blocks
+        """
+        return np.linspace(0, n_records, self.n_folds + 2).astype(int)[1:]
+
+    @staticmethod
+    def fit_scalers(dataset=None, boundaries=None):
+        """
+        Fit the standard scaler of every fold incrementally, the scaler of a fold is the scaler of the previous fold
+        updated only with the block added to the training part
+        :param dataset: feature matrix of the dataset
+        :param boundaries: positions of the ends of the blocks
+        :return: list of fitted scalers of the folds
+        """
+        scaler, scalers, start = StandardScaler(), [], 0
+        for end in boundaries[:-1]:
+            scaler.partial_fit(dataset[start:end])
+            scalers.append(copy.deepcopy(scaler))
+            start = end
+        return scalers
+
+    @staticmethod
+    def evaluate_fold(spec=None, pair=None, interval=None, fold=None, paths=None, train_end=None, test_end=None):
+        """
+        Train the model on the training part of the fold and evaluate it on the following block, the resampling by
+        SMOTE is applied only to the training part, so no synthetic record is built from the future
+        :param spec: key of the model specification in MODEL_SPECS
+        :param pair: cryptocurrency pair of the dataset
+        :param interval: time interval of the dataset
+        :param fold: number of the fold
+        :param paths: paths to the shared dataset, arbitrages and the fitted scaler of the fold
+        :param train_end: position of the end of the training part
+        :param test_end: position of the end of the testing part
+        :return: metrics of the fold, None if the training part contains only one class
+        """
+        dataset, arbitrages = Shared_arrays.load_array(paths[0]), Shared_arrays.load_array(paths[1])
+        with open(paths[2], "rb") as file:
+            scaler = pickle.load(file)
+
+        train_dataset, train_arbitrage = scaler.transform(dataset[:train_end]), arbitrages[:train_end]
+        test_dataset, test_arbitrage = scaler.transform(dataset[train_end:test_end]), arbitrages[train_end:test_end]
+        minority = np.bincount(train_arbitrage, minlength=2).min()
+        if minority == 0:
+            return None
+        if minority > SMOTE_NEIGHBOURS:
+            train_dataset, train_arbitrage = SMOTE(random_state=2, k_neighbors=SMOTE_NEIGHBOURS).fit_resample(
+                train_dataset, train_arbitrage)
+
+        selector = SelectKBest().fit(train_dataset, train_arbitrage)
+        model = MODEL_SPECS[spec]["model"](**MODEL_SPECS[spec]["parameters"])
+        model.fit(selector.transform(train_dataset), train_arbitrage)
+        prediction = model.predict(selector.transform(test_dataset))
+
+        return {"spec": spec, "pair": pair, "interval": interval, "fold": fold,
+                "accuracy": accuracy_score(test_arbitrage, prediction),
+                "precision": precision_score(test_arbitrage, prediction, zero_division=0),
+                "recall": recall_score(test_arbitrage, prediction, zero_division=0),
+                "f1": f1_score(test_arbitrage, prediction, zero_division=0)}
+
+    def evaluate(self):
+        """
+        Evaluate every model specification on every fold of every dataset as independent jobs in a pool of processes
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                futures = []
+                for pair_key, pair in self.datasets.items():
+                    for interval_key, interval in pair.items():
+                        if interval is None:
+                            continue
+                        name = pair_key + "_" + interval_key
+                        boundaries = self.get_boundaries(len(interval))
+                        dataset_path = Shared_arrays.share_array(interval.matrix(), directory, name)
+                        arbitrage_path = Shared_arrays.share_array(interval.target, directory, name + "_arbitrage")
+
+                        for fold, scaler in enumerate(self.fit_scalers(interval.matrix(), boundaries)):
+                            scaler_path = os.path.join(directory, f"{name}_scaler_{fold}.pkl")
+                            with open(scaler_path, "wb") as file:
+                                pickle.dump(scaler, file)
+                            futures += [executor.submit(self.evaluate_fold, spec, pair_key, interval_key, fold,
+                                                        [dataset_path, arbitrage_path, scaler_path],
+                                                        boundaries[fold], boundaries[fold + 1])
+                                        for spec in self.specs]
+
+                for future in as_completed(futures):
+                    result = future.result()
+                    if result is not None:
+                        self.results.setdefault((result["spec"], result["pair"], result["interval"]), []).append(result)
+
+    def summarize(self):
+        """
+        Print the mean and standard deviation of the metrics over the folds of every model and dataset
+        """
+        for (spec, pair, interval), results in sorted(self.results.items()):
+            print(f"\n{MODEL_SPECS[spec]['name']} for {pair} for {interval} interval over {len(results)} folds")
+            for metric in ["accuracy", "precision", "recall", "f1"]:
+                values = np.array([result[metric] for result in results])
+                print(f"{metric.capitalize()}: {values.mean()} (+/- {values.std()})")
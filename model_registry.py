@@ -0,0 +1,172 @@
+import json
+import os
+import pickle
+import shutil
+import time
+
+from compiled_model import Compiled_model
+from feature_library import Feature_library
+from feature_pipeline import Feature_pipeline
+
+REGISTRY_DIRECTORY = "../best_models/registry"
+INDEX_FILE = "registry.json"
+MANIFEST_FILE = "manifest.json"
+PIPELINE_FILE = "model.sav"
+
+
+class Model_registry:
+    def __init__(self, directory=REGISTRY_DIRECTORY):
+        self.directory = directory
+
+    @staticmethod
+    def write_json(path=None, content=None):
+        """
+        Write the JSON file under a temporary name first and replace the old one, so that readers never see a partial
+        file
+        :param path: path to the JSON file
+        :param content: content to be saved
+        """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".tmp", "w") as file:
+            json.dump(content, file, indent=4)
+        os.replace(path + ".tmp", path)
+
+    @staticmethod
+    def check_features(features=None, feature_config=None):
+        """
+        Check that the arbitrage bot computes the features online, in the same order as the model expects them
+        :param features: names of the features in the order the pipeline expects them
+        :param feature_config: configuration of the features of the library, None without them
+        """
+        columns = Feature_pipeline(None if feature_config is None else Feature_library(feature_config)).columns
+        if list(features) != columns:
+            raise ValueError(f"Features {list(features)} cannot be computed online, the bot computes {columns}.")
+
+    def get_index(self, pair=None):
+        """
+        :param pair: cryptocurrency pair
+        :return: index of the pair with the registered versions, the current version and the tags of the versions
+        """
+        path = os.path.join(self.directory, pair, INDEX_FILE)
+        if not os.path.exists(path):
+            return {"current": None, "versions": [], "tags": {}}
+
+        with open(path, "r") as file:
+            return json.load(file)
+
+    def get_directory(self, pair=None, version=None):
+        """
+        :param pair: cryptocurrency pair
+        :param version: number of the version
+        :return: directory of the version
+        """
+        return os.path.join(self.directory, pair, f"v{version}")
+
+    def register(self, pair=None, pipeline=None, fingerprint=None, features=None, metrics=None, tags=None,
+                 activate=True, feature_config=None, **details):
+        """
+        Register the fitted pipeline as a new version of the model of the pair, the version stores the pipeline, its
+        compiled memory-mappable arrays and a manifest linking it to the data and the features it was trained on; the
+        version is written into a temporary directory and renamed at once, registered versions are never written again
+        :param pair: cryptocurrency pair
+        :param pipeline: fitted pipeline
+        :param fingerprint: fingerprint of the dataset the pipeline was trained on
+        :param features: names of the features in the order the pipeline expects them
+        :param metrics: dictionary of the metrics of the pipeline
+        :param tags: tags pointing to the new version
+        :param activate: whether the new version becomes the current one
+        :param feature_config: configuration of the features of the library the pipeline was trained with
+        :param details: further details saved in the manifest, such as the interval or the model specification
+        :return: number of the new version
+        """
+        self.check_features(features, feature_config)
+        index = self.get_index(pair)
+        version = max(index["versions"], default=0) + 1
+        directory = self.get_directory(pair, version)
+        if os.path.exists(directory):
+            raise ValueError(f"Model version {version} of {pair} already exists, registered versions are immutable.")
+
+        temporary = directory + ".tmp"
+        shutil.rmtree(temporary, ignore_errors=True)
+        Compiled_model.compile(pipeline).save(temporary)
+        with open(os.path.join(temporary, PIPELINE_FILE), "wb") as file:
+            pickle.dump(pipeline, file)
+        self.write_json(os.path.join(temporary, MANIFEST_FILE),
+                        dict({"pair": pair, "version": version, "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+                              "fingerprint": fingerprint, "features": list(features), "metrics": metrics,
+                              "tags": list(tags or []), "feature_config": feature_config}, **details))
+        os.rename(temporary, directory)
+
+        index["versions"].append(version)
+        for tag in tags or []:
+            index["tags"][tag] = version
+        if activate:
+            index["current"] = version
+        self.write_json(os.path.join(self.directory, pair, INDEX_FILE), index)
+        return version
+
+    def resolve(self, pair=None, selection=None):
+        """
+        :param pair: cryptocurrency pair
+        :param selection: number of the version or a tag, the current version if None
+        :return: number of the selected version
+        """
+        index = self.get_index(pair)
+        if selection is None:
+            version = index["current"]
+        elif isinstance(selection, str) and not selection.isdigit():
+            version = index["tags"].get(selection)
+        else:
+            version = int(selection)
+
+        if version not in index["versions"]:
+            raise ValueError(f"Model version {selection} of {pair} is not registered.")
+        return version
+
+    def activate(self, pair=None, selection=None):
+        """
+        Move the pointer of the current version, which rolls back or forward instantly without copying any artifact
+        :param pair: cryptocurrency pair
+        :param selection: number of the version or a tag
+        :return: number of the current version
+        """
+        index = self.get_index(pair)
+        index["current"] = self.resolve(pair, selection)
+        self.write_json(os.path.join(self.directory, pair, INDEX_FILE), index)
+        return index["current"]
+
+    def tag(self, pair=None, selection=None, tag=None):
+        """
+        :param pair: cryptocurrency pair
+        :param selection: number of the version or a tag
+        :param tag: tag moved to the selected version
+        """
+        index = self.get_index(pair)
+        index["tags"][tag] = self.resolve(pair, selection)
+        self.write_json(os.path.join(self.directory, pair, INDEX_FILE), index)
+
+    def get_manifest(self, pair=None, selection=None):
+        """
+        :param pair: cryptocurrency pair
+        :param selection: number of the version or a tag, the current version if None
+        :return: manifest of the selected version
+        """
+        with open(os.path.join(self.get_directory(pair, self.resolve(pair, selection)), MANIFEST_FILE), "r") as file:
+            return json.load(file)
+
+    def load_pipeline(self, pair=None, selection=None):
+        """
+        :param pair: cryptocurrency pair
+        :param selection: number of the version or a tag, the current version if None
+        :return: fitted pipeline of the selected version
+        """
+        with open(os.path.join(self.get_directory(pair, self.resolve(pair, selection)), PIPELINE_FILE), "rb") as file:
+            return pickle.load(file)
+
+    def load(self, pair=None, selection=None):
+        """
+        :param pair: cryptocurrency pair
+        :param selection: number of the version or a tag, the current version if None
+        :return: compiled model of the selected version with memory-mapped arrays
+        """
+        return Compiled_model.load(self.get_directory(pair, self.resolve(pair, selection)))
@@ -0,0 +1,104 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in [ROOT, os.path.join(ROOT, "machine_learning"), os.path.join(ROOT, "bot")]:
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from sklearn.feature_selection import SelectKBest
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from data_preprocessing import Data_preprocessing, BINANCE_PRICE_COLUMNS, BYBIT_PRICE_COLUMNS
+
+
+@pytest.fixture
+def make_prices():
+    def make(n_records=400, seed=2):
+        """
+        Aligned open, high, low and close prices of both exchanges, the Bybit prices differ from the Binance ones by
+        a spread of zero, half or twelve dollars
+        """
+        generator = np.random.default_rng(seed)
+        base = 100 + generator.normal(size=n_records).cumsum()
+        spread = generator.choice([0, 0.5, 12], size=(n_records, 4), p=[0.3, 0.5, 0.2]) * \
+            generator.choice([-1, 1], size=(n_records, 4))
+        dataset = pd.DataFrame({column: base + generator.normal(0, 0.1, n_records)
+                                for column in BINANCE_PRICE_COLUMNS})
+        for index, column in enumerate(BYBIT_PRICE_COLUMNS):
+            dataset[column] = dataset[BINANCE_PRICE_COLUMNS[index]] + spread[:, index]
+        return dataset
+    return make
+
+
+@pytest.fixture
+def make_candles():
+    def make(n_records=30, seed=2):
+        """
+        Klines of both exchanges one minute apart, the values are representable in float32 so the online and the
+        batch features can be compared exactly
+        """
+        generator = np.random.default_rng(seed)
+        prices = (100 + generator.normal(size=(n_records, 2)).cumsum(axis=0)).astype(np.float32)
+        volumes = generator.uniform(1, 10, size=(n_records, 2)).astype(np.float32)
+        Binance_candles, Bybit_candles = [], []
+        for index in range(n_records):
+            timestamp = 1640995200000 + index * 60000
+            for candles, price, volume in zip([Binance_candles, Bybit_candles], prices[index], volumes[index]):
+                candles.append([timestamp] + [float(value) for value in [price, price + 1, price - 1, price + 0.5,
+                                                                         volume]])
+        return Binance_candles, Bybit_candles
+    return make
+
+
+@pytest.fixture
+def make_data():
+    def make(n_records=2000, seed=2, n_features=12):
+        """
+        Features on very different scales and a target depending on three of them
+        """
+        generator = np.random.default_rng(seed)
+        scale = np.resize([1, 5, 0.1, 20, 2, 1, 3, 50, 0.5, 1, 2, 10], n_features)
+        x = generator.normal(loc=100, scale=scale, size=(n_records, n_features))
+        margin = (x[:, 0] - 100) + 0.2 * (x[:, 3] - 100) - 5 * (x[:, 2] - 100) + generator.normal(size=n_records)
+        return x.astype(np.float32), (margin > 1).astype(np.int8)
+    return make
+
+
+@pytest.fixture
+def fit_pipeline(make_data):
+    def fit(model=None, n_features=12):
+        """
+        Pipeline of scaling, feature selection and the model fitted like the ones of Building_models
+        """
+        x, y = make_data(n_features=n_features)
+        model = LogisticRegression(max_iter=500) if model is None else model
+        return Pipeline([("scaling", StandardScaler()), ("features", SelectKBest(k=6)), ("model", model)]).fit(x, y), x
+    return fit
+
+
+@pytest.fixture
+def workspace(make_prices, tmp_path, monkeypatch):
+    """
+    Working directory of the training with small preprocessed datasets of one pair, the experiments, the registry and
+    the hypothesis data are written next to it as in the repository
+    """
+    for directory in ["machine_learning/dataset_preprocessed", "best_models", "hypothesis_testing"]:
+        os.makedirs(tmp_path / directory)
+    monkeypatch.chdir(tmp_path / "machine_learning")
+
+    # the hypothesis testing compares the scores of all three intervals
+    for seed, interval in enumerate(["1m", "5m", "15m"]):
+        dataset = make_prices(200, seed)
+        dates = pd.date_range("2024-01-01", periods=200, freq=interval.replace("m", "min"))
+        dataset.insert(0, "date", dates.astype(str))
+        dataset.insert(1, "dateTime", dates.astype(np.int64) // 10 ** 6)
+        dataset["volume_Binance"], dataset["volume_Bybit"] = 1.0, 2.0
+        Data_preprocessing.preprocess(dataset, "ETHUSDT").to_csv(f"./dataset_preprocessed/ETHUSDT_{interval}.csv",
+                                                                 index=False)
+    return tmp_path
@@ -0,0 +1,78 @@
+import time
+import numpy as np
+import pytest
+
+pytest.importorskip("tabulate")
+pytest.importorskip("pynput")
+
+import arbitrage_bot
+from arbitrage_bot import Arbitrage_bot
+from feature_library import Feature_library
+from feature_pipeline import Feature_pipeline
+from model_registry import Model_registry
+
+CONFIG = {"spread_mean": [3]}
+
+
+def make_bot(registry=None):
+    # the constructor connects to the exchanges, so only the state used by the model selection and trading is built
+    bot = Arbitrage_bot.__new__(Arbitrage_bot)
+    bot.model_registry, bot.model_selection = registry, {}
+    bot.feature_pipelines, bot.model_versions, bot.scheduled_trades = {}, {}, {}
+    return bot
+
+
+def register(registry=None, fit_pipeline=None, feature_config=None, **options):
+    columns = Feature_pipeline(None if feature_config is None else Feature_library(feature_config)).columns
+    pipeline, _ = fit_pipeline(n_features=len(columns))
+    return registry.register("BTCUSDT", pipeline, "fingerprint", columns, {}, feature_config=feature_config,
+                             **options)
+
+
+def test_select_model_keeps_the_pipeline_of_the_same_features(tmp_path, fit_pipeline):
+    registry = Model_registry(str(tmp_path))
+    bot = make_bot(registry)
+    register(registry, fit_pipeline)
+    assert bot.select_model("BTCUSDT") == ("BTCUSDT", 1)
+    pipeline = bot.feature_pipelines["BTCUSDT"][0]
+
+    register(registry, fit_pipeline, tags=["online"])
+    bot.model_selection["BTCUSDT"] = "online"
+    assert bot.select_model("BTCUSDT") == ("BTCUSDT", 2)
+    assert bot.feature_pipelines["BTCUSDT"][0] is pipeline
+
+    register(registry, fit_pipeline, CONFIG, tags=["online"])
+    assert bot.select_model("BTCUSDT") == ("BTCUSDT", 3)
+    assert bot.feature_pipelines["BTCUSDT"][0].columns == pipeline.columns + ["spread_mean_3"]
+
+
+def test_select_model_rejects_features_the_bot_does_not_compute(tmp_path, fit_pipeline):
+    registry = Model_registry(str(tmp_path))
+    register(registry, fit_pipeline)
+    manifest = registry.get_manifest("BTCUSDT")
+    manifest["features"] = manifest["features"][::-1]
+    registry.write_json(str(tmp_path / "BTCUSDT" / "v1" / "manifest.json"), manifest)
+    with pytest.raises(ValueError):
+        make_bot(registry).select_model("BTCUSDT")
+
+
+def test_predicted_trades_are_scheduled_instead_of_waited_for(monkeypatch):
+    bot = make_bot()
+    performed = []
+    bot.perform_predicted_trade = lambda *arguments: performed.append(arguments)
+    pairs = [{"symbol": symbol} for symbol in ["BTCUSDT", "ETHUSDT", "SOLUSDT"]]
+
+    started = time.time()
+    for pair in pairs:
+        bot.trade_on_prediction(pair, 1, -1.0, 1.0)
+    bot.trade_on_prediction(pairs[0], 1, 1.0, -1.0)
+    bot.trade_on_prediction({"symbol": "XRPUSDT"}, 0, -1.0, 1.0)
+    assert time.time() - started < 1
+    assert sorted(bot.scheduled_trades) == ["BTCUSDT", "ETHUSDT", "SOLUSDT"]
+
+    bot.perform_scheduled_trades("start")
+    assert performed == []
+    monkeypatch.setattr(arbitrage_bot.time, "time", lambda: started + arbitrage_bot.TRADE_DELAY + 1)
+    bot.perform_scheduled_trades("start")
+    assert performed == [(pair, -1.0, 1.0, "start") for pair in pairs]
+    assert bot.scheduled_trades == {}
@@ -0,0 +1,34 @@
+import pickle
+import numpy as np
+from sklearn.naive_bayes import GaussianNB
+from sklearn.utils.class_weight import compute_sample_weight
+
+import building_models
+from building_models import Building_models
+from shared_arrays import Shared_arrays
+
+
+def test_get_imbalance_records_the_applied_strategy(monkeypatch):
+    monkeypatch.setitem(building_models.MODEL_SPECS, "naive_bayes",
+                        {"name": "Naive Bayes", "model": GaussianNB, "parameters": {}})
+    assert Building_models.get_imbalance("logistic_regression", "class_weight") == "class_weight"
+    assert Building_models.get_imbalance("naive_bayes", "class_weight") == "class_weight"
+    assert Building_models.get_imbalance("multilayer_perceptron", "class_weight") == "none"
+    assert Building_models.get_imbalance("multilayer_perceptron", "smote") == "smote"
+
+
+def test_train_model_weights_samples_without_class_weight(make_data, monkeypatch, tmp_path):
+    monkeypatch.setitem(building_models.MODEL_SPECS, "naive_bayes",
+                        {"name": "Naive Bayes", "model": GaussianNB, "parameters": {}})
+    x, y = make_data(400)
+    stages_path = str(tmp_path / "stages.pkl")
+    with open(stages_path, "wb") as file:
+        pickle.dump([], file)
+    paths = [stages_path] + [Shared_arrays.share_array(array, str(tmp_path), name)
+                             for array, name in [(x, "train"), (x, "test"), (y, "train_arbitrage"),
+                                                 (y, "test_arbitrage")]]
+
+    result = Building_models.train_model("naive_bayes", "BTCUSDT", "1m", paths, {}, True, 2)
+    weighted = GaussianNB().fit(x, y, sample_weight=compute_sample_weight("balanced", y))
+    assert np.array_equal(result["prediction"], weighted.predict(x))
+    assert not np.array_equal(result["prediction"], GaussianNB().fit(x, y).predict(x))
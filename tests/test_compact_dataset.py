@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+
+from compact_dataset import Compact_dataset
+from feature_pipeline import FEATURE_COLUMNS, FEATURE_DTYPE
+
+
+def make_frame(n_records=50, seed=2):
+    generator = np.random.default_rng(seed)
+    dataset = pd.DataFrame(generator.normal(100, 5, (n_records, len(FEATURE_COLUMNS))), columns=FEATURE_COLUMNS)
+    dataset.insert(0, "dateTime", 1700000000000 + 60000 * np.arange(n_records))
+    dataset["arbitrage"] = generator.integers(0, 2, n_records)
+    return dataset
+
+
+def test_from_chunks_matches_from_frame():
+    dataset = make_frame()
+    expected = Compact_dataset.from_frame(dataset)
+    streamed = Compact_dataset.from_chunks(np.array_split(dataset, 7))
+
+    assert streamed.features.dtype == FEATURE_DTYPE
+    assert np.array_equal(streamed.features, expected.features)
+    assert np.array_equal(streamed.timestamps, expected.timestamps)
+    assert np.array_equal(streamed.target, expected.target)
+    assert streamed.columns == FEATURE_COLUMNS
+
+
+def test_from_chunks_without_chunks():
+    streamed = Compact_dataset.from_chunks([])
+    assert len(streamed) == 0
+    assert streamed.matrix().shape == (0, len(FEATURE_COLUMNS))
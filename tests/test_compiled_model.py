@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.feature_selection import SelectKBest
+from sklearn.linear_model import LogisticRegression
+from sklearn.neural_network import MLPClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import LinearSVC, SVC
+
+from compiled_model import Compiled_model
+
+MODELS = {"logistic_regression": LogisticRegression(C=10, max_iter=500),
+          "support_vector_machine": LinearSVC(C=1, max_iter=5000),
+          "relu_perceptron": MLPClassifier(hidden_layer_sizes=(5, 5), max_iter=300, random_state=2),
+          "tanh_perceptron": MLPClassifier(hidden_layer_sizes=(8,), activation="tanh", max_iter=300, random_state=2),
+          "logistic_perceptron": MLPClassifier(hidden_layer_sizes=(8,), activation="logistic", max_iter=1000,
+                                               random_state=2),
+          "random_forest": RandomForestClassifier(n_estimators=20, min_samples_split=10, random_state=2)}
+
+
+@pytest.mark.parametrize("name", list(MODELS))
+def test_compiled_predictions_match_the_pipeline(name, make_data, fit_pipeline, tmp_path):
+    pipeline, _ = fit_pipeline(MODELS[name])
+    compiled = Compiled_model.compile(pipeline)
+    x, _ = make_data(500, seed=3)
+
+    assert np.array_equal(compiled.predict(x), pipeline.predict(x))
+    assert np.array_equal(compiled.predict(x[0]), pipeline.predict(x[:1]))
+
+    compiled.save(str(tmp_path))
+    loaded = Compiled_model.load(str(tmp_path))
+    assert loaded.kind == compiled.kind
+    assert np.array_equal(loaded.predict(x), pipeline.predict(x))
+
+
+def test_compile_rejects_unsupported_models(make_data, fit_pipeline):
+    with pytest.raises(ValueError):
+        Compiled_model.compile(fit_pipeline(SVC())[0])
+
+    x, y = make_data()
+    pipeline = Pipeline([("scaling", StandardScaler()), ("features", SelectKBest(k=6)),
+                         ("model", LogisticRegression(max_iter=500))]).fit(x, np.digitize(x[:, 0], [99, 101]))
+    with pytest.raises(ValueError):
+        Compiled_model.compile(pipeline)
+
+
+def test_predict_checks_the_number_of_features(fit_pipeline):
+    compiled = Compiled_model.compile(fit_pipeline()[0])
+    with pytest.raises(ValueError):
+        compiled.predict(np.zeros((2, 11), dtype=np.float32))
@@ -0,0 +1,75 @@
+import os
+import numpy as np
+import pandas as pd
+
+from data_gaps import Data_gaps
+
+MINUTE = 60000
+START = 1663761600000
+
+
+def write_candles(path=None, minutes=None, mode="w", terminated=True):
+    dataset = pd.DataFrame({"date": "2022-09-21", "dateTime": START + MINUTE * np.asarray(minutes), "open": 1.5,
+                            "high": 2.0, "low": 1.0, "close": 1.5, "volume": 10.0}, index=minutes)
+    content = dataset.to_csv(index=True, header=mode == "w")
+    with open(path, mode) as file:
+        file.write(content if terminated else content.rstrip("\n"))
+
+
+def test_find_gaps():
+    timestamps = START + MINUTE * np.array([0, 1, 2, 5, 6, 8])
+    assert Data_gaps.find_gaps(timestamps, MINUTE) == [[START + 3 * MINUTE, START + 4 * MINUTE],
+                                                       [START + 7 * MINUTE, START + 7 * MINUTE]]
+    assert Data_gaps.find_gaps(timestamps[3:], MINUTE, previous=START + 2 * MINUTE) == \
+        [[START + 3 * MINUTE, START + 4 * MINUTE], [START + 7 * MINUTE, START + 7 * MINUTE]]
+    assert Data_gaps.find_gaps(timestamps[:3], MINUTE) == []
+
+
+def test_scan_reads_only_the_appended_rows(tmp_path):
+    path = str(tmp_path / "Binance_data_ETHUSDT_1m.csv")
+    write_candles(path, [0, 1, 2, 5])
+    gaps = Data_gaps(str(tmp_path), str(tmp_path / "gap_index.json"))
+    entry = dict(gaps.scan("Binance_data_ETHUSDT_1m.csv"))
+    assert entry["offset"] == os.path.getsize(path)
+    assert entry["gaps"] == [[START + 3 * MINUTE, START + 4 * MINUTE]]
+    assert (entry["present"], entry["expected"]) == (4, 6)
+
+    # the appended rows continue from the stored offset, a gap at the boundary of both scans is found as well
+    write_candles(path, [7, 8], mode="a")
+    entry = dict(gaps.scan("Binance_data_ETHUSDT_1m.csv"))
+    assert entry["offset"] == os.path.getsize(path)
+    assert entry["gaps"] == [[START + 3 * MINUTE, START + 4 * MINUTE], [START + 6 * MINUTE, START + 6 * MINUTE]]
+    assert (entry["present"], entry["expected"], entry["last"]) == (6, 9, START + 8 * MINUTE)
+    assert gaps.scan("Binance_data_ETHUSDT_1m.csv") == entry
+
+
+def test_scan_reads_an_unterminated_row_again(tmp_path):
+    path = str(tmp_path / "Binance_data_ETHUSDT_1m.csv")
+    write_candles(path, [0, 1])
+    write_candles(path, [2], mode="a", terminated=False)
+    gaps = Data_gaps(str(tmp_path), str(tmp_path / "gap_index.json"))
+    entry = dict(gaps.scan("Binance_data_ETHUSDT_1m.csv"))
+    assert entry["offset"] < os.path.getsize(path) and entry["present"] == 3
+
+    with open(path, "a") as file:
+        file.write("\n")
+    write_candles(path, [3], mode="a")
+    entry = gaps.scan("Binance_data_ETHUSDT_1m.csv")
+    assert entry["offset"] == os.path.getsize(path)
+    assert (entry["present"], entry["expected"], entry["gaps"]) == (4, 4, [])
+
+
+def test_scan_rewritten_dataset_as_a_whole(tmp_path):
+    path = str(tmp_path / "Binance_data_ETHUSDT_1m.csv")
+    write_candles(path, [0, 1, 2, 5])
+    gaps = Data_gaps(str(tmp_path), str(tmp_path / "gap_index.json"))
+    gaps.scan("Binance_data_ETHUSDT_1m.csv")
+
+    # the backfill rewrites the dataset with the missing candles, the tail of the previous scan changes
+    write_candles(path, [0, 1, 2, 3, 4, 5, 6])
+    entry = gaps.scan("Binance_data_ETHUSDT_1m.csv")
+    assert (entry["present"], entry["expected"], entry["gaps"]) == (7, 7, [])
+
+    gaps.update_index()
+    assert Data_gaps(str(tmp_path), str(tmp_path / "gap_index.json")).missing_ranges(
+        "Binance_data_ETHUSDT_1m.csv") == []
@@ -0,0 +1,21 @@
+import numpy as np
+
+from data_gathering import Data_gathering, BINANCE_COLUMNS, BYBIT_COLUMNS
+
+
+def test_decode_klines_types_columns():
+    data = [["1700000000000", "10.5", "11", "10", "10.75", "3"] + ["0"] * 6,
+            [1700000060000, 10.75, 12, 10.5, 11.5, 4] + [0] * 6]
+    decoded = Data_gathering.decode_klines(data, BINANCE_COLUMNS)
+
+    assert list(decoded.columns) == ["date", "dateTime", "open", "high", "low", "close", "volume"]
+    assert decoded["dateTime"].dtype == np.int64
+    assert decoded["dateTime"].tolist() == [1700000000000, 1700000060000]
+    assert decoded["close"].tolist() == [10.75, 11.5]
+
+
+def test_decode_klines_empty_page():
+    for data in [[], np.empty((0, len(BYBIT_COLUMNS))), None]:
+        decoded = Data_gathering.decode_klines(data, BYBIT_COLUMNS)
+        assert decoded.empty
+        assert list(decoded.columns) == ["date", "dateTime", "open", "high", "low", "close", "volume"]
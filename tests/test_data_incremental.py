@@ -0,0 +1,79 @@
+import os
+import numpy as np
+import pandas as pd
+
+from data_incremental import Data_incremental
+
+
+def write_gathered(n_records=None, offset=0.0):
+    """
+    Write the gathered datasets of both exchanges with the first n_records candles of a fixed history
+    """
+    generator = np.random.default_rng(2)
+    prices = 1300 + generator.normal(size=400).cumsum()
+    timestamps = 1663761600000 + 900000 * np.arange(400)
+    for exchange, shift in [("Binance", offset), ("Bybit", 0.5 + offset)]:
+        dataset = pd.DataFrame({"date": pd.to_datetime(timestamps, unit="ms").astype(str), "dateTime": timestamps,
+                                "open": prices + shift, "high": prices + shift + 1, "low": prices + shift - 1,
+                                "close": prices + shift, "volume": 10.5})
+        count = n_records[exchange] if isinstance(n_records, dict) else n_records
+        dataset.iloc[:count].to_csv(f"./dataset/{exchange}_data_ETHUSDT_15m.csv", index=True)
+
+
+def read_preprocessed():
+    return pd.read_csv("./dataset_preprocessed/ETHUSDT_15m.csv")
+
+
+def test_appends_only_new_records(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("dataset")
+    os.makedirs("dataset_preprocessed")
+
+    write_gathered({"Binance": 201, "Bybit": 200})
+    Data_incremental(["ETHUSDT"], ["15m"])
+    first = read_preprocessed()
+
+    write_gathered(300)
+    Data_incremental(["ETHUSDT"], ["15m"])
+    dataset = read_preprocessed()
+    assert dataset["dateTime"].is_unique and dataset["dateTime"].is_monotonic_increasing
+    assert dataset.iloc[:len(first) - 1].equals(first.iloc[:-1])
+    assert dataset["dateTime"].max() == 1663761600000 + 900000 * 299
+
+    Data_incremental(["ETHUSDT"], ["15m"])
+    assert read_preprocessed().equals(dataset)
+
+
+def test_reads_from_the_stored_position(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("dataset")
+    write_gathered(100)
+    entry = {"path": "./dataset/Binance_data_ETHUSDT_15m.csv",
+             "columns": ["", "date", "dateTime", "open", "high", "low", "close", "volume"]}
+    dataset, start, positions = Data_incremental.read_appended(entry)
+    assert len(dataset) == 100 and start["offset"] == len(start["last_line"])
+
+    write_gathered(150)
+    dataset, start, positions = Data_incremental.read_appended(entry, positions[-1])
+    assert dataset["Unnamed: 0"].tolist() == list(range(100, 150))
+    assert positions[-1]["offset"] == os.path.getsize(entry["path"])
+
+    write_gathered(150, offset=1.0)
+    dataset, start, positions = Data_incremental.read_appended(entry, positions[-1])
+    assert len(dataset) == 150
+
+
+def test_rebuilds_a_rewritten_output(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("dataset")
+    os.makedirs("dataset_preprocessed")
+    write_gathered(200)
+    Data_incremental(["ETHUSDT"], ["15m"])
+    dataset = read_preprocessed()
+
+    dataset.iloc[:50].to_csv("./dataset_preprocessed/ETHUSDT_15m.csv", index=False)
+    write_gathered(250)
+    Data_incremental(["ETHUSDT"], ["15m"])
+    rebuilt = read_preprocessed()
+    assert rebuilt["dateTime"].is_unique
+    assert rebuilt["dateTime"].iloc[0] == dataset["dateTime"].iloc[0]
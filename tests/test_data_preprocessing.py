@@ -0,0 +1,109 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_preprocessing
+from data_preprocessing import Data_preprocessing, BINANCE_PRICE_COLUMNS, BYBIT_PRICE_COLUMNS
+from shared_arrays import Shared_arrays
+
+
+def label_by_loop(dataset=None, pair=None):
+    """
+    Labelling of the original implementation, one record and one pair of prices at a time
+    """
+    arbitrage = np.zeros(dataset.shape[0], dtype=np.int64)
+    for line in range(dataset.shape[0] - 1):
+        for Binance_value, Bybit_value in zip(dataset.loc[line, BINANCE_PRICE_COLUMNS],
+                                              dataset.loc[line, BYBIT_PRICE_COLUMNS]):
+            if Data_preprocessing.check_for_arbitrage(Binance_value, Bybit_value, pair):
+                arbitrage[line + 1] = 1
+                break
+    return arbitrage
+
+
+def test_identify_arbitrage_matches_the_loop(make_prices):
+    dataset = make_prices()
+    for pair in ["ETHUSDT", "BTCUSDT"]:
+        labels = Data_preprocessing.identify_arbitrage(dataset, pair)["arbitrage"].to_numpy()
+        expected = label_by_loop(dataset, pair)
+        assert 0 < expected.sum() < expected.size
+        assert np.array_equal(labels, expected)
+
+
+def test_label_arbitrage_grid_matches_the_loop(make_prices, monkeypatch):
+    dataset = make_prices(150)
+    fees, amounts, profits = [0.0, 0.04], [0.5, 1], [0.01, 1]
+    labels = Data_preprocessing.label_arbitrage(dataset, "ETHUSDT", fees, amounts, profits)
+    assert labels.shape == (150, 8)
+
+    for fee in fees:
+        for amount in amounts:
+            for profit in profits:
+                monkeypatch.setattr(data_preprocessing, "TAKER_FEE", fee)
+                monkeypatch.setattr(data_preprocessing, "TRADED_AMOUNTS", {"ETHUSDT": amount})
+                monkeypatch.setattr(data_preprocessing, "MIN_PERCENTAGE_PROFIT", profit)
+                assert np.array_equal(labels[f"arbitrage_{fee}_{amount}_{profit}"].to_numpy(),
+                                      label_by_loop(dataset, "ETHUSDT"))
+
+
+def test_mad_outliers_when_most_differences_equal_the_median():
+    # most records of a liquid pair have no difference at all, so the median absolute deviation is zero
+    difference = pd.Series([0.0] * 90 + [0.01, -0.01] * 4 + [5.0, -8.0])
+    mean_deviation = difference.abs().mean()
+    assert np.array_equal(np.flatnonzero(Data_preprocessing.mad_outliers(difference)), [98, 99])
+    assert 0.7979 * 0.01 / mean_deviation < 3.5 < 0.7979 * 5 / mean_deviation
+
+    assert not Data_preprocessing.mad_outliers(pd.Series([1.5] * 10)).any()
+    assert not Data_preprocessing.mad_outliers(pd.Series([1.5] * 9 + [np.nan])).any()
+
+
+@pytest.fixture
+def aligned(make_prices):
+    n_records = 300
+    dataset = make_prices(n_records)
+    dataset.insert(0, "date", pd.date_range("2024-01-01", periods=n_records, freq="15min").astype(str))
+    dataset.insert(1, "dateTime", 1704067200000 + 900000 * np.arange(n_records))
+    dataset["volume_Binance"], dataset["volume_Bybit"] = 1.0, 2.0
+    dataset.loc[7, "volume_Bybit"] = np.nan
+    return dataset
+
+
+def test_find_outliers_on_shared_columns(aligned, tmp_path):
+    dataset = aligned
+    columns = Shared_arrays.load_columns(Shared_arrays.share_frame(dataset, str(tmp_path), "shared"))
+    for method in ["quantile", "mad", "rolling_zscore"]:
+        assert np.array_equal(Data_preprocessing.find_outliers(columns, method),
+                              Data_preprocessing.find_outliers(dataset, method))
+
+
+def test_parallel_and_sequential_preprocessing_are_equal(aligned, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("dataset_preprocessed")
+    dataset = aligned
+    expected = Data_preprocessing.preprocess(dataset.copy(), "ETHUSDT")
+    description = Shared_arrays.share_frame(dataset, str(tmp_path), "shared")
+
+    pair, interval, n_records, filename, report = Data_preprocessing.preprocess_shared(description, "ETHUSDT", "15m")
+    assert n_records == expected.shape[0]
+    with open(filename, "r") as file:
+        assert file.read() == expected.to_csv(index=False)
+    assert report["n_records"] == n_records
+    assert report["size"] == os.path.getsize(filename)
+
+
+def test_join_exchanges_with_tolerance_accepts_mixed_key_types():
+    columns = ["open", "high", "low", "close", "volume"]
+    Binance_dataset = pd.DataFrame({"dateTime": np.arange(5, dtype=np.int64) * 60000,
+                                    **{column: np.arange(5, dtype=np.float64) for column in columns}})
+    # a Bybit page padded with a null timestamp is read as float64, the cleaning then drops the null row
+    Bybit_dataset = pd.DataFrame({"dateTime": np.array([0, 60000, 120500, np.nan, 240000]),
+                                  **{column: np.arange(5, dtype=np.float64) + 10 for column in columns}}).dropna()
+
+    exact = Data_preprocessing.join_exchanges(Binance_dataset, Bybit_dataset)
+    joined = Data_preprocessing.join_exchanges(Binance_dataset, Bybit_dataset, tolerance=1000)
+    assert exact["dateTime"].tolist() == [0, 60000, 240000]
+    assert joined["dateTime"].dtype == np.int64
+    assert joined["dateTime"].tolist() == [0, 60000, 120000, 240000]
+    assert joined["dateTime_Bybit"].tolist() == [0, 60000, 120500, 240000]
+    assert joined["open_Bybit"].tolist() == [10, 11, 12, 14]
@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+
+from data_resampling import Data_resampling
+
+MINUTE = 60000
+START = 1663761600000
+
+
+def make_minutes(minutes=None):
+    minutes = np.asarray(minutes)
+    return pd.DataFrame({"date": "2022-09-21", "dateTime": START + MINUTE * minutes, "open": 100.0 + minutes,
+                         "high": 101.0 + minutes * (minutes % 3), "low": 99.0 - minutes % 4,
+                         "close": 100.5 + minutes, "volume": 1.0 + minutes})
+
+
+def test_resample_into_complete_buckets():
+    # the second bucket misses its fourth minute and the last one has only two minutes
+    dataset = make_minutes([0, 1, 2, 3, 4, 5, 6, 7, 9, 10, 11])
+    resampled = Data_resampling.resample(dataset.sample(frac=1, random_state=2), "5m")
+
+    assert resampled["dateTime"].tolist() == [START]
+    assert resampled.loc[0, ["open", "high", "low", "close", "volume"]].tolist() == [100.0, 105.0, 96.0, 104.5, 15.0]
+
+    partial = Data_resampling.resample(dataset, "5m", complete_only=False)
+    assert partial["dateTime"].tolist() == [START, START + 5 * MINUTE, START + 10 * MINUTE]
+    assert partial.loc[1, ["open", "high", "low", "close", "volume"]].tolist() == [105.0, 111.0, 96.0, 109.5, 31.0]
+    assert partial.loc[2, ["open", "high", "low", "close", "volume"]].tolist() == [110.0, 123.0, 96.0, 111.5, 23.0]
+
+
+def test_compare_counts_mismatched_candles():
+    resampled = Data_resampling.resample(make_minutes(range(15)), "5m")
+    reference = resampled.copy()
+    reference.loc[2, "close"] += 0.01
+    assert Data_resampling.compare(resampled, reference.iloc[1:]) == (2, 1)
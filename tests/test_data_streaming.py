@@ -0,0 +1,51 @@
+import os
+import numpy as np
+import pandas as pd
+
+from data_preprocessing import Data_preprocessing
+from data_streaming import Data_streaming, Quantile_sketch, with_overlap
+
+
+def test_quantile_sketch_is_exact_below_its_size():
+    values = np.random.default_rng(2).normal(size=1000)
+    sketch = Quantile_sketch(size=2000)
+    for chunk in np.array_split(values, 9):
+        sketch.update(chunk)
+
+    assert sketch.count == values.size
+    assert sketch.quantile(0.999) == np.quantile(values, 0.999)
+
+
+def test_quantile_sketch_keeps_a_bounded_sample():
+    values = np.random.default_rng(2).uniform(size=200000)
+    sketch = Quantile_sketch(size=10000)
+    for chunk in np.array_split(values, 20):
+        sketch.update(chunk)
+
+    assert sketch.sample.size == 10000
+    assert sketch.count == values.size
+    assert abs(sketch.quantile(0.5) - 0.5) < 0.02
+
+
+def test_with_overlap_adds_neighbouring_rows():
+    chunks = [pd.DataFrame({"value": values}) for values in [[0, 1, 2], [], [3], [4, 5]]]
+    windows = [(window["value"].tolist(), start, stop) for window, start, stop in with_overlap(chunks, 1, 2)]
+    assert windows == [([0, 1, 2, 3, 4], 0, 3), ([2, 3, 4, 5], 1, 2), ([3, 4, 5], 1, 3)]
+
+
+def test_streaming_matches_the_batch_preprocessing(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("dataset")
+    os.makedirs("dataset_preprocessed")
+    generator = np.random.default_rng(2)
+    prices = 1300 + generator.normal(size=400).cumsum()
+    timestamps = 1663761600000 + 900000 * np.arange(400)
+    for exchange, shift in [("Binance", 0), ("Bybit", generator.choice([0, 0.5, 12], size=400, p=[0.3, 0.5, 0.2]))]:
+        pd.DataFrame({"date": pd.to_datetime(timestamps, unit="ms").astype(str), "dateTime": timestamps,
+                      "open": prices + shift, "high": prices + shift + 1, "low": prices + shift - 1,
+                      "close": prices + shift, "volume": 10.5}).to_csv(f"./dataset/{exchange}_data_ETHUSDT_15m.csv")
+
+    Data_preprocessing(["ETHUSDT"])
+    batch = pd.read_csv("./dataset_preprocessed/ETHUSDT_15m.csv")
+    Data_streaming(["ETHUSDT"], ["15m"], chunk_size=64)
+    assert pd.read_csv("./dataset_preprocessed/ETHUSDT_15m.csv").equals(batch)
@@ -0,0 +1,44 @@
+import os
+import numpy as np
+import pandas as pd
+
+from data_validation import Data_validation
+
+
+def make_candles():
+    return pd.DataFrame({"date": ["2024-01-01"] * 5, "dateTime": [0, 60000, 60000, 240000, 180000],
+                         "open": [10.0, 11.0, 12.0, 13.0, 14.0], "high": ["11", "12", "x", "14", "15"],
+                         "low": [9.0, 10.0, 11.0, 13.5, -1.0], "close": [10.5, 11.5, 12.5, 13.5, 14.5],
+                         "volume": [1.0, np.nan, 3.0, 4.0, 5.0]})
+
+
+def test_validate():
+    report = Data_validation.validate(make_candles())
+    assert report["n_records"] == 5
+    assert report["columns"]["high"]["nulls"] == 1 and report["columns"]["volume"]["nulls"] == 1
+    assert report["columns"]["volume"]["mean"] == 3.25 and report["columns"]["open"]["max"] == 14.0
+    assert (report["non_increasing"], report["monotonic"], report["duplicate_keys"]) == (2, False, 1)
+    # the low above the open and close and the negative low
+    assert report["price_violations"] == {"prices": 2}
+    assert Data_validation.describe(report, ["open"])["open"].tolist() == \
+        make_candles()["open"].describe().tolist()
+
+
+def test_report_is_reused_until_the_file_changes(tmp_path):
+    path = str(tmp_path / "Binance_data_ETHUSDT_1m.csv")
+    make_candles().to_csv(path)
+    validation_file = str(tmp_path / "dataset_index" / "validation.json")
+    validation = Data_validation(validation_file)
+    report = validation.get_report(path, pd.read_csv(path, index_col=0))
+    validation.save_reports()
+
+    # the stored report is returned without validating the dataset again, its columns are still converted
+    dataset = pd.read_csv(path, index_col=0).iloc[:2]
+    assert Data_validation(validation_file).get_report(path, dataset) == report
+    assert dataset["high"].dtype != object
+
+    with open(path, "a") as file:
+        file.write("5,2024-01-01,300000,15.0,16,14.0,15.5,6.0\n")
+    os.utime(path, (1e9, 1e9))
+    report = Data_validation(validation_file).get_report(path, pd.read_csv(path, index_col=0))
+    assert report["n_records"] == 6 and report["modified"] == 1e9
@@ -0,0 +1,52 @@
+import json
+import os
+
+from dataset_catalog import Dataset_catalog
+
+
+def test_parse_filename():
+    assert Dataset_catalog.parse_filename("Binance_data_BTCUSDT_15m.csv") == ("Binance", "BTCUSDT", "15m")
+    assert Dataset_catalog.parse_filename("Bybit_data_1000PEPEUSDT_1h.csv") == ("Bybit", "1000PEPEUSDT", "1h")
+    assert Dataset_catalog.parse_filename("ETHUSDT_5m.csv") == (None, "ETHUSDT", "5m")
+    for file in ["ETHUSDT_5m.csv.tmp", "Binance_data_ETHUSDT.csv", "ethusdt_5m.csv", "ETHUSDT_5s.csv", "catalog.json"]:
+        assert Dataset_catalog.parse_filename(file) is None
+
+
+def write(path=None, header=None):
+    with open(path, "w") as file:
+        file.write(header + "\n1,2,3\n")
+
+
+def test_manifest_is_refreshed_only_for_changed_files(tmp_path):
+    for directory in ["dataset", "dataset_preprocessed"]:
+        os.makedirs(tmp_path / directory)
+    write(tmp_path / "dataset" / "Binance_data_ETHUSDT_1m.csv", ",date,dateTime")
+    write(tmp_path / "dataset" / "Bybit_data_ETHUSDT_1m.csv", ",date,dateTime")
+    write(tmp_path / "dataset" / "notes.csv", "text")
+    write(tmp_path / "dataset_preprocessed" / "ETHUSDT_1m.csv", "date,dateTime,arbitrage")
+    directories, catalog_file = [str(tmp_path / "dataset"), str(tmp_path / "dataset_preprocessed")], \
+        str(tmp_path / "dataset_index" / "catalog.json")
+
+    catalog = Dataset_catalog(directories, catalog_file)
+    assert len(catalog.manifest) == 3
+    assert [entry["exchange"] for entry in catalog.find(str(tmp_path / "dataset"), ["ETHUSDT"], ["1m"])] == \
+        ["Binance", "Bybit"]
+    assert catalog.find(str(tmp_path / "dataset_preprocessed"))[0]["columns"] == ["date", "dateTime", "arbitrage"]
+    assert catalog.find(pairs=["BTCUSDT"]) == []
+
+    # the header of an unchanged file is not read again, so a stored entry with the same size and time is kept
+    with open(catalog_file, "r") as file:
+        manifest = json.load(file)
+    Binance_path = os.path.join(directories[0], "Binance_data_ETHUSDT_1m.csv")
+    manifest[Binance_path]["columns"] = ["stored"]
+    with open(catalog_file, "w") as file:
+        json.dump(manifest, file)
+    assert Dataset_catalog(directories, catalog_file).manifest[Binance_path]["columns"] == ["stored"]
+
+    write(tmp_path / "dataset" / "Binance_data_ETHUSDT_1m.csv", ",date,dateTime,open")
+    os.remove(tmp_path / "dataset" / "Bybit_data_ETHUSDT_1m.csv")
+    catalog = Dataset_catalog(directories, catalog_file)
+    assert catalog.manifest[Binance_path]["columns"] == ["", "date", "dateTime", "open"]
+    assert [entry["exchange"] for entry in catalog.find(directories[0])] == ["Binance"]
+    with open(catalog_file, "r") as file:
+        assert json.load(file) == catalog.manifest
@@ -0,0 +1,79 @@
+import json
+import os
+import numpy as np
+import pytest
+
+from building_models import Building_models
+from experiment_store import Experiment_store
+from model_registry import Model_registry
+
+
+def test_save_and_load(tmp_path):
+    store = Experiment_store(str(tmp_path))
+    key = store.get_key("fingerprint", {"test_size": 0.2}, "logistic_regression", {"C": 10}, 2)
+    assert store.load(key) is None
+
+    store.save(key, {"f1": 0.5}, np.array([0, 1, 1]), {"model": "fitted"})
+    result = store.load(key)
+    assert result["f1"] == 0.5 and result["model"] == {"model": "fitted"}
+    assert np.array_equal(result["prediction"], [0, 1, 1])
+
+
+def test_unfinished_experiment_is_not_loaded(tmp_path):
+    store = Experiment_store(str(tmp_path))
+    store.save("unfinished", {"f1": 0.5}, np.array([0, 1]), None)
+    (tmp_path / "unfinished" / "result.json").unlink()
+    assert store.load("unfinished") is None
+
+
+@pytest.mark.parametrize("change", [{"fingerprint": "other"}, {"config": {"test_size": 0.3}},
+                                    {"spec": "random_forest"}, {"parameters": {"C": 1}}, {"seed": 3}])
+def test_key_depends_on_every_input(change):
+    inputs = {"fingerprint": "fingerprint", "config": {"test_size": 0.2}, "spec": "logistic_regression",
+              "parameters": {"C": 10}, "seed": 2}
+    assert Experiment_store.get_key(**inputs) == Experiment_store.get_key(**inputs)
+    assert Experiment_store.get_key(**inputs) != Experiment_store.get_key(**dict(inputs, **change))
+
+
+def train(seed=2, imbalance="none"):
+    Building_models(["ETHUSDT"], workers=1, imbalance=imbalance, seed=seed)
+    with open("../best_models/best_models.json", "r") as file:
+        return json.load(file)["ETHUSDT"]
+
+
+def count_experiments(workspace=None):
+    return len(os.listdir(workspace / "experiments"))
+
+
+@pytest.mark.filterwarnings("ignore::sklearn.exceptions.ConvergenceWarning")
+# the volatility hypothesis has no scores of BTCUSDT to compare with
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+def test_training_skips_performed_experiments(workspace, capsys):
+    trained = train()
+    assert count_experiments(workspace) == 12
+    assert "(cached)" not in capsys.readouterr().out
+
+    cached = train()
+    assert count_experiments(workspace) == 12
+    assert capsys.readouterr().out.count("(cached)") == 12
+    assert cached == dict(trained, version=2)
+    registry = Model_registry()
+    assert registry.get_manifest("ETHUSDT", 2)["metrics"] == registry.get_manifest("ETHUSDT", 1)["metrics"]
+
+    train(seed=3)
+    assert count_experiments(workspace) == 24
+
+
+@pytest.mark.filterwarnings("ignore::sklearn.exceptions.ConvergenceWarning")
+# the volatility hypothesis has no scores of BTCUSDT to compare with
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+def test_training_records_the_applied_imbalance_strategy(workspace, capsys):
+    train(imbalance="class_weight")
+    output = capsys.readouterr().out
+    assert "Multilayer perceptron supports no class weights" in output
+    assert "Training time (none)" in output and "Training time (class_weight)" in output
+
+    # the perceptron trained without weights is the same experiment as with the none strategy
+    train(imbalance="none")
+    assert count_experiments(workspace) == 21
+    assert capsys.readouterr().out.count("(cached)") == 3
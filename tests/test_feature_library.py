@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from compact_dataset import Compact_dataset
+from feature_library import Feature_library
+from feature_pipeline import Feature_pipeline, CANDLE_COLUMNS
+from model_registry import Model_registry
+
+CONFIG = {"lagged_spread": [1, 3], "spread_mean": [4], "spread_std": [4], "volatility": [3],
+          "volume_imbalance": [2], "range_ratio": [2]}
+
+
+def test_update_matches_extend(make_candles):
+    Binance_candles, Bybit_candles = make_candles(40)
+    library = Feature_library(CONFIG)
+    pipeline = Feature_pipeline(library)
+    online = [pipeline.update(Binance_candle, Bybit_candle)
+              for Binance_candle, Bybit_candle in zip(Binance_candles, Bybit_candles)]
+
+    columns = [column + "_" + exchange for exchange in ["Binance", "Bybit"] for column in CANDLE_COLUMNS]
+    dataset = pd.DataFrame([Binance_candle[1:] + Bybit_candle[1:]
+                            for Binance_candle, Bybit_candle in zip(Binance_candles, Bybit_candles)], columns=columns)
+    compact = Compact_dataset.from_frame(Feature_pipeline.transform(dataset))
+    extended = library.extend(compact)
+
+    assert extended.columns == pipeline.columns
+    completed = np.stack([features for features in online if features is not None])
+    # the online pipeline emits a candle once the next one opens, so the last record is missing
+    assert np.allclose(completed, extended.features[-len(completed) - 1:-1], rtol=1e-4, atol=1e-5)
+
+
+def test_update_waits_for_the_longest_window(make_candles):
+    Binance_candles, Bybit_candles = make_candles(8)
+    pipeline = Feature_pipeline(Feature_library(CONFIG))
+    online = [pipeline.update(Binance_candle, Bybit_candle)
+              for Binance_candle, Bybit_candle in zip(Binance_candles, Bybit_candles)]
+    assert [features is None for features in online] == [True] * 5 + [False] * 3
+
+
+def test_check_features():
+    columns = Feature_pipeline(Feature_library(CONFIG)).columns
+    Model_registry.check_features(columns, CONFIG)
+    with pytest.raises(ValueError):
+        Model_registry.check_features(columns, None)
+    with pytest.raises(ValueError):
+        Model_registry.check_features(columns[:-1], CONFIG)
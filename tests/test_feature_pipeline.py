@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+from sklearn.dummy import DummyClassifier
+
+from feature_pipeline import Feature_pipeline, CANDLE_COLUMNS
+from inference_service import Inference_service
+
+
+def test_compute_changes_forward_and_backward(make_prices):
+    dataset = make_prices(30)
+    changes = Feature_pipeline.compute_changes(dataset, ["open_Binance"], [2, -3])
+    prices = dataset["open_Binance"]
+
+    forward = ((prices.shift(-2) - prices) / prices * 100).fillna(0)
+    backward = ((prices - prices.shift(3)) / prices.shift(3) * 100).fillna(0)
+    assert np.allclose(changes["change_open_Binance_2"], forward)
+    assert np.allclose(changes["change_open_Binance_-3"], backward)
+
+
+def test_compute_changes_beyond_the_dataset(make_prices):
+    changes = Feature_pipeline.compute_changes(make_prices(3), ["open_Bybit"], [5])
+    assert changes["change_open_Bybit_5"].tolist() == [0, 0, 0]
+
+
+def test_transform_appends_next_open_change(make_prices):
+    dataset = make_prices(30)
+    transformed = Feature_pipeline.transform(dataset)
+
+    for exchange in ["Binance", "Bybit"]:
+        prices = dataset["open_" + exchange]
+        expected = ((prices.shift(-1) - prices) / prices * 100).fillna(0)
+        assert np.allclose(transformed["change_" + exchange], expected)
+        assert transformed["change_" + exchange].iloc[-1] == 0
+
+
+def test_update_matches_transform(make_candles):
+    Binance_candles, Bybit_candles = make_candles()
+    pipeline = Feature_pipeline()
+    online = [pipeline.update(Binance_candle, Bybit_candle)
+              for Binance_candle, Bybit_candle in zip(Binance_candles, Bybit_candles)]
+
+    columns = [column + "_" + exchange for exchange in ["Binance", "Bybit"] for column in CANDLE_COLUMNS]
+    dataset = pd.DataFrame([Binance_candle[1:] + Bybit_candle[1:]
+                            for Binance_candle, Bybit_candle in zip(Binance_candles, Bybit_candles)], columns=columns)
+    batch = Feature_pipeline.feature_matrix(Feature_pipeline.transform(dataset))
+
+    assert online[0] is None
+    assert np.array_equal(np.stack(online[1:]), batch[:-1])
+
+
+def test_update_repeats_features_within_the_minute(make_candles):
+    Binance_candles, Bybit_candles = make_candles(4)
+    pipeline = Feature_pipeline()
+    assert pipeline.update(Binance_candles[0], Bybit_candles[0]) is None
+
+    model = DummyClassifier(strategy="constant", constant=1).fit(np.zeros((1, 12)), [1])
+    service = Inference_service(lambda model_key: model)
+    for index in range(1, len(Binance_candles)):
+        rows = []
+        for tick in range(4):
+            # the bot receives the two last klines on every tick, the newest one is still open and changing
+            Binance_open, Bybit_open = list(Binance_candles[index]), list(Bybit_candles[index])
+            Binance_open[4] += tick
+            Bybit_open[4] -= tick
+            pipeline.update(Binance_candles[index - 1], Bybit_candles[index - 1])
+            rows.append(pipeline.update(Binance_open, Bybit_open))
+
+            service.submit("BTCUSDT", rows[-1], ("BTCUSDT", 1))
+            assert [future.result() for future in service.flush()] == [{"BTCUSDT": 1}]
+
+        assert all(np.array_equal(row, rows[0]) for row in rows)
+        assert rows[0][0] == np.float32(Binance_candles[index - 1][1])
+    service.shutdown()
@@ -0,0 +1,51 @@
+import os
+import numpy as np
+from sklearn.preprocessing import StandardScaler
+from imblearn.under_sampling import RandomUnderSampler
+
+from fit_cache import Fit_cache
+
+
+def test_fit_transform_reuses_the_fitted_stage(make_data, tmp_path):
+    cache = Fit_cache(str(tmp_path))
+    x, y = make_data(200, n_features=4)
+    fingerprint = Fit_cache.fingerprint(x, y)
+    stage, output, key = cache.fit_transform(StandardScaler(), x, y, fingerprint)
+    cached_stage, cached_output, cached_key = cache.fit_transform(StandardScaler(), x, y, fingerprint)
+
+    assert cached_key == key
+    assert isinstance(cached_output, np.memmap)
+    assert np.array_equal(cached_output, output)
+    assert np.array_equal(cached_stage.mean_, stage.mean_)
+
+
+def test_resample_reuses_the_resampled_data(make_data, tmp_path):
+    cache = Fit_cache(str(tmp_path))
+    x, y = make_data(200, n_features=4)
+    resampled_x, resampled_y = cache.resample(RandomUnderSampler(random_state=2), x, y)
+    cached_x, cached_y = cache.resample(RandomUnderSampler(random_state=2), x, y)
+    assert np.array_equal(cached_x, resampled_x) and np.array_equal(cached_y, resampled_y)
+
+
+def test_evict_removes_least_recently_used(make_data, tmp_path):
+    cache = Fit_cache(str(tmp_path))
+    x, y = make_data(200, n_features=4)
+    for index in range(3):
+        cache.fit_transform(StandardScaler(with_std=index % 2 == 0, with_mean=index < 2), x, y, "data")
+    files = sorted(os.listdir(tmp_path), key=lambda name: os.path.getmtime(os.path.join(tmp_path, name)))
+    for age, name in enumerate(reversed(files)):
+        os.utime(os.path.join(tmp_path, name), (1e9 - age, 1e9 - age))
+
+    newest = os.path.getsize(os.path.join(tmp_path, files[-1])) + os.path.getsize(os.path.join(tmp_path, files[-2]))
+    assert cache.evict(max_size=newest, max_age=float("inf")) == len(files) - 2
+    assert sorted(os.listdir(tmp_path)) == sorted(files[-2:])
+    assert cache.evict(max_age=0) == 2
+    assert cache.clear() == 0
+
+
+def test_clear_removes_every_file(make_data, tmp_path):
+    cache = Fit_cache(str(tmp_path))
+    x, y = make_data(200, n_features=4)
+    cache.fit_transform(StandardScaler(), x, y, "data")
+    assert cache.clear() == 2
+    assert os.listdir(tmp_path) == []
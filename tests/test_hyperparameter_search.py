@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+from sklearn.model_selection import train_test_split
+
+from hyperparameter_search import Hyperparameter_search
+from model_specs import IMBALANCE_STRATEGIES, TEST_SIZE, SPLIT_SEED
+from shared_arrays import Shared_arrays
+
+
+def test_search_never_sees_the_testing_records():
+    x = np.arange(1000, dtype=np.float32).reshape(-1, 1)
+    y = np.arange(1000) % 2
+    train_dataset, test_dataset, _, _ = train_test_split(x, y, test_size=TEST_SIZE, random_state=SPLIT_SEED)
+    positions = Hyperparameter_search.get_train_positions(len(x))
+
+    assert np.all(np.diff(positions) > 0)
+    assert np.array_equal(np.sort(x[positions, 0]), np.sort(train_dataset[:, 0]))
+    assert np.intersect1d(x[positions, 0], test_dataset[:, 0]).size == 0
+
+
+@pytest.mark.filterwarnings("ignore::sklearn.exceptions.ConvergenceWarning")
+@pytest.mark.parametrize("imbalance", list(IMBALANCE_STRATEGIES))
+def test_evaluate_with_every_imbalance_strategy(imbalance, make_data, tmp_path):
+    x, y = make_data(1000)
+    paths = [Shared_arrays.share_array(x, str(tmp_path), "dataset"),
+             Shared_arrays.share_array(y, str(tmp_path), "arbitrage")]
+    for spec in ["logistic_regression", "multilayer_perceptron"]:
+        score = Hyperparameter_search.evaluate(spec, {"max_iter": 500}, 600, paths, 800, imbalance)
+        assert 0 < score <= 1
@@ -0,0 +1,71 @@
+from concurrent.futures import as_completed
+import numpy as np
+
+from inference_service import Inference_service
+
+
+class Threshold_model:
+    def __init__(self, n_features=None):
+        self.n_features = n_features
+
+    def predict(self, dataset=None):
+        if dataset.shape[1] != self.n_features:
+            raise ValueError("Wrong number of features.")
+        return (dataset[:, 0] > 0).astype(np.int64)
+
+
+def collect(futures=None):
+    predictions = {}
+    for future in as_completed(futures):
+        predictions.update(future.result())
+    return predictions
+
+
+def test_flush_scores_one_batch_per_model():
+    loaded = []
+
+    def load_model(model_key=None):
+        loaded.append(model_key)
+        return Threshold_model(2)
+
+    service = Inference_service(load_model)
+    service.submit("BTCUSDT", np.array([1.0, 0.0]), ("shared", 1))
+    service.submit("ETHUSDT", np.array([-1.0, 0.0]), ("shared", 1))
+    service.submit("SOLUSDT", np.array([1.0, 0.0]), ("SOLUSDT", 4))
+    futures = service.flush()
+
+    assert len(futures) == 2
+    assert collect(futures) == {"BTCUSDT": 1, "ETHUSDT": 0, "SOLUSDT": 1}
+    assert sorted(loaded) == [("SOLUSDT", 4), ("shared", 1)]
+    service.shutdown()
+
+
+def test_models_are_reloaded_only_for_a_new_version():
+    loaded = []
+
+    def load_model(model_key=None):
+        loaded.append(model_key)
+        return Threshold_model(2)
+
+    service = Inference_service(load_model)
+    for version in [1, 1, 2, 2]:
+        service.submit("BTCUSDT", np.array([1.0, 0.0]), ("BTCUSDT", version))
+        assert collect(service.flush()) == {"BTCUSDT": 1}
+    assert loaded == [("BTCUSDT", 1), ("BTCUSDT", 2)]
+    assert list(service.models) == [("BTCUSDT", 2)]
+    service.shutdown()
+
+
+def test_pairs_whose_model_fails_are_skipped():
+    models = {("BTCUSDT", 1): Threshold_model(2), ("SOLUSDT", 1): Threshold_model(3)}
+
+    def load_model(model_key=None):
+        if model_key not in models:
+            raise ValueError(f"Model version {model_key[1]} of {model_key[0]} is not registered.")
+        return models[model_key]
+
+    service = Inference_service(load_model)
+    for symbol in ["BTCUSDT", "ETHUSDT", "SOLUSDT"]:
+        service.submit(symbol, np.array([1.0, 0.0]), (symbol, 1))
+    assert collect(service.flush()) == {"BTCUSDT": 1}
+    service.shutdown()
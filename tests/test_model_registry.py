@@ -0,0 +1,71 @@
+import os
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+from feature_pipeline import FEATURE_COLUMNS
+from model_registry import Model_registry
+
+
+def register(registry=None, fit_pipeline=None, C=1.0, **options):
+    pipeline, _ = fit_pipeline(LogisticRegression(C=C, max_iter=500))
+    return registry.register("BTCUSDT", pipeline, "fingerprint", FEATURE_COLUMNS, {"f1": C}, **options)
+
+
+def test_register_and_load(fit_pipeline, tmp_path):
+    registry = Model_registry(str(tmp_path))
+    pipeline, x = fit_pipeline()
+    version = registry.register("BTCUSDT", pipeline, "fingerprint", FEATURE_COLUMNS, {"f1": 0.5}, ["baseline"],
+                                interval="1m")
+
+    manifest = registry.get_manifest("BTCUSDT")
+    assert version == 1 and manifest["version"] == 1 and manifest["interval"] == "1m"
+    assert manifest["features"] == FEATURE_COLUMNS and manifest["feature_config"] is None
+    assert np.array_equal(registry.load("BTCUSDT", "baseline").predict(x), pipeline.predict(x))
+    assert np.array_equal(registry.load_pipeline("BTCUSDT", 1).predict(x), pipeline.predict(x))
+    assert not any(name.endswith(".tmp") for name in os.listdir(tmp_path / "BTCUSDT"))
+
+
+def test_activate_tag_and_resolve(fit_pipeline, tmp_path):
+    registry = Model_registry(str(tmp_path))
+    register(registry, fit_pipeline, 1.0)
+    register(registry, fit_pipeline, 2.0, tags=["candidate"], activate=False)
+    assert registry.resolve("BTCUSDT") == 1
+    assert registry.resolve("BTCUSDT", "candidate") == 2
+    assert registry.resolve("BTCUSDT", "2") == 2
+
+    assert registry.activate("BTCUSDT", "candidate") == 2
+    assert registry.get_manifest("BTCUSDT")["metrics"] == {"f1": 2.0}
+    assert registry.activate("BTCUSDT", 1) == 1
+    registry.tag("BTCUSDT", 1, "candidate")
+    assert registry.resolve("BTCUSDT", "candidate") == 1
+
+    with pytest.raises(ValueError):
+        registry.resolve("BTCUSDT", 3)
+    with pytest.raises(ValueError):
+        registry.resolve("BTCUSDT", "unknown")
+
+
+def test_registered_versions_are_immutable(fit_pipeline, tmp_path):
+    registry = Model_registry(str(tmp_path))
+    register(registry, fit_pipeline, 1.0)
+    directory = tmp_path / "BTCUSDT" / "v1"
+    files = {name: os.path.getmtime(directory / name) for name in os.listdir(directory)}
+
+    # a version directory left behind by another writer is never written into
+    os.makedirs(tmp_path / "BTCUSDT" / "v2")
+    with pytest.raises(ValueError):
+        register(registry, fit_pipeline, 2.0)
+    assert os.listdir(tmp_path / "BTCUSDT" / "v2") == []
+
+    os.rmdir(tmp_path / "BTCUSDT" / "v2")
+    assert register(registry, fit_pipeline, 2.0) == 2
+    assert {name: os.path.getmtime(directory / name) for name in files} == files
+
+
+def test_register_rejects_features_not_computed_online(fit_pipeline, tmp_path):
+    registry = Model_registry(str(tmp_path))
+    pipeline, _ = fit_pipeline()
+    with pytest.raises(ValueError):
+        registry.register("BTCUSDT", pipeline, "fingerprint", FEATURE_COLUMNS[::-1], {"f1": 0.5})
+    assert registry.get_index("BTCUSDT")["versions"] == []
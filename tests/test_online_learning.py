@@ -0,0 +1,50 @@
+import os
+import numpy as np
+from sklearn.linear_model import SGDClassifier
+
+import online_learning
+from feature_pipeline import FEATURE_COLUMNS
+from model_registry import Model_registry
+from online_learning import Online_learning
+
+
+def register_model(registry=None, fit_pipeline=None):
+    pipeline, _ = fit_pipeline(SGDClassifier(random_state=2))
+    return registry.register("BTCUSDT", pipeline, "fingerprint", FEATURE_COLUMNS, {"f1": 0.5})
+
+
+def test_learns_once_per_candle(make_candles, fit_pipeline, tmp_path, monkeypatch):
+    monkeypatch.setattr(online_learning, "Model_registry", lambda: Model_registry(str(tmp_path)))
+    register_model(Model_registry(str(tmp_path)), fit_pipeline)
+    learner = Online_learning.from_registry("BTCUSDT", export_every=100)
+
+    for Binance_candle, Bybit_candle in zip(*make_candles(12)):
+        for tick in range(3):
+            learner.update(Binance_candle, [Bybit_candle[0]] + [price + tick for price in Bybit_candle[1:5]] + [5.0])
+    # the first candle has no previous one to be labelled against and the last one is still open
+    assert learner.n_updates == 10
+    assert len(learner.buffer) == 10
+
+
+def test_export_registers_new_versions_under_the_tag(make_candles, fit_pipeline, tmp_path, monkeypatch):
+    registry = Model_registry(str(tmp_path))
+    monkeypatch.setattr(online_learning, "Model_registry", lambda: registry)
+    register_model(registry, fit_pipeline)
+    directory = registry.get_directory("BTCUSDT", 1)
+    files = {name: os.path.getmtime(os.path.join(directory, name)) for name in os.listdir(directory)}
+
+    learner = Online_learning.from_registry("BTCUSDT", export_every=4)
+    assert registry.resolve("BTCUSDT", "online") == 1
+    for Binance_candle, Bybit_candle in zip(*make_candles(12)):
+        learner.update(Binance_candle, Bybit_candle)
+
+    index = registry.get_index("BTCUSDT")
+    assert index["versions"] == [1, 2, 3] and index["current"] == 1 and index["tags"]["online"] == 3
+    assert registry.get_manifest("BTCUSDT", 3)["parent"] == 2
+    assert registry.get_manifest("BTCUSDT", 2)["parent"] == 1
+    assert registry.get_manifest("BTCUSDT", "online")["online_updates"] == 8
+    assert {name: os.path.getmtime(os.path.join(directory, name)) for name in files} == files
+
+    x = np.random.default_rng(3).normal(size=(50, len(FEATURE_COLUMNS))).astype(np.float32)
+    assert np.array_equal(registry.load("BTCUSDT", "online").predict(x),
+                          registry.load_pipeline("BTCUSDT", "online").predict(x))
@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+from sklearn.preprocessing import StandardScaler
+
+from walk_forward import Walk_forward
+
+
+def test_incremental_scalers_match_scalers_fitted_on_each_training_part(make_data):
+    x, _ = make_data(1000)
+    boundaries = np.array([150, 400, 401, 720, 1000])
+    scalers = Walk_forward.fit_scalers(x, boundaries)
+
+    assert len(scalers) == len(boundaries) - 1
+    for scaler, train_end in zip(scalers, boundaries[:-1]):
+        fitted = StandardScaler().fit(x[:train_end])
+        assert scaler.n_samples_seen_ == train_end
+        assert np.allclose(scaler.mean_, fitted.mean_) and np.allclose(scaler.scale_, fitted.scale_)
+
+
+@pytest.mark.filterwarnings("ignore::sklearn.exceptions.ConvergenceWarning")
+def test_folds_train_on_the_past_and_test_on_the_next_block(workspace):
+    walk_forward = Walk_forward(["ETHUSDT"], n_folds=3, specs=["logistic_regression"], workers=1)
+    assert walk_forward.get_boundaries(100).tolist() == [25, 50, 75, 100]
+    assert walk_forward.get_boundaries(10).tolist() == [2, 5, 7, 10]
+
+    assert sorted(walk_forward.results) == [("logistic_regression", "ETHUSDT", interval)
+                                            for interval in ["15m", "1m", "5m"]]
+    for results in walk_forward.results.values():
+        assert sorted(result["fold"] for result in results) == [0, 1, 2]